@@ -10,6 +10,7 @@ This script automates the entire process:
 
 The data is organized in the following structure:
 data/
+  ├── crawl_state.db  (crawl cursors and comments, committed per page)
   ├── javascript/
   │   ├── experts.json
   │   ├── pipeline_results.json
@@ -26,7 +27,7 @@ import os
 import logging
 import asyncio
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Set
 
@@ -37,6 +38,9 @@ from src.expert_finder import GitHubExpertFinder
 from src.comment_crawler import GitHubCommentCrawler
 from src.comment_enricher import CommentEnricher
 from src.embedding_importer import CommentEmbedder
+from src.token_pool import TokenPool
+from src.crawl_planner import CrawlPlanner, ExpertQueue
+from src.gharchive import find_archives
 
 # Load environment variables from .env file
 load_dotenv()
@@ -106,9 +110,10 @@ class GitHubDataPipeline:
         # Create output directory if it doesn't exist
         os.makedirs(self.output_dir, exist_ok=True)
         
-        # Initialize components with all tokens
-        self.expert_finder = GitHubExpertFinder(self.github_tokens)  # Pass all tokens to expert finder for rotation
-        self.comment_crawler = GitHubCommentCrawler(self.github_tokens)  # Comment crawler can use all tokens
+        # Initialize components with all tokens; one pool leases a token to each concurrent worker
+        self.token_pool = TokenPool(self.github_tokens)
+        self.expert_finder = GitHubExpertFinder(self.github_tokens, token_pool=self.token_pool)
+        self.comment_crawler = GitHubCommentCrawler(self.github_tokens, token_pool=self.token_pool)
         self.comment_enricher = CommentEnricher(
             api_key=self.openai_key,
             model=self.openai_model
@@ -120,18 +125,28 @@ class GitHubDataPipeline:
             qdrant_api_key=self.qdrant_key
         )
         
-        # Task management
-        self.active_tasks = set()
+        # Task management; the adaptive GitHub and OpenAI limits only gate requests, not tasks
         self.max_concurrent_tasks = int(os.getenv("MAX_CONCURRENT_TASKS", "5"))
+        self.active_tasks = set()
+        self.github_limiter = self.comment_crawler.limiter
+        self.openai_limiter = self.comment_enricher.limiter
         self.collection_tasks = {}  # username -> task
         self.enrichment_tasks = {}  # username -> task
         self.embedding_tasks = {}   # username -> task
+        
+        # Crawl the most valuable experts first, paced so the tokens' quota lasts until their resets
+        self.crawl_planner = CrawlPlanner(self.token_pool, resource="core" if self.use_rest_api else "graphql")
+        self.pace_crawls = os.getenv("CRAWL_PLANNER", "true").lower() == "true"
+        # Skip recrawls of experts without new PRs or reviews since their last complete crawl
+        self.probe_activity = os.getenv("ACTIVITY_PROBE", "true").lower() == "true"
+        self.activity_probe_batch = int(os.getenv("ACTIVITY_PROBE_BATCH", "25"))
         self.results = {
             "experts_processed": 0,
             "experts_failed": 0,
             "total_comments": 0,
             "successful_experts": [],
-            "failed_experts": []
+            "failed_experts": [],
+            "crawl_yield": {}
         }
         
         # Current language being processed
@@ -190,6 +205,10 @@ class GitHubDataPipeline:
             int: Number of comments, 0 if no comments or errors
         """
         comments_file = os.path.join(self.get_expert_dir(language, username), "comments.json")
+        # The crawl store counts without loading the comments
+        stored = self.comment_crawler.comment_count(comments_file)
+        if stored is not None:
+            return stored
         if not os.path.exists(comments_file):
             return 0
         
@@ -204,7 +223,130 @@ class GitHubDataPipeline:
         except Exception as e:
             logger.error(f"Error reading comments file for {username}: {e}")
             return 0
+    
+    def get_shared_repositories(self, language: str, usernames: List[str], min_experts: int = 2) -> List[str]:
+        """
+        Get repositories in which several experts already have comments.
+        
+        Args:
+            language (str): Programming language
+            usernames (list): GitHub usernames
+            min_experts (int): Minimum number of experts commenting in a repository
+            
+        Returns:
+            list: Repositories as owner/name, most shared first
+        """
+        expert_counts = {}
+        for username in usernames:
+            comments_file = os.path.join(self.get_expert_dir(language, username), "comments.json")
+            if not os.path.exists(comments_file):
+                continue
+            try:
+                with open(comments_file, "r", encoding="utf-8") as f:
+                    repos = {comment.get("repo") for comment in json.load(f) if comment.get("repo")}
+            except Exception as e:
+                logger.error(f"Error reading comments file for {username}: {e}")
+                continue
+            for repo in repos:
+                expert_counts[repo] = expert_counts.get(repo, 0) + 1
+        
+        shared = [repo for repo, count in expert_counts.items() if count >= min_experts]
+        return sorted(shared, key=lambda repo: expert_counts[repo], reverse=True)
+        
+    def get_past_yields(self, language: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the crawl yields recorded in the language's last pipeline_results.json.
+        
+        Args:
+            language (str): Programming language
+            
+        Returns:
+            dict: Username -> yield summary, empty if there is no readable results file
+        """
+        results_file = os.path.join(self.get_language_dir(language), "pipeline_results.json")
+        if not os.path.exists(results_file):
+            return {}
+        
+        try:
+            with open(results_file, "r", encoding="utf-8") as f:
+                return json.load(f).get("crawl_yield") or {}
+        except Exception as e:
+            logger.error(f"Error reading pipeline results: {e}")
+            return {}
+    
+    async def skip_inactive_experts(self, language: str, usernames: List[str]) -> List[str]:
+        """
+        Drop experts with no new activity since their last complete crawl.
+        
+        One aliased GraphQL query probes the latest PR and review of a whole batch
+        of experts, instead of a crawl per expert finding nothing new.
+        
+        Args:
+            language (str): Programming language
+            usernames (list): GitHub usernames about to be crawled
+            
+        Returns:
+            list: Usernames that still need a crawl
+        """
+        if not self.probe_activity or self.use_rest_api or not usernames:
+            return list(usernames)
+        
+        activity = await self.comment_crawler.probe_activity_async(list(usernames), self.activity_probe_batch)
+        active = [
+            username for username in usernames
+            if self.comment_crawler.has_new_activity(
+                os.path.join(self.get_expert_dir(language, username), "comments.json"), activity.get(username)
+            )
+        ]
+        logger.info(f"Skipping {len(usernames) - len(active)}/{len(usernames)} experts without new activity")
+        return active
+    
+    async def plan_crawls(self, language: str, usernames: List[str], experts_data: Dict[str, Dict[str, Any]],
+                          comment_limit: int) -> List[Dict[str, Any]]:
+        """
+        Order experts by expected comments per API point and schedule their crawls against the tokens' quota.
         
+        Args:
+            language (str): Programming language
+            usernames (list): GitHub usernames to crawl
+            experts_data (dict): Username -> expert data with prs / pr_reviews counts
+            comment_limit (int): Maximum number of comments per expert
+            
+        Returns:
+            list: Schedule entries with login, cost and start time, most valuable expert first
+        """
+        past_yields = self.get_past_yields(language)
+        crawl_yields = {}
+        collected = {}
+        for username in set(usernames) | set(experts_data):
+            output_file = os.path.join(self.get_expert_dir(language, username), "comments.json")
+            crawl_yields[username] = self.comment_crawler.crawl_yield(output_file) or past_yields.get(username)
+            collected[username] = self.get_expert_comment_count(language, username)
+        self.crawl_planner.calibrate(crawl_yields.values())
+        
+        queue = ExpertQueue()
+        for username in usernames:
+            queue.push(username, self.crawl_planner.expected_yield(
+                experts_data.get(username, {"login": username}), comment_limit, collected[username], crawl_yields[username]
+            ))
+        ordered = [queue.pop() for _ in range(len(queue))]
+        
+        if not self.pace_crawls:
+            return [{"login": username, "cost": None, "start": 0} for username in ordered]
+        
+        await asyncio.to_thread(self.crawl_planner.refresh_budgets)
+        schedule = self.crawl_planner.plan(
+            [experts_data.get(username, {"login": username}) for username in ordered],
+            comment_limit,
+            collected=collected,
+            crawl_yields=crawl_yields
+        )
+        
+        total = sum(entry["cost"] for entry in schedule)
+        last_start = max((entry["start"] for entry in schedule), default=0) - datetime.now().timestamp()
+        logger.info(f"Planned {len(schedule)} crawls at ~{total} points, the last starting in {max(0, last_start):.0f}s")
+        return schedule
+    
     async def find_experts(self, language: str, max_experts: int = 10) -> List[Dict[str, Any]]:
         """
         Find experts for a given programming language.
@@ -221,9 +363,8 @@ class GitHubDataPipeline:
         # Setup directory structure for this language
         self.setup_language_dirs(language)
         
-        # Run in a thread to avoid blocking the event loop
-        experts = await asyncio.to_thread(
-            self.expert_finder.find_experts,
+        # Await the asyncio GitHub client directly instead of occupying a worker thread
+        experts = await self.expert_finder.find_experts_async(
             language=language,
             max_users=max_experts,
             use_rest_api=self.use_rest_api
@@ -267,9 +408,8 @@ class GitHubDataPipeline:
         
         output_file = os.path.join(expert_dir, "comments.json")
         
-        # Run in a thread to avoid blocking the event loop
-        comments = await asyncio.to_thread(
-            self.comment_crawler.collect_comments,
+        # Await the asyncio GitHub client directly instead of occupying a worker thread
+        comments = await self.comment_crawler.collect_comments_async(
             username=username,
             limit=comment_limit,
             output_file=output_file,
@@ -278,6 +418,11 @@ class GitHubDataPipeline:
             use_rest_api=self.use_rest_api
         )
         
+        # Valid comments per API point, so low-yield experts can be told apart from failures
+        crawl_yield = self.comment_crawler.crawl_yield(output_file)
+        if crawl_yield:
+            self.results["crawl_yield"][username] = crawl_yield
+        
         if not comments:
             logger.warning(f"No comments found for {username}")
             # Remove empty directory if no comments were found
@@ -590,7 +735,8 @@ class GitHubDataPipeline:
             "experts_failed": 0,
             "total_comments": 0,
             "successful_experts": [],
-            "failed_experts": []
+            "failed_experts": [],
+            "crawl_yield": {}
         }
         
         # Get existing experts
@@ -661,18 +807,90 @@ class GitHubDataPipeline:
             if username not in expert_usernames:
                 # Check if they have fewer comments than the limit
                 comment_count = self.get_expert_comment_count(language, username)
-                if comment_count < comment_limit / 2:
+                output_file = os.path.join(self.get_expert_dir(language, username), "comments.json")
+                if (self.comment_crawler.crawl_yield(output_file) or {}).get("stopped"):
+                    # Their last crawl stopped for low yield; leave the quota to other experts
+                    logger.info(f"Skipping recrawl of low-yield expert {username} ({comment_count}/{comment_limit} comments)")
+                elif comment_count < comment_limit / 2:
                     logger.info(f"Adding existing expert {username} for recrawl (has {comment_count}/{comment_limit} comments)")
                     experts_to_process.add(username)
         
+        # Incremental crawls pick up new comments of every known expert
+        if self.comment_crawler.incremental:
+            experts_to_process.update(existing_experts)
+        
+        experts_to_process = set(await self.skip_inactive_experts(language, sorted(experts_to_process)))
+        
         logger.info(f"Processing {len(experts_to_process)} experts for {language}")
         
-        # Process experts in a controlled parallel manner
-        for username in experts_to_process:
-            # Wait if we have reached the maximum number of concurrent tasks
-            while len(self.active_tasks) >= self.max_concurrent_tasks:
-                # Wait for any task to complete
-                await asyncio.sleep(1)
+        # Stream repositories shared by several experts once, routing comments to every expert in them
+        if os.getenv("REPO_STREAM", "false").lower() == "true":
+            tracked_experts = sorted(experts_to_process | set(existing_experts))
+            shared_repos = self.get_shared_repositories(
+                self.current_language, tracked_experts, int(os.getenv("REPO_STREAM_MIN_EXPERTS", "2"))
+            )
+            if shared_repos:
+                since = (datetime.utcnow() - timedelta(days=int(os.getenv("REPO_STREAM_DAYS", "90")))).strftime("%Y-%m-%dT%H:%M:%SZ")
+                await asyncio.to_thread(
+                    self.comment_crawler.stream_repositories,
+                    repos=shared_repos,
+                    output_files={
+                        username: os.path.join(self.get_expert_dir(self.current_language, username), "comments.json")
+                        for username in tracked_experts
+                    },
+                    limit=comment_limit,
+                    state_file=os.path.join(self.get_language_dir(self.current_language), "repo_stream_state.json"),
+                    since=since,
+                    max_pages=int(os.getenv("REPO_STREAM_MAX_PAGES", "50"))
+                )
+        
+        # Backfill history from local GH Archive files before spending API quota on it
+        gharchive_dir = os.getenv("GHARCHIVE_DIR")
+        if gharchive_dir:
+            tracked_experts = sorted(experts_to_process | set(existing_experts))
+            await asyncio.to_thread(
+                self.comment_crawler.ingest_archives,
+                archive_files=find_archives(gharchive_dir),
+                output_files={
+                    username: os.path.join(self.get_expert_dir(self.current_language, username), "comments.json")
+                    for username in tracked_experts
+                },
+                limit=comment_limit,
+                state_file=os.path.join(self.get_language_dir(self.current_language), "gharchive_state.json")
+            )
+        
+        # Fetch the first page of new experts in aliased batches; their crawls then continue from page 2
+        batch_crawl_size = int(os.getenv("BATCH_CRAWL_SIZE", "1"))
+        if batch_crawl_size > 1 and not self.use_rest_api and self.comment_crawler.strategy == self.comment_crawler.DEFAULT_STRATEGY \
+                and not self.comment_crawler.incremental:
+            output_files = {
+                username: os.path.join(self.get_expert_dir(self.current_language, username), "comments.json")
+                for username in experts_to_process
+            }
+            await self.comment_crawler.prefetch_first_pages_async(
+                usernames=list(experts_to_process),
+                output_files=output_files,
+                limit=comment_limit,
+                continue_crawl=continue_crawl,
+                batch_size=batch_crawl_size
+            )
+        
+        # Process experts most valuable first, in a controlled parallel manner, starting each crawl when its planned quota is there
+        experts_data = {**existing_experts, **{expert["login"]: expert for expert in new_experts_data}}
+        schedule = await self.plan_crawls(self.current_language, list(experts_to_process), experts_data, comment_limit)
+        for entry in schedule:
+            username = entry["login"]
+            await CrawlPlanner.wait_for(entry)
+            
+            # Each crawl keeps its state in memory and sends many requests of its own, so the number
+            # of crawls at once, and of enrichments they run ahead of, is capped separately
+            while (len(self.collection_tasks) >= self.max_concurrent_tasks
+                   or len(self.enrichment_tasks) >= self.max_concurrent_tasks):
+                # Wait for a task to complete
+                await asyncio.wait(
+                    list(self.collection_tasks.values()) + list(self.enrichment_tasks.values()),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
             
             # Add to active tasks
             self.active_tasks.add(username)
@@ -690,9 +908,6 @@ class GitHubDataPipeline:
                 )
             )
             self.collection_tasks[username] = collection_task
-            
-            # Small delay to prevent hitting API rate limits
-            await asyncio.sleep(0.5)
         
         # Wait for all tasks to complete (rest of the code remains the same)
         logger.info("Waiting for all tasks to complete...")
@@ -735,6 +950,9 @@ class GitHubDataPipeline:
         logger.info(f"Processed {self.results['experts_processed']} experts successfully")
         logger.info(f"Failed to process {self.results['experts_failed']} experts")
         logger.info(f"Total comments collected: {self.results['total_comments']}")
+        low_yield = [username for username, crawl_yield in self.results["crawl_yield"].items() if crawl_yield.get("stopped")]
+        if low_yield:
+            logger.info(f"Stopped {len(low_yield)} low-yield crawls early: {', '.join(low_yield)}")
         
         return self.results
 
@@ -132,15 +132,17 @@ for language in "${LANGUAGES[@]}"; do
   echo "  EXPERT_LIST_FILE=$expert_file"
   echo ""
   
+  # Wait until the tokens have quota for this language's first crawl instead of
+  # starting right into an exhausted rate limit; the pipeline paces the rest
+  python3 src/crawl_planner.py --env-file "$ENV_FILE" --language "$language" \
+    --comment-limit "$COMMENT_LIMIT" --max-experts "$MAX_EXPERTS" --wait
+  
   # Run the pipeline
   echo "Starting pipeline for $language..."
   python3 pipeline.py
   
   echo "Completed processing for $language"
   echo ""
-  
-  # Optional: Add a delay to avoid hitting API rate limits
-  sleep 5
 done
 
 echo "===================================================="
@@ -0,0 +1,235 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from retry import github_retry_after, is_transient_error, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+# Default (initial, minimum, maximum) in-flight requests per API
+DEFAULT_LIMITS = {
+    "github": (5, 1, 50),
+    "openai": (4, 1, 32),
+}
+
+
+class AdaptiveLimiter:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests to one API.
+
+    Every healthy response raises the limit by increase / limit, i.e. by about
+    `increase` per round of requests, up to maximum. A throttled response
+    (429, Retry-After, secondary rate limit) or a network error cuts it by
+    `decrease` and holds all new requests for Retry-After, or for a backoff
+    that doubles with every consecutive throttle. Throttles arriving during a
+    pause come from requests sent before it and don't cut the limit again.
+    The limiter is shared by threads and asyncio tasks alike.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, name, initial=5, minimum=1, maximum=50, increase=1.0, decrease=0.5,
+                 backoff=1.0, max_backoff=60.0):
+        """
+        Initialize the limiter.
+
+        Args:
+            name (str): API name used in log messages
+            initial (int): Starting number of in-flight requests
+            minimum (int): Lowest limit a throttle can cut to
+            maximum (int): Highest limit healthy responses can grow to
+            increase (float): Limit added per round of healthy responses
+            decrease (float): Factor the limit is multiplied with on a throttle
+            backoff (float): First pause in seconds after a throttle without Retry-After
+            max_backoff (float): Longest such pause
+        """
+        self.name = name
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.increase = increase
+        self.decrease = decrease
+        self.base_backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._backoff = backoff
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._async_waiters = []
+
+    @classmethod
+    def from_env(cls, name):
+        """
+        Get the process-wide limiter of an API, configured by <NAME>_CONCURRENCY_INITIAL/_MIN/_MAX.
+
+        Args:
+            name (str): API name, "github" or "openai"
+
+        Returns:
+            AdaptiveLimiter: Shared limiter
+        """
+        with cls._instances_lock:
+            if name not in cls._instances:
+                initial, minimum, maximum = DEFAULT_LIMITS.get(name, DEFAULT_LIMITS["github"])
+                prefix = f"{name.upper()}_CONCURRENCY"
+                cls._instances[name] = cls(
+                    name,
+                    initial=int(os.getenv(f"{prefix}_INITIAL", str(initial))),
+                    minimum=int(os.getenv(f"{prefix}_MIN", str(minimum))),
+                    maximum=int(os.getenv(f"{prefix}_MAX", str(maximum)))
+                )
+            return cls._instances[name]
+
+    def capacity(self):
+        """Current whole number of requests allowed in flight."""
+        return max(self.minimum, int(self.limit))
+
+    def _try_acquire(self):
+        """
+        Take a slot if one is free and no pause is running; caller holds the lock.
+
+        Returns:
+            float: 0 if a slot was taken, otherwise seconds worth waiting before retrying (None: until notified)
+        """
+        wait = self.paused_until - time.time()
+        if wait > 0:
+            return wait
+        if self.in_flight >= self.capacity():
+            return None
+        self.in_flight += 1
+        return 0
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        with self._changed:
+            while True:
+                wait = self._try_acquire()
+                if wait == 0:
+                    return
+                self._changed.wait(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be sent."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                wait = self._try_acquire()
+                if wait == 0:
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await asyncio.wait_for(waiter, wait)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+
+    def release(self):
+        """Give a slot back."""
+        with self._lock:
+            self.in_flight -= 1
+            self._notify()
+
+    def _notify(self):
+        """Wake every waiter to re-check the limit; caller holds the lock."""
+        self._changed.notify_all()
+        for loop, waiter in self._async_waiters:
+            loop.call_soon_threadsafe(_resolve, waiter)
+        self._async_waiters = []
+
+    @contextmanager
+    def slot(self):
+        """Hold a slot for one request."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot_async(self):
+        """Hold a slot for one request from a coroutine."""
+        await self.acquire_async()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record_success(self):
+        """Grow the limit after a healthy response."""
+        with self._lock:
+            self._backoff = self.base_backoff
+            if self.limit < self.maximum:
+                capacity = self.capacity()
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+                if self.capacity() > capacity:
+                    self._notify()
+
+    def record_throttle(self, retry_after=None):
+        """
+        Cut the limit and pause after a throttled response or a network error.
+
+        Args:
+            retry_after (float): Seconds the API asked to wait, None to back off exponentially
+        """
+        with self._lock:
+            now = time.time()
+            if now < self.paused_until:
+                # Sent before the pause started; only honour a longer Retry-After
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + retry_after)
+                return
+
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            pause = retry_after if retry_after is not None else self._backoff
+            self._backoff = min(self.max_backoff, self._backoff * 2)
+            self.paused_until = now + pause
+            logger.warning(f"{self.name} throttled: {self.capacity()} requests in flight from now, pausing {pause:.0f}s")
+
+    def record_github_response(self, status_code, headers, body=None):
+        """
+        Feed a GitHub response into the limit.
+
+        A 403 caused by an exhausted primary rate limit is left to the token pool,
+        other 403s (permissions) and errors don't say anything about concurrency.
+
+        Args:
+            status_code (int): HTTP status
+            headers (Mapping): Response headers
+            body (str or callable): Response text, or a function returning it, read only for 403/429
+        """
+        retry_after = github_retry_after(status_code, headers, body)
+        if retry_after is not None:
+            self.record_throttle(retry_after or None)
+        elif status_code < 400 or status_code == 404:
+            self.record_success()
+
+    def record_openai_error(self, error):
+        """
+        Feed an exception raised by the OpenAI client into the limit.
+
+        Args:
+            error (Exception): Exception from an API call
+        """
+        status_code = getattr(error, "status_code", None)
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        if status_code in (429, 503) or status_code is None and is_transient_error(error):
+            self.record_throttle(parse_retry_after(headers))
+
+
+def _resolve(waiter):
+    """Wake an asyncio waiter unless it already gave up."""
+    if not waiter.done():
+        waiter.set_result(None)
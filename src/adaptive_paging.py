@@ -0,0 +1,144 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# GraphQL error types returned when a query asks for too much at once
+OVERSIZED_QUERY_ERRORS = ("MAX_NODE_LIMIT_EXCEEDED", "RESOURCE_LIMITS_EXCEEDED")
+
+
+class AdaptivePageSizer:
+    """
+    Chooses page sizes for the nested PR -> review thread -> comment query.
+
+    Thread and comment page sizes follow the densest PR and thread seen in
+    recent pages (via totalCount), so sparse histories stop paying for 50x50
+    nested connections. The PR page size follows the rateLimit cost of recent
+    pages and is halved whenever a page times out or hits a node limit.
+    """
+
+    MIN_PR_FIRST = 5
+    MAX_PR_FIRST = 100
+    MIN_NESTED_FIRST = 10
+    MAX_NESTED_FIRST = 100
+
+    def __init__(self, pr_first=None, thread_first=None, comment_first=None, target_cost=None, window=5):
+        """
+        Initialize page sizes.
+
+        Args:
+            pr_first (int): Initial PRs per page
+            thread_first (int): Initial review threads per PR
+            comment_first (int): Initial comments per thread
+            target_cost (int): rateLimit points a page should cost
+            window (int): Number of recent pages used for density estimates
+        """
+        self.pr_first = pr_first or int(os.getenv("GRAPHQL_PR_PAGE_SIZE", "50"))
+        self.thread_first = thread_first or int(os.getenv("GRAPHQL_THREAD_PAGE_SIZE", "50"))
+        self.comment_first = comment_first or int(os.getenv("GRAPHQL_COMMENT_PAGE_SIZE", "50"))
+        self.target_cost = target_cost or int(os.getenv("GRAPHQL_TARGET_COST", "10"))
+        self.window = window
+        self._thread_counts = []
+        self._comment_counts = []
+
+    def variables(self):
+        """
+        Page size variables for the comments query.
+
+        Returns:
+            dict: prFirst, threadFirst and commentFirst
+        """
+        return {
+            "prFirst": self.pr_first,
+            "threadFirst": self.thread_first,
+            "commentFirst": self.comment_first,
+        }
+
+    def record_page(self, nodes, cost=None):
+        """
+        Adapt page sizes to a successfully fetched page.
+
+        Args:
+            nodes (list): PR nodes of the page
+            cost (int): rateLimit.cost reported for the page, None if unknown (e.g. cached)
+        """
+        max_threads = 0
+        max_comments = 0
+        for pr in nodes:
+            threads = pr.get("reviewThreads") or {}
+            max_threads = max(max_threads, threads.get("totalCount", len(threads.get("nodes", []))))
+            for thread in threads.get("nodes", []):
+                comments = thread.get("comments") or {}
+                max_comments = max(max_comments, comments.get("totalCount", len(comments.get("nodes", []))))
+
+        self._thread_counts = (self._thread_counts + [max_threads])[-self.window:]
+        self._comment_counts = (self._comment_counts + [max_comments])[-self.window:]
+
+        # GitHub prices a query by the connection requests it implies: one per PR
+        # for its threads plus one per thread for its comments
+        old_requests = self.pr_first * (1 + self.thread_first)
+
+        # Leave 25% headroom over the densest PR / thread seen recently
+        self.thread_first = self._nested_size(max(self._thread_counts))
+        self.comment_first = self._nested_size(max(self._comment_counts))
+
+        if cost:
+            # Size the PR page so the next page costs about the target, at most doubling per page
+            cost_per_request = cost / old_requests
+            ideal_pr_first = int(self.target_cost / (cost_per_request * (1 + self.thread_first)))
+            self.pr_first = self._clamp(min(ideal_pr_first, self.pr_first * 2), self.MIN_PR_FIRST, self.MAX_PR_FIRST)
+
+        logger.debug(f"Page sizes now {self.variables()} (cost {cost})")
+
+    def shrink(self):
+        """
+        Halve the page sizes after a timeout or node limit error.
+
+        Returns:
+            bool: True if the sizes were reduced, False if already at the minimum
+        """
+        old = self.variables()
+        self.pr_first = self._clamp(self.pr_first // 2, self.MIN_PR_FIRST, self.MAX_PR_FIRST)
+        if self.pr_first == self.MIN_PR_FIRST:
+            self.thread_first = self._clamp(self.thread_first // 2, self.MIN_NESTED_FIRST, self.MAX_NESTED_FIRST)
+            self.comment_first = self._clamp(self.comment_first // 2, self.MIN_NESTED_FIRST, self.MAX_NESTED_FIRST)
+
+        shrunk = self.variables() != old
+        if shrunk:
+            logger.info(f"Reduced page sizes to {self.variables()} after an oversized query")
+        return shrunk
+
+    def _nested_size(self, observed_max):
+        """Round observed_max plus headroom up to a multiple of 10 within bounds."""
+        size = int(math.ceil(observed_max * 1.25 / 10.0)) * 10
+        return self._clamp(size, self.MIN_NESTED_FIRST, self.MAX_NESTED_FIRST)
+
+    @staticmethod
+    def _clamp(value, low, high):
+        return max(low, min(high, value))
+
+
+def is_oversized_query_error(data):
+    """
+    Check whether a GraphQL response failed because the query was too expensive.
+
+    Args:
+        data (dict): Response returned by graphql_query
+
+    Returns:
+        bool: True for server timeouts and node / resource limit errors
+    """
+    if not isinstance(data, dict):
+        return False
+
+    if data.get("error") in ("server_timeout", "timeout_error"):
+        return True
+
+    for error in data.get("errors") or []:
+        if error.get("type") in OVERSIZED_QUERY_ERRORS or "timeout" in str(error.get("message", "")).lower():
+            return True
+    return False
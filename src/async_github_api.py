@@ -0,0 +1,204 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import logging
+import httpx
+from adaptive_concurrency import AdaptiveLimiter
+from http_transport import get_async_client
+from retry import RetryPolicy, github_retry
+from token_pool import rate_limit_bucket
+from graphql_cache import GraphQLResponseCache
+
+logger = logging.getLogger(__name__)
+
+class AsyncGitHubAPI:
+    """Asyncio client for GitHub GraphQL and REST APIs."""
+    
+    GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+    GITHUB_REST_URL = "https://api.github.com"
+    
+    def __init__(self, token=None, retry=None, token_pool=None, cache=None, limiter=None):
+        """
+        Initialize with GitHub token.
+        
+        Args:
+            token (str): GitHub authentication token
+            retry (RetryPolicy, optional): Retry policy, defaults to the shared GitHub one
+            token_pool (TokenPool, optional): Pool to report the token's remaining budget to
+            cache (GraphQLResponseCache, optional): Response cache, defaults to GRAPHQL_CACHE settings
+            limiter (AdaptiveLimiter, optional): In-flight request limit, defaults to the shared GitHub one
+        """
+        self.token = token
+        self.retry = retry or RetryPolicy.from_env("github")
+        self.token_pool = token_pool
+        self.cache = cache or GraphQLResponseCache.from_env()
+        self.limiter = limiter or AdaptiveLimiter.from_env("github")
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github.v3+json",
+            "Content-Type": "application/json"
+        } if token else {}
+    
+    def set_token(self, token):
+        """Update the token."""
+        self.token = token
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github.v3+json",
+            "Content-Type": "application/json"
+        }
+    
+    async def _send(self, method, url, retry_statuses=(500, 502, 503, 504), wait_for_reset=False, **kwargs):
+        """
+        Send a request, retrying network errors, server errors and rate limits with the retry policy.
+        
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            retry_statuses (tuple): Status codes worth retrying
+            wait_for_reset (bool): Wait for an exhausted primary rate limit to reset and retry
+            
+        Returns:
+            tuple: (httpx.Response or None, error type or None)
+        """
+        client = get_async_client()
+        bucket = rate_limit_bucket(url)
+        
+        async def attempt():
+            if self.token_pool:
+                await self.token_pool.schedule_async(self.token, bucket)
+            try:
+                async with self.limiter.slot_async():
+                    response = await client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                self.limiter.record_throttle()
+                raise
+            self.limiter.record_github_response(response.status_code, response.headers, lambda: response.text)
+            if self.token_pool:
+                self.token_pool.record_headers(self.token, response.headers)
+            return response
+        
+        try:
+            response = await self.retry.call_async(attempt, github_retry(retry_statuses, wait_for_reset))
+        except httpx.TimeoutException as e:
+            logger.warning(f"Request timeout error: {e}")
+            return None, "timeout_error"
+        except httpx.TransportError as e:
+            logger.warning(f"Network connection error: {e}")
+            return None, "connection_error"
+        except httpx.HTTPError as e:
+            logger.error(f"Request error: {e}")
+            return None, "request_error"
+        
+        if response.status_code in retry_statuses:
+            logger.warning(f"Server error {response.status_code} from {url}")
+            return None, "request_error"
+        return response, None
+    
+    async def graphql_query(self, query, variables):
+        """
+        Execute a GraphQL query to GitHub API.
+        
+        Args:
+            query (str): GraphQL query
+            variables (dict): Query variables
+            
+        Returns:
+            dict: Response data, {"error": ...} on network errors or empty dict on API errors
+        """
+        if not self.token:
+            logger.error("No GitHub token provided")
+            return {}
+        
+        if self.cache:
+            cached = self.cache.get(query, variables)
+            if cached is not None:
+                return cached
+        
+        try:
+            response, error_type = await self._send(
+                "POST",
+                self.GITHUB_GRAPHQL_URL,
+                json={"query": query, "variables": variables},
+                headers=self.headers,
+                # Retrying a query that timed out on the server would only time out again
+                retry_statuses=(500, 503)
+            )
+            if error_type:
+                return {"error": error_type}
+            
+            # GitHub answers queries that run out of time with 502/504
+            if response.status_code in (502, 504):
+                logger.warning(f"GraphQL query timed out on the server: {response.status_code}")
+                return {"error": "server_timeout"}
+            
+            if response.status_code != 200:
+                logger.error(f"API Error: {response.status_code}, {response.text}")
+                return {}
+            
+            result = response.json()
+            if self.token_pool and isinstance(result.get("data"), dict):
+                self.token_pool.record_graphql_rate_limit(self.token, result["data"].get("rateLimit"))
+            if self.cache:
+                self.cache.set(query, variables, result)
+            return result
+        except Exception as e:
+            logger.error(f"Error executing GraphQL query: {e}")
+            return {"error": "general_error"}
+    
+    async def rest_get(self, path_or_url, params=None, accept=None, wait_on_rate_limit=True):
+        """
+        Send a GET request to the GitHub REST API.
+        
+        A primary rate limit response is awaited until X-RateLimit-Reset instead of
+        blocking a thread, like every other retry of the retry policy.
+        
+        Args:
+            path_or_url (str): API path such as "/users/octocat" or a full URL
+            params (dict): Query parameters
+            accept (str): Override for the Accept header
+            wait_on_rate_limit (bool): Sleep until reset and retry on rate limit
+            
+        Returns:
+            httpx.Response or None: Response, or None on network errors
+        """
+        url = path_or_url if path_or_url.startswith("http") else f"{self.GITHUB_REST_URL}{path_or_url}"
+        headers = {**self.headers, "Accept": accept} if accept else self.headers
+        
+        response, error_type = await self._send(
+            "GET", url, wait_for_reset=wait_on_rate_limit, params=params, headers=headers
+        )
+        if error_type:
+            logger.error(f"REST request to {url} failed: {error_type}")
+            return None
+        return response
+    
+    async def rest_get_paginated(self, path_or_url, params=None, max_pages=None):
+        """
+        Fetch every page of a REST list endpoint by following Link headers.
+        
+        Args:
+            path_or_url (str): API path or full URL
+            params (dict): Query parameters for the first page
+            max_pages (int): Stop after this many pages
+            
+        Returns:
+            list: Concatenated items from all pages
+        """
+        items = []
+        url = path_or_url
+        pages = 0
+        
+        while url and (max_pages is None or pages < max_pages):
+            response = await self.rest_get(url, params=params)
+            if response is None or response.status_code != 200:
+                break
+            
+            items.extend(response.json())
+            pages += 1
+            url = response.links.get("next", {}).get("url")
+            # The next link already carries the query string
+            params = None
+        
+        return items
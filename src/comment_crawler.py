@@ -2,64 +2,200 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import asyncio
 import json
 import logging
 import os
+import threading
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from tqdm import tqdm
+from adaptive_concurrency import AdaptiveLimiter
 from github_api import GitHubAPI
+from async_github_api import AsyncGitHubAPI
+from token_pool import TokenPool, leases_token
+from graphql_cache import GraphQLResponseCache
+from pr_cache import PullRequestCache
+from crawl_store import CrawlStore, advance_watermark, read_json_crawl
+from crawl_yield import YieldTracker
+from hybrid_crawl import HybridCrawl
+from adaptive_paging import AdaptivePageSizer, is_oversized_query_error
+from graphql_batching import MAX_NODES_PER_QUERY, build_aliased_user_query, chunked, split_aliased_response
+from crawl_strategies import CRAWL_STRATEGIES, REVIEW_COMMENT_FIELDS, PullRequestsStrategy, RecentPullRequestsStrategy, next_request
 from restapi_crawler import RestAPICommentCrawler
+from gharchive import read_archives
 
 logger = logging.getLogger(__name__)
 
 class GitHubCommentCrawler:
     """Crawler for GitHub comments using GraphQL API with token rotation and REST API fallback."""
     
-    def __init__(self, github_tokens):
+    # Strategy walking the expert's own PRs with COMMENTS_QUERY
+    DEFAULT_STRATEGY = "pull_requests"
+    
+    def __init__(self, github_tokens, token_pool=None, graphql_cache=None, strategy=None, pr_cache=None, crawl_store=None,
+                 incremental=None):
         """
         Initialize the crawler with one or multiple GitHub tokens.
         
         Args:
             github_tokens (str or list): A single GitHub token or a list of tokens
+            token_pool (TokenPool, optional): Shared pool leasing tokens to concurrent workers
+            graphql_cache (GraphQLResponseCache, optional): Response cache for GraphQL pages,
+                defaults to GRAPHQL_CACHE settings
+            strategy (str, optional): GraphQL crawl strategy, "pull_requests" or one of
+                CRAWL_STRATEGIES, defaults to CRAWL_STRATEGY
+            pr_cache (PullRequestCache, optional): PR cache shared across experts and the
+                REST fallback, defaults to PR_CACHE settings
+            crawl_store (CrawlStore, optional): Transactional crawl state, defaults to CRAWL_STORE settings
+            incremental (bool, optional): Only collect comments newer than each expert's watermark,
+                defaults to INCREMENTAL_CRAWL
         """
         # Handle both single token and list of tokens
         if isinstance(github_tokens, str):
             self.github_tokens = [github_tokens]
         else:
             self.github_tokens = github_tokens
-            
-        self.current_token_index = 0
-        self.api = GitHubAPI(self.github_tokens[0])
         
-        # Initialize REST API crawler as ultimate fallback
-        self.rest_crawler = RestAPICommentCrawler(self.github_tokens[0])
+        # Every thread or asyncio task leases its own token from the pool
+        self.token_pool = token_pool or TokenPool(self.github_tokens)
+        self.graphql_cache = graphql_cache or GraphQLResponseCache.from_env()
+        self.pr_cache = pr_cache or PullRequestCache.from_env()
+        self.crawl_store = crawl_store or CrawlStore.from_env()
+        # All GitHub requests of the process share one adaptive in-flight limit
+        self.limiter = AdaptiveLimiter.from_env("github")
+        
+        self.strategy = strategy or os.getenv("CRAWL_STRATEGY", self.DEFAULT_STRATEGY)
+        if self.strategy != self.DEFAULT_STRATEGY and self.strategy not in CRAWL_STRATEGIES:
+            raise ValueError(f"Unknown crawl strategy: {self.strategy}")
+        
+        if incremental is None:
+            incremental = os.getenv("INCREMENTAL_CRAWL", "false").lower() == "true"
+        self.incremental = incremental
+        # username -> activity fingerprint of the last probe, saved by complete crawls
+        self.activity = {}
+    
+    @property
+    def api(self):
+        """GraphQL client bound to the current worker's token."""
+        return self.token_pool.client(GitHubAPI, cache=self.graphql_cache)
+    
+    @property
+    def async_api(self):
+        """Asyncio client bound to the current worker's token."""
+        return self.token_pool.client(AsyncGitHubAPI, cache=self.graphql_cache)
+    
+    @property
+    def rest_crawler(self):
+        """REST API fallback bound to the current worker's token."""
+        return self.token_pool.client(
+            RestAPICommentCrawler, pr_cache=self.pr_cache, crawl_store=self.crawl_store, incremental=self.incremental
+        )
+    
+    @property
+    def hybrid_rest_crawler(self):
+        """REST client of hybrid crawls, raising on an exhausted core budget so the crawl can switch to GraphQL."""
+        return self.token_pool.client(
+            RestAPICommentCrawler, pr_cache=self.pr_cache, crawl_store=self.crawl_store, incremental=self.incremental,
+            wait_for_reset=False
+        )
+    
+    @property
+    def current_token_index(self):
+        """Index of the current worker's token."""
+        return self.token_pool.current_index()
     
     def rotate_token(self):
         """
-        Rotate to the next available GitHub token.
+        Rotate the current worker to the token with the most remaining budget.
+        
+        Other workers keep their tokens, so concurrent rotations don't race.
         
         Returns:
             bool: True if successfully rotated to a new token, False if all tokens are exhausted
         """
-        if len(self.github_tokens) <= 1:
+        if not self.token_pool.rotate():
             # Only one token available, can't rotate
             return False
-            
-        # Move to next token
-        self.current_token_index = (self.current_token_index + 1) % len(self.github_tokens)
-        new_token = self.github_tokens[self.current_token_index]
-        
-        # Update API instances with new token
-        self.api = GitHubAPI(new_token)
-        self.rest_crawler = RestAPICommentCrawler(new_token)
         
         logger.info(f"Rotated to GitHub token {self.current_token_index + 1}/{len(self.github_tokens)}")
         return True
         
+    # Page of a user's PRs with their review threads, shared by single-user and batched queries
+    PULL_REQUEST_PAGE_FRAGMENT = """
+    fragment PullRequestPage on User {
+      pullRequests(first: $prFirst, after: $after) {
+        pageInfo {
+          endCursor
+          hasNextPage
+        }
+        nodes {
+          number
+          title
+          updatedAt
+          repository {
+            name
+            owner {
+              login
+            }
+          }
+          reviewThreads(first: $threadFirst) {
+            totalCount
+            nodes {
+              comments(first: $commentFirst) {
+                totalCount
+                nodes {""" + REVIEW_COMMENT_FIELDS + """
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+    """
+    
+    PAGE_SIZE_VARIABLES = "$after: String, $prFirst: Int = 50, $threadFirst: Int = 50, $commentFirst: Int = 50"
+    
+    # GraphQL query to get PR comments
+    COMMENTS_QUERY = """
+    query ($login: String!, $after: String, $prFirst: Int = 50, $threadFirst: Int = 50, $commentFirst: Int = 50) {
+      rateLimit {
+        cost
+        remaining
+        resetAt
+      }
+      user(login: $login) {
+        ...PullRequestPage
+      }
+    }
+    """ + PULL_REQUEST_PAGE_FRAGMENT
+
+    # Newest activity a crawl could find comments in: the user's PRs and their reviews
+    ACTIVITY_SELECTION = """{
+      pullRequests(first: 1, orderBy: {field: UPDATED_AT, direction: DESC}) {
+        totalCount
+        nodes {
+          updatedAt
+        }
+      }
+      contributionsCollection {
+        pullRequestReviewContributions(first: 1) {
+          nodes {
+            occurredAt
+          }
+        }
+      }
+    }"""
+
+    @leases_token
     def collect_comments(self, username, limit=200, output_file=None, continue_crawl=True, get_all_historical=False, use_rest_api=False):
         """
         Collect comments for a GitHub user.
         
+        GraphQL and the REST API are mixed request by request depending on the
+        budget left on each (see HybridCrawl), keeping one set of collected comments.
+        
         Args:
             username (str): GitHub username
             limit (int): Maximum number of comments to collect
@@ -77,334 +213,777 @@ class GitHubCommentCrawler:
         # First check if we're forcing REST API
         if use_rest_api:
             logger.info(f"Using REST API for {username} as requested")
-            return self.rest_crawler.collect_comments(
-                username=username,
-                limit=limit,
-                output_file=output_file,
-                continue_crawl=continue_crawl,
-                get_all_historical=get_all_historical
+            return self._collect_with_rest(username, limit, output_file, continue_crawl, get_all_historical)
+        
+        all_comments, state = self._load_crawl_state(output_file, continue_crawl, get_all_historical)
+        strategy = self._create_strategy()
+        if self.incremental:
+            # The limit counts new comments on top of those already collected
+            limit = len(all_comments) + limit
+        yield_tracker = YieldTracker(state)
+        
+        with tqdm(total=limit, initial=len(all_comments), desc=f"Collecting comments for {username}") as pbar:
+            crawl = HybridCrawl(self, strategy, username, state, all_comments, limit, get_all_historical,
+                                output_file, yield_tracker, pbar)
+            crawl.run()
+        
+        return self._finish_crawl(output_file, state, all_comments, crawl)
+
+    @leases_token
+    async def collect_comments_async(self, username, limit=200, output_file=None, continue_crawl=True, get_all_historical=False, use_rest_api=False):
+        """
+        Collect comments for a GitHub user without blocking the event loop.
+        
+        Same behaviour as collect_comments, but GraphQL pages are fetched with the
+        asyncio client, so many experts can be crawled concurrently on one thread.
+        REST requests still run in a worker thread.
+        
+        Args:
+            username (str): GitHub username
+            limit (int): Maximum number of comments to collect
+            output_file (str): Path to save the output JSON
+            continue_crawl (bool): Whether to continue from previous crawl
+            get_all_historical (bool): Whether to get all historical comments
+            use_rest_api (bool): Force using REST API instead of GraphQL
+            
+        Returns:
+            list: Collected comments
+        """
+        if output_file is None:
+            output_file = f"{username}_comments.json"
+        
+        if use_rest_api:
+            logger.info(f"Using REST API for {username} as requested")
+            return await asyncio.to_thread(
+                self._collect_with_rest, username, limit, output_file, continue_crawl, get_all_historical
             )
         
-        # Try GraphQL API with token rotation on rate limit
+        all_comments, state = self._load_crawl_state(output_file, continue_crawl, get_all_historical)
+        strategy = self._create_strategy()
+        if self.incremental:
+            limit = len(all_comments) + limit
+        yield_tracker = YieldTracker(state)
+        
+        with tqdm(total=limit, initial=len(all_comments), desc=f"Collecting comments for {username}") as pbar:
+            crawl = HybridCrawl(self, strategy, username, state, all_comments, limit, get_all_historical,
+                                output_file, yield_tracker, pbar)
+            await crawl.run_async()
+        
+        return self._finish_crawl(output_file, state, all_comments, crawl)
+
+    def _finish_crawl(self, output_file, state, all_comments, crawl):
+        """
+        Save the final state and comments of a crawl.
+        
+        A complete crawl has seen everything up to its newest comment, so it moves
+        the watermark; incremental strategies do that themselves. It also saves the
+        user's last probed activity, which has_new_activity() compares against.
+        
+        Returns:
+            list: Collected comments
+        """
+        if crawl.completed and not crawl.yield_tracker.stopped:
+            if not self.incremental:
+                advance_watermark(state, all_comments)
+            if crawl.username in self.activity:
+                state["activity"] = self.activity[crawl.username]
+        self._save_crawl_state(output_file, state, all_comments)
+        self._save_comments(output_file, all_comments)
+        return all_comments
+
+    def _run_windows(self, strategy, username, state, all_comments, limit, get_all_historical, output_file, pbar, yield_tracker):
+        """
+        Crawl the pending windows of a parallel strategy with a thread pool, each thread on its own token.
+        
+        Returns:
+            str: Failure of a window whose tokens all failed, None if every window finished
+        """
+        # Responses are applied one at a time; only the requests overlap
+        lock = threading.Lock()
+        
+        def crawl_window(index):
+            with self.token_pool.lease(separate=True):
+                window_requests = strategy.window_requests(username, index, state, all_comments, limit, get_all_historical)
+                return self._run_requests(
+                    window_requests, username, state, all_comments, output_file, pbar, yield_tracker, lock
+                )
+        
+        with ThreadPoolExecutor(max_workers=strategy.workers) as executor:
+            return next(filter(None, executor.map(crawl_window, strategy.pending_windows(state))), None)
+
+    async def _run_windows_async(self, strategy, username, state, all_comments, limit, get_all_historical, output_file, pbar, yield_tracker):
+        """
+        Crawl the pending windows of a parallel strategy as concurrent tasks, each on its own token.
+        
+        Returns:
+            str: Failure of a window whose tokens all failed, None if every window finished
+        """
+        workers = asyncio.Semaphore(strategy.workers)
+        
+        async def crawl_window(index):
+            async with workers:
+                with self.token_pool.lease(separate=True):
+                    window_requests = strategy.window_requests(username, index, state, all_comments, limit, get_all_historical)
+                    return await self._run_requests_async(
+                        window_requests, username, state, all_comments, output_file, pbar, yield_tracker
+                    )
+        
+        failures = await asyncio.gather(*(crawl_window(index) for index in strategy.pending_windows(state)))
+        return next(filter(None, failures), None)
+
+    def _run_requests(self, requests, username, state, all_comments, output_file, pbar, yield_tracker=None, lock=None):
+        """
+        Send a strategy's requests with the blocking client until it is done.
+
+        A failed request is retried on the next token of the current worker, and
+        progress is saved after every page. The strategy is abandoned early once
+        the yield tracker finds the crawl is no longer worth its quota.
+
+        Args:
+            requests (generator): Generator from a crawl strategy
+            username (str): GitHub username
+            state (dict): Crawl state
+            all_comments (list): Collected comments
+            output_file (str): Path of the comments JSON
+            pbar (tqdm): Progress bar
+            yield_tracker (YieldTracker, optional): Tracker the pages are recorded in
+            lock (threading.Lock, optional): Serializes responses of workers sharing the state
+
+        Returns:
+            str: Failure once every token failed, None if the strategy completed or was stopped
+        """
         token_rotation_attempts = 0
-        max_token_rotations = len(self.github_tokens)
+        with lock or nullcontext():
+            request = next(requests, None)
+        while request is not None:
+            data = self.api.graphql_query(*request)
+
+            # Oversized pages go back to the strategy, which shrinks its page sizes
+            failure = None if is_oversized_query_error(data) else self._get_graphql_failure(data)
+            if failure:
+                logger.warning(f"GraphQL request failed for {username}: {failure}")
+                if token_rotation_attempts < len(self.github_tokens) and self.rotate_token():
+                    token_rotation_attempts += 1
+                    continue
+                return failure
+
+            with lock or nullcontext():
+                collected = len(all_comments)
+                request = next_request(requests, data)
+                pbar.update(len(all_comments) - collected)
+                if yield_tracker:
+                    yield_tracker.record_page(len(all_comments) - collected, self._page_cost(data))
+                    if yield_tracker.should_stop():
+                        request = None
+                self._save_crawl_state(output_file, state, all_comments)
+        return None
+
+    async def _run_requests_async(self, requests, username, state, all_comments, output_file, pbar, yield_tracker=None):
+        """
+        Send a strategy's requests with the asyncio client until it is done.
+
+        Returns:
+            str: Failure once every token failed, None if the strategy completed
+        """
+        token_rotation_attempts = 0
+        request = next(requests, None)
+        while request is not None:
+            data = await self.async_api.graphql_query(*request)
+
+            failure = None if is_oversized_query_error(data) else self._get_graphql_failure(data)
+            if failure:
+                logger.warning(f"GraphQL request failed for {username}: {failure}")
+                if token_rotation_attempts < len(self.github_tokens) and self.rotate_token():
+                    token_rotation_attempts += 1
+                    continue
+                return failure
+
+            collected = len(all_comments)
+            request = next_request(requests, data)
+            pbar.update(len(all_comments) - collected)
+            if yield_tracker:
+                yield_tracker.record_page(len(all_comments) - collected, self._page_cost(data))
+                if yield_tracker.should_stop():
+                    request = None
+            self._save_crawl_state(output_file, state, all_comments)
+        return None
+
+    @staticmethod
+    def _page_cost(data):
+        """rateLimit cost of a GraphQL response, None if unknown (e.g. cached)."""
+        return ((data.get("data") or {}).get("rateLimit") or {}).get("cost")
+
+    def _create_strategy(self):
+        """
+        Build the crawl strategy for one expert.
+
+        Incremental crawls of the default strategy walk PRs by most recent update.
+
+        Returns:
+            CrawlStrategy: Strategy instance
+        """
+        if self.strategy == self.DEFAULT_STRATEGY:
+            if self.incremental:
+                return RecentPullRequestsStrategy(self, incremental=True)
+            return PullRequestsStrategy(self)
+        return CRAWL_STRATEGIES[self.strategy](self, incremental=self.incremental)
+
+    def prepare_first_pages_batches(self, usernames, output_files, continue_crawl=True, batch_size=10):
+        """
+        Plan aliased first-page requests for users that have no crawl state yet.
+        
+        PR page size is reduced so each batched query stays under GitHub's node limit.
+        
+        Args:
+            usernames (list): GitHub usernames
+            output_files (dict): username -> comments JSON path
+            continue_crawl (bool): Whether the crawl will continue from saved state
+            batch_size (int): Users per GraphQL request
+            
+        Returns:
+            list: (query, variables, aliases) per batch
+        """
+        if not continue_crawl:
+            return []
+        
+        # Users with saved comments or a cursor already continue from there
+        fresh_users = [
+            username for username in usernames
+            if not self._has_crawl_state(output_files[username])
+        ]
+        
+        page_sizer = AdaptivePageSizer()
+        nodes_per_pr = 1 + page_sizer.thread_first + page_sizer.thread_first * page_sizer.comment_first
+        
+        batches = []
+        for logins in chunked(fresh_users, batch_size):
+            pr_first = max(1, min(page_sizer.pr_first, MAX_NODES_PER_QUERY // (nodes_per_pr * len(logins))))
+            query, variables, aliases = build_aliased_user_query(
+                logins, "{ ...PullRequestPage }", self.PAGE_SIZE_VARIABLES, self.PULL_REQUEST_PAGE_FRAGMENT
+            )
+            variables.update({"after": None, **page_sizer.variables(), "prFirst": pr_first})
+            batches.append((query, variables, aliases))
+        
+        return batches
+    
+    def apply_first_pages(self, data, aliases, output_files, limit=200):
+        """
+        Save the comments and cursor of each user in a batched first-page response.
+        
+        A later collect_comments(continue_crawl=True) picks up from the second page.
+        
+        Args:
+            data (dict): Response of a batched first-page query
+            aliases (dict): alias -> login mapping of the batch
+            output_files (dict): username -> comments JSON path
+            limit (int): Maximum number of comments per user
+            
+        Returns:
+            int: Number of users whose first page was saved
+        """
+        users = split_aliased_response(data, aliases)
+        
+        for username, user_data in users.items():
+            output_file = output_files[username]
+            pr_data = user_data["pullRequests"]
+            if not pr_data.get("nodes"):
+                # Leave users without PRs to the regular crawl and its REST fallback
+                continue
+            
+            all_comments = []
+            state = {"after": pr_data.get("pageInfo", {}).get("endCursor"), "processed_comments": set()}
+            self._extract_comments(pr_data["nodes"], username, state, all_comments, limit, False)
+            
+            os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+            self._save_crawl_state(output_file, state, all_comments)
+            self._save_comments(output_file, all_comments)
+        
+        return len(users)
+    
+    @leases_token
+    def prefetch_first_pages(self, usernames, output_files, limit=200, continue_crawl=True, batch_size=10):
+        """
+        Fetch the first PR page of many users with one aliased GraphQL request per batch.
+        
+        Args:
+            usernames (list): GitHub usernames
+            output_files (dict): username -> comments JSON path
+            limit (int): Maximum number of comments per user
+            continue_crawl (bool): Whether the crawl will continue from saved state
+            batch_size (int): Users per GraphQL request
+            
+        Returns:
+            int: Number of users whose first page was saved
+        """
+        prefetched = 0
+        for query, variables, aliases in self.prepare_first_pages_batches(usernames, output_files, continue_crawl, batch_size):
+            data = self.api.graphql_query(query, variables)
+            prefetched += self.apply_first_pages(data, aliases, output_files, limit)
+        
+        logger.info(f"Prefetched first pages for {prefetched}/{len(usernames)} users in batches of {batch_size}")
+        return prefetched
+    
+    @leases_token
+    async def prefetch_first_pages_async(self, usernames, output_files, limit=200, continue_crawl=True, batch_size=10):
+        """
+        Fetch the first PR page of many users concurrently, one aliased request per batch.
+        
+        Args:
+            usernames (list): GitHub usernames
+            output_files (dict): username -> comments JSON path
+            limit (int): Maximum number of comments per user
+            continue_crawl (bool): Whether the crawl will continue from saved state
+            batch_size (int): Users per GraphQL request
+            
+        Returns:
+            int: Number of users whose first page was saved
+        """
+        batches = self.prepare_first_pages_batches(usernames, output_files, continue_crawl, batch_size)
+        responses = await asyncio.gather(*[
+            self.async_api.graphql_query(query, variables) for query, variables, _ in batches
+        ])
+        
+        prefetched = 0
+        for (_, _, aliases), data in zip(batches, responses):
+            prefetched += self.apply_first_pages(data, aliases, output_files, limit)
+        
+        logger.info(f"Prefetched first pages for {prefetched}/{len(usernames)} users in batches of {batch_size}")
+        return prefetched
+
+    @leases_token
+    async def probe_activity_async(self, usernames, batch_size=25):
+        """
+        Fetch the latest PR and review activity of many users, one aliased request per batch.
         
-        # Initialize state
+        One small query per batch is far cheaper than crawling an expert's first
+        page, so refresh runs can skip experts that have nothing new. Fingerprints
+        are kept in self.activity for the next complete crawl to save.
+        
+        Args:
+            usernames (list): GitHub usernames
+            batch_size (int): Users per GraphQL request
+            
+        Returns:
+            dict: username -> fingerprint, users whose batch failed are left out
+        """
+        batches = [
+            build_aliased_user_query(logins, self.ACTIVITY_SELECTION)
+            for logins in chunked(list(usernames), batch_size)
+        ]
+        responses = await asyncio.gather(*[
+            self.async_api.graphql_query(query, variables) for query, variables, _ in batches
+        ])
+        
+        activity = {}
+        for (_, _, aliases), data in zip(batches, responses):
+            for username, user_data in split_aliased_response(data, aliases).items():
+                pull_requests = user_data.get("pullRequests") or {}
+                reviews = ((user_data.get("contributionsCollection") or {}).get("pullRequestReviewContributions") or {})
+                activity[username] = {
+                    "pull_requests": pull_requests.get("totalCount", 0),
+                    "pr_updated_at": next((node["updatedAt"] for node in pull_requests.get("nodes") or []), None),
+                    "reviewed_at": next((node["occurredAt"] for node in reviews.get("nodes") or []), None),
+                }
+        
+        self.activity.update(activity)
+        logger.info(f"Probed activity of {len(activity)}/{len(usernames)} users in {len(batches)} requests")
+        return activity
+
+    def has_new_activity(self, output_file, fingerprint):
+        """
+        Check whether a user was active since the last complete crawl of a comments file.
+        
+        Args:
+            output_file (str): Path of the comments JSON
+            fingerprint (dict): Fingerprint from probe_activity_async(), None if the probe failed
+            
+        Returns:
+            bool: False only if the saved fingerprint shows everything the probe found
+        """
+        previous = self._saved_state(output_file).get("activity")
+        if not previous or not fingerprint:
+            return True
+        # Review contributions only cover the last year, so the newest timestamps are compared, not totals
+        return (fingerprint["pull_requests"] > previous.get("pull_requests", 0)
+                or (fingerprint["pr_updated_at"] or "") > (previous.get("pr_updated_at") or "")
+                or (fingerprint["reviewed_at"] or "") > (previous.get("reviewed_at") or ""))
+
+    @leases_token
+    def stream_repositories(self, repos, output_files, limit=200, state_file=None, since=None, max_pages=None):
+        """
+        Stream the review comments of shared repositories once for all tracked experts.
+
+        Every repository is read with one paginated REST stream and its comments
+        are merged into the comments file of each expert who wrote them. The
+        newest update time per repository is kept in state_file, so the next run
+        only streams newer comments.
+
+        Args:
+            repos (list): Repositories as owner/name
+            output_files (dict): username -> comments JSON path of every tracked expert
+            limit (int): Maximum number of comments per expert
+            state_file (str, optional): JSON file holding the per-repository watermark
+            since (str, optional): ISO 8601 time to start repositories without a watermark from
+            max_pages (int, optional): Maximum number of pages per repository
+
+        Returns:
+            int: Number of comments added across experts
+        """
+        watermarks = {}
+        if state_file and os.path.exists(state_file):
+            with open(state_file, "r") as f:
+                watermarks = json.load(f)
+
+        added = 0
+        for repo in repos:
+            results, newest = self.rest_crawler.stream_repo_comments(
+                repo, list(output_files), since=watermarks.get(repo, since), max_pages=max_pages
+            )
+            for username, comments in results.items():
+                added += self.merge_comments(output_files[username], comments, limit)
+
+            if newest:
+                watermarks[repo] = newest
+                if state_file:
+                    with open(state_file, "w") as f:
+                        json.dump(watermarks, f, indent=2)
+
+        logger.info(f"Streamed {len(repos)} repositories, added {added} comments across {len(output_files)} experts")
+        return added
+
+    def ingest_archives(self, archive_files, output_files, limit=200, state_file=None, workers=None):
+        """
+        Add the tracked experts' review comments found in local GH Archive files.
+
+        Backfills history without spending API quota: the hourly .json.gz files
+        are decompressed and filtered for PullRequestReviewCommentEvents across
+        a process pool, and the valid comments are merged into each expert's
+        crawl like streamed ones. state_file lists, per archive file, the experts
+        it was ingested for, so later runs only read files again for experts
+        tracked since.
+
+        Args:
+            archive_files (list): GH Archive files, oldest first
+            output_files (dict): username -> comments JSON path of every tracked expert
+            limit (int): Maximum number of comments per expert
+            state_file (str, optional): JSON file mapping ingested archive files to their experts
+            workers (int, optional): Worker processes, defaults to GHARCHIVE_WORKERS or the CPU count
+
+        Returns:
+            int: Number of comments added across experts
+        """
+        ingested = {}
+        if state_file and os.path.exists(state_file):
+            with open(state_file, "r") as f:
+                ingested = json.load(f).get("ingested", {})
+            if isinstance(ingested, list):
+                # Older state files didn't record the experts, so those files are read again for everyone
+                ingested = {}
+
+        pending = {}
+        for path in archive_files:
+            usernames = set(output_files) - set(ingested.get(os.path.basename(path), []))
+            if usernames:
+                pending[path] = usernames
+        if not pending:
+            return 0
+
+        # One pass over the pending files for everyone missing any of them; duplicates are skipped by URL
+        scanned = set().union(*pending.values())
+        found = {username: [] for username in scanned}
+        for path, results, error in tqdm(read_archives(list(pending), sorted(scanned), workers),
+                                         total=len(pending), desc="GH Archive files"):
+            for username, comments in results.items():
+                found[username].extend(comment for comment in comments if self.is_valid_comment(comment["comment"]))
+            if error:
+                logger.warning(f"Could not read all of {path}, it will be read again next time: {error}")
+            else:
+                name = os.path.basename(path)
+                ingested[name] = sorted(set(ingested.get(name, [])) | scanned)
+
+        added = 0
+        for username, comments in found.items():
+            added += self.merge_comments(output_files[username], comments, limit)
+
+        if state_file:
+            with open(state_file, "w") as f:
+                json.dump({"ingested": ingested}, f, indent=2)
+
+        logger.info(f"Ingested {len(pending)} GH Archive files for {len(scanned)} experts, added {added} comments")
+        return added
+
+    def merge_comments(self, output_file, comments, limit):
+        """
+        Add new comments to an expert's crawl, skipping known URLs.
+        
+        Only comments are added, never cursors: the expert's crawl may be running
+        at the same time, in this process or in the pipeline's. With the crawl
+        store the rows are inserted in one transaction and comments.json is
+        exported again; the crawl's own final export includes them too.
+        
+        Args:
+            output_file (str): Path of the expert's comments JSON
+            comments (list): Comment records in the crawler's shape
+            limit (int): Maximum number of comments the crawl may hold, None for no limit
+        
+        Returns:
+            int: Number of comments added
+        """
+        if not comments:
+            return 0
+        
+        os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+        if self.crawl_store:
+            if not self.crawl_store.has(output_file):
+                self.crawl_store.migrate(output_file)
+            added = self.crawl_store.add_comments(output_file, comments, limit)
+            if added:
+                self.crawl_store.export(output_file)
+            return len(added)
+        
+        all_comments, _ = read_json_crawl(output_file)
+        known_urls = {comment.get("comment_url") for comment in all_comments}
+        new_comments = [comment for comment in comments if comment.get("comment_url") not in known_urls]
+        if limit is not None:
+            new_comments = new_comments[:max(0, limit - len(all_comments))]
+        if not new_comments:
+            return 0
+        
+        self._save_comments(output_file, all_comments + new_comments)
+        return len(new_comments)
+
+    def _get_graphql_failure(self, data):
+        """
+        Classify a GraphQL response that cannot be used.
+        
+        Args:
+            data (dict): Response returned by graphql_query
+            
+        Returns:
+            str: Failure reason, or None if the response holds data
+        """
+        # Network errors reported by GitHubAPI
+        if isinstance(data, dict) and "error" in data:
+            return data["error"]
+        
+        # GitHub API errors in the response (rate limits included)
+        if isinstance(data, dict) and "errors" in data:
+            error_message = str(data["errors"])
+            logger.warning(f"GitHub API error: {error_message}")
+            if "rate limit" in error_message.lower() or "ratelimit" in error_message.lower():
+                return "rate limit"
+            return "API error"
+        
+        if not data or not data.get('data'):
+            return "invalid data"
+        
+        return None
+
+    def _load_crawl_state(self, output_file, continue_crawl, get_all_historical):
+        """
+        Load previously collected comments and the saved GraphQL cursors.
+        
+        A crawl still kept in comments.json / comments.json.state is migrated into
+        the crawl store on first load.
+        
+        Args:
+            output_file (str): Path of the comments JSON
+            continue_crawl (bool): Whether to continue from previous crawl
+            get_all_historical (bool): Whether to get all historical comments
+            
+        Returns:
+            tuple: (list of comments, state dict with "after" and "processed_comments")
+        """
         all_comments = []
         state = {"after": None, "processed_comments": set()}
         
-        # Load existing comments if continuing
-        if continue_crawl and os.path.exists(output_file) and not get_all_historical:
+        if continue_crawl and not get_all_historical:
             try:
-                with open(output_file, "r", encoding="utf-8") as f:
-                    all_comments = json.load(f)
+                if self.crawl_store:
+                    all_comments, saved_state = self.crawl_store.load(output_file) or self.crawl_store.migrate(output_file)
+                else:
+                    all_comments, saved_state = read_json_crawl(output_file)
+                
+                # Cursors of every strategy, e.g. "after" and "reviews"
+                state.update(saved_state)
                 for comment in all_comments:
                     # Get URL if it exists in the comment
                     if "comment_url" in comment:
                         state["processed_comments"].add(comment["comment_url"])
                 
-                state_file = f"{output_file}.state"
-                if os.path.exists(state_file):
-                    with open(state_file, "r") as f:
-                        loaded_state = json.load(f)
-                        state["after"] = loaded_state.get("after")
-                
-                logger.info(f"Continuing crawl with {len(all_comments)} existing comments")
+                if all_comments or saved_state:
+                    logger.info(f"Continuing crawl with {len(all_comments)} existing comments")
             except Exception as e:
                 logger.error(f"Error loading existing data: {e}")
                 all_comments = []
                 state = {"after": None, "processed_comments": set()}
-        elif get_all_historical:
-            logger.info("Getting all historical comments (including previously collected ones)")
+        else:
+            if self.crawl_store:
+                self.crawl_store.reset(output_file)
+            if get_all_historical:
+                logger.info("Getting all historical comments (including previously collected ones)")
         
-        while token_rotation_attempts <= max_token_rotations:
-            try:
-                # GraphQL query to get PR comments
-                query = """
-                query ($login: String!, $after: String) {
-                  user(login: $login) {
-                    pullRequests(first: 50, after: $after) {
-                      pageInfo {
-                        endCursor
-                        hasNextPage
-                      }
-                      nodes {
-                        number
-                        title
-                        url
-                        repository {
-                          name
-                          owner {
-                            login
-                          }
-                          nameWithOwner
-                        }
-                        reviewThreads(first: 50) {
-                          nodes {
-                            comments(first: 50) {
-                              nodes {
-                                author {
-                                  login
-                                }
-                                body
-                                path
-                                position
-                                diffHunk
-                                createdAt
-                                updatedAt
-                                url
-                              }
-                            }
-                          }
-                        }
-                      }
-                    }
-                  }
-                }
-                """
-                
-                # Collect comments with progress bar
-                with tqdm(total=limit, initial=len(all_comments), desc=f"Collecting comments for {username}") as pbar:
-                    while len(all_comments) < limit:
-                        data = self.api.graphql_query(query, {"login": username, "after": state["after"]})
-                        
-                        # Check for network errors and rotate token if needed
-                        if isinstance(data, dict) and "error" in data:
-                            error_type = data["error"]
-                            if error_type in ["connection_error", "timeout_error", "request_error"]:
-                                logger.warning(f"Network error encountered: {error_type}. Attempting token rotation.")
-                                if self.rotate_token():
-                                    logger.info(f"Rotated to token {self.current_token_index + 1}/{len(self.github_tokens)}")
-                                    token_rotation_attempts += 1
-                                    # Short wait before retrying
-                                    import time
-                                    time.sleep(2)
-                                    continue
-                                else:
-                                    logger.error("No more tokens available to rotate to")
-                                    # If no more tokens and already using REST API, we're out of options
-                                    if use_rest_api:
-                                        logger.error("Both GraphQL and REST API failed. Giving up.")
-                                        break
-                                    else:
-                                        # Fallback to REST API as last resort
-                                        logger.info("Falling back to REST API as last resort")
-                                        return self.rest_crawler.collect_comments(
-                                            username=username,
-                                            limit=limit,
-                                            output_file=output_file,
-                                            continue_crawl=continue_crawl,
-                                            get_all_historical=get_all_historical
-                                        )
-                        
-                        # Check for GitHub API errors in the response
-                        if isinstance(data, dict) and "errors" in data:
-                            error_message = str(data["errors"])
-                            logger.warning(f"GitHub API error: {error_message}")
-                            
-                            # Check if rate limiting error
-                            if "rate limit" in error_message.lower() or "ratelimit" in error_message.lower():
-                                logger.info("Rate limit error detected in response. Attempting token rotation.")
-                                if self.rotate_token():
-                                    logger.info(f"Rotated to token {self.current_token_index + 1}/{len(self.github_tokens)}")
-                                    token_rotation_attempts += 1
-                                    import time
-                                    time.sleep(2)
-                                    continue
-                            # For other errors, try rotating anyway
-                            elif self.rotate_token():
-                                logger.info(f"Rotated to token {self.current_token_index + 1}/{len(self.github_tokens)} due to API error")
-                                token_rotation_attempts += 1
-                                import time
-                                time.sleep(2)
-                                continue
-                            else:
-                                # If no more tokens, try REST API
-                                if not use_rest_api:
-                                    logger.info("Falling back to REST API due to GitHub API errors")
-                                    return self.rest_crawler.collect_comments(
-                                        username=username,
-                                        limit=limit,
-                                        output_file=output_file,
-                                        continue_crawl=continue_crawl,
-                                        get_all_historical=get_all_historical
-                                    )
-                                else:
-                                    logger.error("Both GraphQL and REST API failed with errors. Giving up.")
-                                    break
+        return all_comments, state
+
+    def _save_crawl_state(self, output_file, state, all_comments):
+        """
+        Save the GraphQL cursors together with the comments collected so far.
+        
+        With the crawl store both are committed in one transaction; otherwise the
+        cursors go to a .state file next to the comments file.
+        """
+        cursors = {key: value for key, value in state.items() if key != "processed_comments"}
+        if self.crawl_store:
+            self.crawl_store.save_page(output_file, cursors, all_comments)
+            return
+        
+        with open(f"{output_file}.state", "w") as f:
+            json.dump(cursors, f)
+
+    def crawl_yield(self, output_file):
+        """
+        Get the yield summary saved by the last crawl of a comments file.
+        
+        Args:
+            output_file (str): Path of the comments JSON
+            
+        Returns:
+            dict: YieldTracker summary, None if the crawl recorded none
+        """
+        return self._saved_state(output_file).get("yield")
+
+    def comment_count(self, output_file):
+        """
+        Count the comments collected for a comments file without loading them.
+        
+        Args:
+            output_file (str): Path of the comments JSON
+            
+        Returns:
+            int: Number of comments, None if the crawl store doesn't hold the crawl
+        """
+        if self.crawl_store:
+            return self.crawl_store.count(output_file)
+        return None
+
+    def _saved_state(self, output_file):
+        """Cursors saved by the last crawl of a comments file, empty if none."""
+        if self.crawl_store:
+            return self.crawl_store.load_state(output_file) or {}
+        if os.path.exists(f"{output_file}.state"):
+            with open(f"{output_file}.state", "r") as f:
+                return json.load(f)
+        return {}
+
+    def _has_crawl_state(self, output_file):
+        """Check whether a crawl was already started for a comments file."""
+        if os.path.exists(output_file) or os.path.exists(f"{output_file}.state"):
+            return True
+        return bool(self.crawl_store and self.crawl_store.has(output_file))
+
+    def _save_comments(self, output_file, all_comments):
+        """
+        Save collected comments to the output file.
+        
+        With the crawl store the file is exported from it, so comments other
+        writers stored during the crawl aren't overwritten.
+        """
+        if self.crawl_store:
+            self.crawl_store.export(output_file)
+        else:
+            with open(output_file, "w", encoding="utf-8") as f:
+                json.dump(all_comments, f, ensure_ascii=False, indent=2)
+        
+        print(f"Comments saved to {output_file}")
+
+    def _cache_pr_nodes(self, nodes):
+        """Store fetched PR nodes with their review threads in the shared PR cache."""
+        if not self.pr_cache:
+            return
+        for pr in nodes:
+            repo = f"{pr['repository']['owner']['login']}/{pr['repository']['name']}"
+            self.pr_cache.set("graphql", PullRequestCache.key(repo, pr["number"]), pr)
+
+    def _extract_comments(self, nodes, username, state, all_comments, limit, get_all_historical):
+        """
+        Append the user's valid review comments from a page of PR nodes.
+        
+        Args:
+            nodes (list): PR nodes from the GraphQL response
+            username (str): GitHub username
+            state (dict): Crawl state holding processed comment URLs
+            all_comments (list): Collected comments, extended in place
+            limit (int): Maximum number of comments to collect
+            get_all_historical (bool): Whether to get all historical comments
+            
+        Returns:
+            int: Number of comments added
+        """
+        added = 0
+        
+        # Process each PR
+        for pr in nodes:
+            owner = pr["repository"]["owner"]["login"]
+            repo = pr["repository"]["name"] 
+            pr_number = pr["number"]
+            pr_title = pr["title"]
+            review_threads = pr.get("reviewThreads", {}).get("nodes", [])
+            
+            # Process each thread and comment
+            for thread in review_threads:
+                for comment in thread.get("comments", {}).get("nodes", []):
+                    try:
+                        if not comment.get("author") or comment["author"]["login"].lower() != username.lower():
+                            continue
                         
-                        if not data or 'data' not in data or not data['data'].get('user'):
-                            logger.warning(f"No valid data received for {username}")
-                            # Try to rotate token and retry instead of breaking
-                            if self.rotate_token():
-                                logger.info(f"Rotating to token {self.current_token_index + 1}/{len(self.github_tokens)} due to invalid data")
-                                token_rotation_attempts += 1
-                                # Short wait before retrying
-                                import time
-                                time.sleep(2)
-                                continue
-                            else:
-                                # If we can't rotate tokens, fall back to REST API if not already using it
-                                if not use_rest_api:
-                                    logger.info("No more tokens available. Falling back to REST API due to invalid data")
-                                    return self.rest_crawler.collect_comments(
-                                        username=username,
-                                        limit=limit,
-                                        output_file=output_file,
-                                        continue_crawl=continue_crawl,
-                                        get_all_historical=get_all_historical
-                                    )
-                                else:
-                                    logger.error("Both GraphQL and REST API failed to return valid data. Giving up.")
-                                    break
+                        comment_url = comment.get("url")
                         
-                        pr_data = data['data']['user']['pullRequests']
-                        nodes = pr_data.get("nodes", [])
-                        state["after"] = pr_data.get("pageInfo", {}).get("endCursor")
+                        # Skip already processed comments unless we want all historical data
+                        if comment_url in state["processed_comments"] and not get_all_historical:
+                            continue
                         
-                        if not nodes:
-                            # If there are no nodes but we expected some (first page with no results)
-                            if not state["after"]:
-                                logger.warning(f"No PR nodes found for {username}")
-                                # Try to rotate token and retry
-                                if self.rotate_token():
-                                    logger.info(f"Rotating to token {self.current_token_index + 1}/{len(self.github_tokens)} due to empty PR list")
-                                    token_rotation_attempts += 1
-                                    # Short wait before retrying
-                                    import time
-                                    time.sleep(2)
-                                    continue
-                                else:
-                                    # If we can't rotate tokens, fall back to REST API
-                                    if not use_rest_api:
-                                        logger.info("No more tokens available. Falling back to REST API due to empty PR list")
-                                        return self.rest_crawler.collect_comments(
-                                            username=username,
-                                            limit=limit,
-                                            output_file=output_file,
-                                            continue_crawl=continue_crawl,
-                                            get_all_historical=get_all_historical
-                                        )
-                            # Normal case of reaching the end of pages with data
-                            break
+                        # Get the comment body
+                        comment_body = comment.get("body", "")
                         
-                        # Process each PR
-                        for pr in nodes:
-                            owner = pr["repository"]["owner"]["login"]
-                            repo = pr["repository"]["name"] 
-                            pr_number = pr["number"]
-                            pr_title = pr["title"]
-                            review_threads = pr.get("reviewThreads", {}).get("nodes", [])
-                            
-                            # Process each thread and comment
-                            for thread in review_threads:
-                                for comment in thread.get("comments", {}).get("nodes", []):
-                                    try:
-                                        if comment["author"]["login"].lower() != username.lower():
-                                            continue
-                                        
-                                        comment_url = comment.get("url")
-                                        
-                                        # Skip already processed comments unless we want all historical data
-                                        if comment_url in state["processed_comments"] and not get_all_historical:
-                                            continue
-                                        
-                                        # Get the comment body
-                                        comment_body = comment.get("body", "")
-                                        
-                                        # Check if comment is valid (not too short, in English, etc.)
-                                        if not self.is_valid_comment(comment_body):
-                                            logger.debug(f"Skipping invalid comment from {username}")
-                                            continue
-                                        
-                                        new_comment = {
-                                            "repo": f"{owner}/{repo}",
-                                            "pr_number": pr_number,
-                                            "pr_title": pr_title,
-                                            "file_path": comment.get("path"),
-                                            # "position": comment.get("position"),
-                                            "comment": comment_body,
-                                            "diff_context": comment.get("diffHunk"),
-                                            # "created_at": comment.get("createdAt"),
-                                            # "updated_at": comment.get("updatedAt"),
-                                            "comment_url": comment_url,  # Keep URL for deduplication
-                                        }
-                                        
-                                        all_comments.append(new_comment)
-                                        state["processed_comments"].add(comment_url)
-                                        pbar.update(1)
-                                        
-                                        if len(all_comments) >= limit:
-                                            break
-                                    except Exception as e:
-                                        logger.error(f"Error processing comment: {e}")
-                                        continue
+                        # Check if comment is valid (not too short, in English, etc.)
+                        if not self.is_valid_comment(comment_body):
+                            logger.debug(f"Skipping invalid comment from {username}")
+                            continue
                         
-                        # Check for next page
-                        if not pr_data.get("pageInfo", {}).get("hasNextPage"):
-                            break
+                        new_comment = {
+                            "repo": f"{owner}/{repo}",
+                            "pr_number": pr_number,
+                            "pr_title": pr_title,
+                            "file_path": comment.get("path"),
+                            # "position": comment.get("position"),
+                            "comment": comment_body,
+                            "diff_context": comment.get("diffHunk"),
+                            "created_at": comment.get("createdAt"),
+                            "updated_at": comment.get("updatedAt"),
+                            "comment_url": comment_url,  # Keep URL for deduplication
+                        }
                         
-                        # Save crawl progress
-                        with open(f"{output_file}.state", "w") as f:
-                            json.dump({"after": state["after"]}, f)
-                
-                # If we got here without exceptions, we're done
-                break
-                
-            except Exception as e:
-                # Check if the error is related to rate limiting
-                error_message = str(e).lower()
-                if "rate limit" in error_message or "ratelimit" in error_message or "too many requests" in error_message:
-                    logger.warning(f"GitHub API rate limited for token {self.current_token_index + 1}/{len(self.github_tokens)}")
-                    
-                    # Try to rotate token
-                    if self.rotate_token():
-                        logger.info(f"Rotated to token {self.current_token_index + 1}/{len(self.github_tokens)}")
-                        token_rotation_attempts += 1
-                        continue
-                    else:
-                        logger.warning("No more tokens available to rotate to")
+                        all_comments.append(new_comment)
+                        state["processed_comments"].add(comment_url)
+                        added += 1
                         
-                        # As last resort, try REST API
-                        if not use_rest_api:
-                            logger.info("Falling back to REST API")
-                            return self.rest_crawler.collect_comments(
-                                username=username,
-                                limit=limit,
-                                output_file=output_file,
-                                continue_crawl=continue_crawl,
-                                get_all_historical=get_all_historical
-                            )
-                else:
-                    # For network errors and other issues, also try to rotate token
-                    logger.error(f"Error collecting comments via GraphQL: {e}")
-                    logger.info("Attempting to rotate token due to error")
-                    
-                    if self.rotate_token():
-                        logger.info(f"Rotated to token {self.current_token_index + 1}/{len(self.github_tokens)}")
-                        token_rotation_attempts += 1
+                        if len(all_comments) >= limit:
+                            return added
+                    except Exception as e:
+                        logger.error(f"Error processing comment: {e}")
                         continue
-                    else:
-                        # If we ran out of tokens, fall back to REST API
-                        if not use_rest_api:
-                            logger.info("Falling back to REST API after all tokens failed")
-                            return self.rest_crawler.collect_comments(
-                                username=username,
-                                limit=limit,
-                                output_file=output_file,
-                                continue_crawl=continue_crawl,
-                                get_all_historical=get_all_historical
-                            )
-                
-                # If we've tried all tokens or fallbacks, break the loop
-                break
         
-        # Save all comments
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(all_comments, f, ensure_ascii=False, indent=2)
-        
-        print(f"Comments saved to {output_file}")
-        return all_comments
+        return added
+
+    def _collect_with_rest(self, username, limit, output_file, continue_crawl, get_all_historical):
+        """Collect the user's comments with the REST API crawler only."""
+        return self.rest_crawler.collect_comments(
+            username=username,
+            limit=limit,
+            output_file=output_file,
+            continue_crawl=continue_crawl,
+            get_all_historical=get_all_historical
+        )
 
     def is_valid_comment(self, comment_text):
         """
@@ -476,6 +1055,11 @@ if __name__ == "__main__":
                         help="Collect all historical comments")
     parser.add_argument("--use-rest-api", action="store_true", 
                         help="Force using REST API instead of GraphQL")
+    parser.add_argument("--strategy", type=str, default=None,
+                        choices=[GitHubCommentCrawler.DEFAULT_STRATEGY, *CRAWL_STRATEGIES],
+                        help="GraphQL crawl strategy (default: CRAWL_STRATEGY or pull_requests)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only collect comments newer than the last crawl (implies --continue-crawl)")
     
     args = parser.parse_args()
     
@@ -491,7 +1075,7 @@ if __name__ == "__main__":
         os.makedirs(args.output_dir)
     
     # Initialize crawler with tokens
-    crawler = GitHubCommentCrawler(tokens)
+    crawler = GitHubCommentCrawler(tokens, strategy=args.strategy, incremental=args.incremental or None)
     
     # Collect comments
     output_file = os.path.join(args.output_dir, f"{args.expert_name}_comments.json")
@@ -500,7 +1084,7 @@ if __name__ == "__main__":
         username=args.expert_name,
         limit=args.comments,
         output_file=output_file,
-        continue_crawl=args.continue_crawl,
+        continue_crawl=args.continue_crawl or args.incremental,
         get_all_historical=args.all_historical,
         use_rest_api=args.use_rest_api
     )
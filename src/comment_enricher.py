@@ -4,11 +4,13 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import os
 import json
-import time
 import logging
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from openai import OpenAI
+from adaptive_concurrency import AdaptiveLimiter
+from retry import RetryPolicy, openai_retry
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, 
@@ -18,24 +20,26 @@ logger = logging.getLogger(__name__)
 class CommentEnricher:
     """GitHub comment classifier using OpenAI API."""
     
-    def __init__(self, api_key=None, model="gpt-4o-mini", rate_limit_delay=0.5):
+    def __init__(self, api_key=None, model="gpt-4o-mini", limiter=None, retry=None):
         """
         Initialize with OpenAI API key.
         
         Args:
             api_key (str): OpenAI API key
             model (str): OpenAI model to use
-            rate_limit_delay (float): Delay between API calls (seconds)
+            limiter (AdaptiveLimiter, optional): In-flight request limit, defaults to the shared OpenAI one
+            retry (RetryPolicy, optional): Retry policy, defaults to the shared OpenAI one
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             logger.error("OpenAI API key not found. Please provide via parameter or OPENAI_API_KEY environment variable")
             raise ValueError("Missing OpenAI API key")
             
-        # Initialize client with the new API format
-        self.client = OpenAI(api_key=self.api_key)
+        # Initialize client with the new API format; retries are left to the retry policy
+        self.client = OpenAI(api_key=self.api_key, max_retries=0)
         self.model = model
-        self.rate_limit_delay = rate_limit_delay
+        self.limiter = limiter or AdaptiveLimiter.from_env("openai")
+        self.retry = retry or RetryPolicy.from_env("openai")
     
     def enrich_comments(self, input_file, output_file=None, continue_enrichment=False):
         """
@@ -80,12 +84,36 @@ class CommentEnricher:
         
         logger.info(f"Need to enrich {len(remaining_reviews)} comments")
         
-        # Process each comment
-        for idx, review in enumerate(remaining_reviews, start=1):
-            logger.info(f"Enriching comment {idx}/{len(remaining_reviews)}")
+        # Classify comments concurrently, up to the limiter's maximum; results are saved in order
+        with ThreadPoolExecutor(max_workers=self.limiter.maximum) as executor:
+            results = executor.map(self._classify, remaining_reviews)
+            for idx, (review, enriched) in enumerate(zip(remaining_reviews, results), start=1):
+                logger.info(f"Enriched comment {idx}/{len(remaining_reviews)}")
+                if enriched is None:
+                    # Add original comment without enrichment
+                    enriched_reviews.append(review)
+                    continue
+                
+                enriched_reviews.append(enriched)
+                # Save after each comment to avoid data loss
+                with open(output_file, "w", encoding="utf-8") as f:
+                    json.dump(enriched_reviews, f, indent=2, ensure_ascii=False)
             
-            # Build prompt for a single comment
-            prompt = f"""
+        logger.info(f"Complete! Saved {len(enriched_reviews)} enriched comments to {output_file}")
+        return enriched_reviews
+
+    def _classify(self, review):
+        """
+        Classify one comment with OpenAI.
+        
+        Args:
+            review (dict): Comment to classify
+            
+        Returns:
+            dict: Comment with its classification, None if the API call or parsing failed
+        """
+        # Build prompt for a single comment
+        prompt = f"""
 You are a code‐review classifier. Given a single GitHub review comment object in JSON, produce a JSON object with exactly these three keys:
 
   • review_type: one of [
@@ -114,51 +142,46 @@ Here is the review comment:
 {json.dumps(review, indent=2)}
 """
 
+        def attempt():
+            # Call OpenAI API with new format
             try:
-                # Call OpenAI API with new format
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "You classify a single code review comment. Always return lowercase values."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0
-                )
-                content = response.choices[0].message.content.strip()
-                
-                # Parse JSON result
-                try:
-                    classification = json.loads(content)
-                    
-                    # Convert all string values to lowercase
-                    for key, value in classification.items():
-                        if isinstance(value, str):
-                            classification[key] = value.lower()
-                    
-                    # Combine original data with classification data
-                    enriched = {**review, **classification}
-                    enriched_reviews.append(enriched)
-                    
-                    # Save after each comment to avoid data loss
-                    with open(output_file, "w", encoding="utf-8") as f:
-                        json.dump(enriched_reviews, f, indent=2, ensure_ascii=False)
-                        
-                except json.JSONDecodeError:
-                    logger.error(f"Error parsing JSON from OpenAI for comment #{idx}:")
-                    logger.error(content)
-                    # Add original comment without enrichment
-                    enriched_reviews.append(review)
-                    
+                with self.limiter.slot():
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": "You classify a single code review comment. Always return lowercase values."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=0
+                    )
             except Exception as e:
-                logger.error(f"Error calling OpenAI API: {e}")
-                # Add original comment without enrichment
-                enriched_reviews.append(review)
-                
-            # Pause to avoid rate limits
-            time.sleep(self.rate_limit_delay)
-            
-        logger.info(f"Complete! Saved {len(enriched_reviews)} enriched comments to {output_file}")
-        return enriched_reviews
+                self.limiter.record_openai_error(e)
+                raise
+            self.limiter.record_success()
+            return response
+        
+        try:
+            response = self.retry.call(attempt, openai_retry)
+            content = response.choices[0].message.content.strip()
+        except Exception as e:
+            logger.error(f"Error calling OpenAI API: {e}")
+            return None
+        
+        # Parse JSON result
+        try:
+            classification = json.loads(content)
+        except json.JSONDecodeError:
+            logger.error(f"Error parsing JSON from OpenAI for comment {review.get('comment_url')}:")
+            logger.error(content)
+            return None
+        
+        # Convert all string values to lowercase
+        for key, value in classification.items():
+            if isinstance(value, str):
+                classification[key] = value.lower()
+        
+        # Combine original data with classification data
+        return {**review, **classification}
 
 
 def main():
@@ -173,8 +196,6 @@ def main():
                         help="OpenAI API key (or use OPENAI_API_KEY env variable)")
     parser.add_argument("--model", type=str, default="gpt-4o-mini",
                         help="OpenAI model to use (default: gpt-4o-mini)")
-    parser.add_argument("--delay", type=float, default=0.5,
-                        help="Delay between API calls in seconds (default: 0.5)")
     parser.add_argument("--continue", dest="continue_enrichment", action="store_true",
                         help="Continue enrichment from previous output file")
     
@@ -184,8 +205,7 @@ def main():
         api_key = args.api_key
         enricher = CommentEnricher(
             api_key=api_key,
-            model=args.model,
-            rate_limit_delay=args.delay
+            model=args.model
         )
         
         enricher.enrich_comments(
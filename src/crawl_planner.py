@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Plan expert crawls against the remaining GitHub quota of every token.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import asyncio
+import heapq
+import json
+import logging
+import math
+import time
+from datetime import datetime
+from http_transport import get_transport
+from token_pool import DEFAULT_RESET_WINDOW, RESET_WINDOWS, TokenPool
+
+logger = logging.getLogger(__name__)
+
+# REST crawls fetch a search page of 100 PRs, then the comments of each PR
+REST_PAGE_COST = (100, 101)
+
+
+class CrawlPlanner:
+    """
+    Schedules expert crawls so the GitHub quota is spent evenly up to each reset.
+
+    An expert's crawl is estimated to cost one page per batch of the PRs they
+    wrote or reviewed (prs + pr_reviews in experts.json), unless the comments
+    still missing reach the limit sooner at the yield past crawls achieved.
+    Crawls then start as soon as the tokens' spendable budget covers their
+    cumulative cost, where a token may spend burst of its remaining budget at
+    once and the rest spread evenly until its reset, then its full limit per
+    window. Starting every crawl at once would instead empty the tokens early
+    and leave the workers idle until the reset.
+    """
+
+    def __init__(self, token_pool, resource="graphql", burst=None, reserve=None, transport=None):
+        """
+        Initialize the planner.
+
+        Args:
+            token_pool (TokenPool): Pool whose token budgets are planned against
+            resource (str): Rate limit resource the crawls spend, "graphql" or "core"
+            burst (float): Share of a token's remaining budget that may be spent at once
+            reserve (float): Share of each token's limit kept back for expert search and retries
+            transport (GitHubTransport, optional): Transport for GET /rate_limit, defaults to the shared one
+        """
+        self.token_pool = token_pool
+        self.resource = resource
+        self.burst = burst if burst is not None else float(os.getenv("CRAWL_PLANNER_BURST", "0.25"))
+        self.reserve = reserve if reserve is not None else float(os.getenv("CRAWL_PLANNER_RESERVE", "0.05"))
+        self.transport = transport or get_transport()
+        # (PRs per page, points per page) until finished crawls tell us better
+        if resource == "core":
+            self.prs_per_page, self.points_per_page = REST_PAGE_COST
+        else:
+            self.prs_per_page = int(os.getenv("GRAPHQL_PR_PAGE_SIZE", "50"))
+            self.points_per_page = int(os.getenv("GRAPHQL_TARGET_COST", "10"))
+        self.comments_per_point = None
+
+    def refresh_budgets(self):
+        """
+        Load every token's current budgets from GET /rate_limit, which costs no quota.
+
+        Tokens whose request fails keep the budgets the pool already knows.
+        """
+        for token in self.token_pool.tokens:
+            try:
+                response = self.transport.get(
+                    "https://api.github.com/rate_limit",
+                    headers={"Authorization": f"token {token}", "Accept": "application/vnd.github.v3+json"}
+                )
+                if response.status_code != 200:
+                    logger.warning(f"Could not read rate limits of token {self.token_pool.tokens.index(token) + 1}: HTTP {response.status_code}")
+                    continue
+                self.token_pool.record_rate_limits(token, response.json().get("resources"))
+            except Exception as e:
+                logger.warning(f"Could not read rate limits of token {self.token_pool.tokens.index(token) + 1}: {e}")
+
+    def calibrate(self, crawl_yields):
+        """
+        Take points per page and comments per point from the yield summaries of past crawls.
+
+        Args:
+            crawl_yields (iterable): YieldTracker summaries, None entries are skipped
+        """
+        pages = points = comments = 0
+        for summary in crawl_yields:
+            if not summary:
+                continue
+            pages += summary.get("pages", 0)
+            points += summary.get("points", 0)
+            comments += summary.get("comments", 0)
+        # Mostly cached pages say little about what a fresh page costs
+        if pages and points >= pages:
+            self.points_per_page = points / pages
+        if points:
+            self.comments_per_point = comments / points
+
+    def estimate_cost(self, expert, comment_limit, collected=0, crawl_yield=None):
+        """
+        Estimate the points a crawl of one expert will spend.
+
+        Args:
+            expert (dict): Expert entry of experts.json, may lack the prs / pr_reviews counts
+            comment_limit (int): Maximum comments per expert
+            collected (int): Comments already collected
+            crawl_yield (dict): Yield summary of the expert's last crawl, if any
+
+        Returns:
+            float: Estimated points, None if the expert has no counts and no crawl history
+        """
+        if crawl_yield and crawl_yield.get("stopped"):
+            # A low-yield crawl is only resumed to fetch one more page
+            return self.points_per_page
+
+        costs = []
+        if "prs" in expert or "pr_reviews" in expert:
+            prs = expert.get("prs", 0) + expert.get("pr_reviews", 0)
+            costs.append(max(1, math.ceil(prs / self.prs_per_page)) * self.points_per_page)
+
+        comments_per_point = (crawl_yield or {}).get("yield") or self.comments_per_point
+        if comments_per_point:
+            costs.append(max(0, comment_limit - collected) / comments_per_point)
+
+        if not costs:
+            return None
+        return max(self.points_per_page, min(costs))
+
+    def expected_yield(self, expert, comment_limit, collected=0, crawl_yield=None):
+        """
+        Estimate the valid comments per point a crawl of one expert will yield.
+
+        The yield of the expert's past crawls is used where known. Otherwise the
+        comments still missing, at most one per PR the expert reviewed, are
+        divided by the estimated cost.
+
+        Args:
+            expert (dict): Expert entry of experts.json, may lack the prs / pr_reviews counts
+            comment_limit (int): Maximum comments per expert
+            collected (int): Comments already collected
+            crawl_yield (dict): Yield summary of the expert's last crawl, if any
+
+        Returns:
+            float: Expected comments per point, 0 if the expert has all comments or stopped for low yield
+        """
+        needed = max(0, comment_limit - collected)
+        if not needed or (crawl_yield and crawl_yield.get("stopped")):
+            return 0.0
+        if crawl_yield and crawl_yield.get("yield") is not None:
+            return crawl_yield["yield"]
+
+        cost = self.estimate_cost(expert, comment_limit, collected, crawl_yield)
+        if cost is None:
+            # Nothing known about the expert, assume an average one
+            return self.comments_per_point or 0.0
+        return min(needed, expert.get("pr_reviews", needed)) / cost
+
+    def plan(self, experts, comment_limit, collected=None, crawl_yields=None, now=None):
+        """
+        Schedule crawls of experts in the given order.
+
+        Args:
+            experts (list): Expert entries (dicts with login, or bare usernames)
+            comment_limit (int): Maximum comments per expert
+            collected (dict, optional): Username -> comments already collected
+            crawl_yields (dict, optional): Username -> yield summary of the last crawl
+            now (float): Planning time, defaults to the current time
+
+        Returns:
+            list: One dict per expert with login, cost and start (epoch seconds)
+        """
+        now = now or time.time()
+        collected = collected or {}
+        crawl_yields = crawl_yields or {}
+        experts = [{"login": expert} if isinstance(expert, str) else expert for expert in experts]
+
+        costs = [
+            self.estimate_cost(expert, comment_limit, collected.get(expert["login"], 0), crawl_yields.get(expert["login"]))
+            for expert in experts
+        ]
+        # Experts without counts or history are assumed to cost as much as the average known one
+        known = [cost for cost in costs if cost is not None]
+        default_cost = sum(known) / len(known) if known else self.points_per_page
+
+        budgets = self._budgets(now)
+        schedule = []
+        total = 0
+        for expert, cost in zip(experts, costs):
+            cost = default_cost if cost is None else cost
+            total += cost
+            schedule.append({"login": expert["login"], "cost": round(cost), "start": now + self._time_to_afford(budgets, total)})
+        return schedule
+
+    def _budgets(self, now):
+        """
+        Spendable budget of every token.
+
+        Returns:
+            list: (remaining, limit, seconds until reset, window) per token, after the reserve
+        """
+        budgets = []
+        window = RESET_WINDOWS.get(self.resource, DEFAULT_RESET_WINDOW)
+        for token in self.token_pool.tokens:
+            remaining = self.token_pool.remaining(token, self.resource)
+            reset = self.token_pool.reset_time(token, self.resource)
+            limit = self.token_pool.limit(token, self.resource)
+            reset_in = reset - now if reset > now else window
+            kept = self.reserve * limit
+            budgets.append((max(0, remaining - kept), max(0, limit - kept), reset_in, window))
+        return budgets
+
+    def _spendable(self, budgets, elapsed):
+        """Points the tokens may have spent in total after elapsed seconds."""
+        total = 0
+        for remaining, limit, reset_in, window in budgets:
+            if elapsed < reset_in:
+                total += min(remaining, remaining * (self.burst + (1 - self.burst) * elapsed / reset_in))
+            else:
+                total += remaining + limit * (elapsed - reset_in) / window
+        return total
+
+    def _time_to_afford(self, budgets, cost):
+        """
+        Seconds until the tokens may have spent cost points.
+
+        Returns:
+            float: Delay, 0 if affordable now
+        """
+        if self._spendable(budgets, 0) >= cost:
+            return 0
+        if not any(limit for _, limit, _, _ in budgets):
+            return 0
+
+        high = 60.0
+        while self._spendable(budgets, high) < cost:
+            high *= 2
+        low = 0.0
+        # Spendable budget grows monotonically, so bisect to within a second
+        while high - low > 1:
+            middle = (low + high) / 2
+            if self._spendable(budgets, middle) >= cost:
+                high = middle
+            else:
+                low = middle
+        return high
+
+    @staticmethod
+    async def wait_for(entry):
+        """
+        Sleep until a planned crawl may start.
+
+        Args:
+            entry (dict): Schedule entry returned by plan()
+        """
+        delay = entry["start"] - time.time()
+        if delay > 0:
+            logger.info(f"Pacing crawl of {entry['login']} (~{entry['cost']} points): starting in {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+
+class ExpertQueue:
+    """Priority queue of experts, highest expected yield first, ties by username."""
+
+    def __init__(self):
+        """Initialize an empty queue."""
+        self._heap = []
+
+    def push(self, username, score):
+        """
+        Queue an expert.
+
+        Args:
+            username (str): GitHub username
+            score (float): Expected valid comments per point
+        """
+        heapq.heappush(self._heap, (-score, username))
+
+    def pop(self):
+        """
+        Take the expert with the highest expected yield.
+
+        Returns:
+            str: GitHub username
+        """
+        return heapq.heappop(self._heap)[1]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def main():
+    """Print the crawl plan of a language and optionally wait until its first crawl may start."""
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Plan expert crawls against the remaining GitHub quota")
+    parser.add_argument("--env-file", type=str, default=".env",
+                        help="File with GITHUB_TOKEN(_N) and pipeline settings")
+    parser.add_argument("--language", type=str,
+                        help="Language whose experts.json is planned (default: LANGUAGE)")
+    parser.add_argument("--output-dir", type=str,
+                        help="Pipeline data directory (default: OUTPUT_DIR or data)")
+    parser.add_argument("--comment-limit", type=int,
+                        help="Maximum comments per expert (default: COMMENT_LIMIT or 200)")
+    parser.add_argument("--max-experts", type=int,
+                        help="Experts to plan for when the language has no experts.json yet (default: MAX_EXPERTS or 10)")
+    parser.add_argument("--wait", action="store_true",
+                        help="Sleep until the first crawl may start")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv(args.env_file)
+    language = args.language or os.getenv("LANGUAGE") or ""
+    output_dir = args.output_dir or os.getenv("OUTPUT_DIR", "data")
+    comment_limit = args.comment_limit or int(os.getenv("COMMENT_LIMIT", "200"))
+    max_experts = args.max_experts or int(os.getenv("MAX_EXPERTS", "10"))
+
+    tokens = [os.getenv("GITHUB_TOKEN")] + [os.getenv(f"GITHUB_TOKEN_{i}") for i in range(1, 10)]
+    tokens = [token for token in tokens if token]
+    if not tokens:
+        logger.error("Missing GitHub token. Set GITHUB_TOKEN or GITHUB_TOKEN_1, GITHUB_TOKEN_2, etc.")
+        return 1
+
+    experts = [{"login": f"<new expert {i + 1}>"} for i in range(max_experts)]
+    experts_file = os.path.join(output_dir, language.lower(), "experts.json")
+    if language and os.path.exists(experts_file):
+        with open(experts_file, "r", encoding="utf-8") as f:
+            experts = json.load(f)
+
+    resource = "core" if os.getenv("USE_REST_API", "false").lower() == "true" else "graphql"
+    planner = CrawlPlanner(TokenPool(tokens), resource=resource)
+    planner.refresh_budgets()
+    schedule = planner.plan(experts, comment_limit)
+
+    now = time.time()
+    for i, token in enumerate(tokens, 1):
+        reset = planner.token_pool.reset_time(token, resource)
+        reset_at = datetime.fromtimestamp(reset).strftime("%H:%M:%S") if reset else "unknown"
+        print(f"Token {i}: {planner.token_pool.remaining(token, resource)} {resource} points left, resets at {reset_at}")
+    for entry in schedule:
+        print(f"{entry['login']}: ~{entry['cost']} points, starts in {max(0, entry['start'] - now):.0f}s")
+    print(f"Total: ~{sum(entry['cost'] for entry in schedule)} points")
+
+    if args.wait and schedule:
+        asyncio.run(CrawlPlanner.wait_for(schedule[0]))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
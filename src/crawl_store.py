@@ -0,0 +1,316 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlStore:
+    """
+    Transactional crawl state in SQLite (WAL mode).
+
+    Each crawl is identified by its comments file. Every page commits the new
+    comments and the cursors in one transaction, so a crash can neither advance
+    a cursor past comments that were not saved nor lose collected comments, and
+    a page costs a few row inserts instead of rewriting the whole JSON file.
+    comments.json is still exported at the end of a crawl for the later stages.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS crawls (
+        crawl_id TEXT PRIMARY KEY,
+        state TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS comments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        crawl_id TEXT NOT NULL,
+        comment_url TEXT NOT NULL,
+        data TEXT NOT NULL,
+        UNIQUE (crawl_id, comment_url)
+    );
+    CREATE INDEX IF NOT EXISTS comments_by_crawl ON comments (crawl_id, id);
+    """
+
+    def __init__(self, path):
+        """
+        Open or create the store.
+
+        Args:
+            path (str): SQLite database file
+        """
+        self.path = path
+        self.base_dir = os.path.dirname(os.path.abspath(path))
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Get the shared store configured by CRAWL_STORE / CRAWL_STORE_PATH.
+
+        Returns:
+            CrawlStore: Shared store, or None to keep crawl state in JSON files
+        """
+        if os.getenv("CRAWL_STORE", "true").lower() != "true":
+            return None
+
+        path = os.getenv("CRAWL_STORE_PATH") or os.path.join(os.getenv("OUTPUT_DIR", "data"), "crawl_state.db")
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path)
+            return cls._instances[path]
+
+    def _connection(self):
+        """SQLite connection of the calling thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def crawl_id(self, output_file):
+        """
+        Identify a crawl by its comments file, relative to the store location.
+
+        Args:
+            output_file (str): Path of the comments JSON
+
+        Returns:
+            str: Crawl ID
+        """
+        return os.path.relpath(os.path.abspath(output_file), self.base_dir)
+
+    def has(self, output_file):
+        """Check whether the store holds a crawl for a comments file."""
+        row = self._connection().execute(
+            "SELECT 1 FROM crawls WHERE crawl_id = ?", (self.crawl_id(output_file),)
+        ).fetchone()
+        return row is not None
+
+    def load(self, output_file):
+        """
+        Load the comments and cursors of a crawl.
+
+        Args:
+            output_file (str): Path of the comments JSON
+
+        Returns:
+            tuple: (list of comments in collection order, state dict), or None if unknown
+        """
+        crawl_id = self.crawl_id(output_file)
+        conn = self._connection()
+        row = conn.execute("SELECT state FROM crawls WHERE crawl_id = ?", (crawl_id,)).fetchone()
+        if row is None:
+            return None
+
+        comments = [
+            json.loads(data) for (data,) in
+            conn.execute("SELECT data FROM comments WHERE crawl_id = ? ORDER BY id", (crawl_id,))
+        ]
+        return comments, json.loads(row[0])
+
+    def load_state(self, output_file):
+        """
+        Load only the cursors of a crawl.
+
+        Args:
+            output_file (str): Path of the comments JSON
+
+        Returns:
+            dict: State dict, None if unknown
+        """
+        row = self._connection().execute(
+            "SELECT state FROM crawls WHERE crawl_id = ?", (self.crawl_id(output_file),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self, output_file):
+        """
+        Count the stored comments of a crawl.
+
+        Args:
+            output_file (str): Path of the comments JSON
+
+        Returns:
+            int: Number of comments, None if unknown
+        """
+        if not self.has(output_file):
+            return None
+        (count,) = self._connection().execute(
+            "SELECT COUNT(*) FROM comments WHERE crawl_id = ?", (self.crawl_id(output_file),)
+        ).fetchone()
+        return count
+
+    def save_page(self, output_file, state, comments):
+        """
+        Atomically record a crawl's cursors and the comments it collected so far.
+
+        comments is the crawl's full comment list; entries whose URL the store
+        doesn't hold yet are inserted. Other writers (webhooks, archive ingests)
+        may add rows in between, so positions in the list mean nothing.
+
+        Args:
+            output_file (str): Path of the comments JSON
+            state (dict): JSON-serializable cursors
+            comments (list): Collected comments
+        """
+        crawl_id = self.crawl_id(output_file)
+        conn = self._connection()
+        with conn:
+            stored = {url for (url,) in conn.execute("SELECT comment_url FROM comments WHERE crawl_id = ?", (crawl_id,))}
+            rows = {}
+            for comment in comments:
+                key = comment_key(comment)
+                if key not in stored:
+                    rows[key] = json.dumps(comment, ensure_ascii=False)
+            conn.executemany(
+                "INSERT OR IGNORE INTO comments (crawl_id, comment_url, data) VALUES (?, ?, ?)",
+                [(crawl_id, key, data) for key, data in rows.items()]
+            )
+            conn.execute(
+                "INSERT INTO crawls (crawl_id, state, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (crawl_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                (crawl_id, json.dumps(state), time.time())
+            )
+
+    def add_comments(self, output_file, comments, limit=None):
+        """
+        Insert comments into a crawl without touching its cursors.
+
+        For writers other than the crawl itself (webhooks, archive ingests), which
+        may run while the crawl is in progress, possibly in another process.
+
+        Args:
+            output_file (str): Path of the comments JSON
+            comments (list): Comments to add; URLs already stored are skipped
+            limit (int): Maximum number of comments the crawl may hold, None for no limit
+
+        Returns:
+            list: Comments added
+        """
+        crawl_id = self.crawl_id(output_file)
+        conn = self._connection()
+        with conn:
+            # Claims the write lock first, so the count can't change before the insert
+            conn.execute(
+                "INSERT OR IGNORE INTO crawls (crawl_id, state, updated_at) VALUES (?, ?, ?)",
+                (crawl_id, json.dumps({}), time.time())
+            )
+            stored = {url for (url,) in conn.execute("SELECT comment_url FROM comments WHERE crawl_id = ?", (crawl_id,))}
+            added = {}
+            for comment in comments:
+                key = comment_key(comment)
+                if key not in stored and key not in added:
+                    added[key] = comment
+            added = list(added.values())
+            if limit is not None:
+                added = added[:max(0, limit - len(stored))]
+            conn.executemany(
+                "INSERT OR IGNORE INTO comments (crawl_id, comment_url, data) VALUES (?, ?, ?)",
+                [(crawl_id, comment_key(comment), json.dumps(comment, ensure_ascii=False)) for comment in added]
+            )
+        return added
+
+    def export(self, output_file):
+        """
+        Write a crawl's stored comments to its comments.json.
+
+        The store is the one copy every writer adds to, so the exported file
+        includes comments added while the crawl was running.
+
+        Args:
+            output_file (str): Path of the comments JSON
+
+        Returns:
+            list: Exported comments
+        """
+        comments = (self.load(output_file) or ([], {}))[0]
+        os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+        tmp_file = f"{output_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(comments, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, output_file)
+        return comments
+
+    def reset(self, output_file):
+        """Forget the comments and cursors of a crawl."""
+        crawl_id = self.crawl_id(output_file)
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM comments WHERE crawl_id = ?", (crawl_id,))
+            conn.execute("DELETE FROM crawls WHERE crawl_id = ?", (crawl_id,))
+
+    def migrate(self, output_file):
+        """
+        Import a crawl kept in comments.json and comments.json.state into the store.
+
+        Args:
+            output_file (str): Path of the comments JSON
+
+        Returns:
+            tuple: (list of comments, state dict), empty if there is nothing to migrate
+        """
+        comments, state = read_json_crawl(output_file)
+        if comments or state:
+            self.save_page(output_file, state, comments)
+            logger.info(f"Migrated {len(comments)} comments from {output_file} into the crawl store")
+        return comments, state
+
+
+def comment_key(comment):
+    """Key of a comment in the store: its URL, or its JSON for comments without one."""
+    return comment.get("comment_url") or json.dumps(comment, sort_keys=True)
+
+
+def read_json_crawl(output_file):
+    """
+    Read a crawl kept in comments.json and comments.json.state.
+
+    Args:
+        output_file (str): Path of the comments JSON
+
+    Returns:
+        tuple: (list of comments, state dict), empty if the files don't exist
+    """
+    comments = []
+    state = {}
+    if os.path.exists(output_file):
+        with open(output_file, "r", encoding="utf-8") as f:
+            comments = json.load(f)
+    state_file = f"{output_file}.state"
+    if os.path.exists(state_file):
+        with open(state_file, "r") as f:
+            state = json.load(f)
+    return comments, state
+
+
+def advance_watermark(state, comments):
+    """
+    Move an expert's watermark up to the newest comment timestamp collected.
+
+    Args:
+        state (dict): Crawl state holding "watermark"
+        comments (list): Collected comments with created_at / updated_at
+
+    Returns:
+        str: Watermark after the update, None if no comment has a timestamp
+    """
+    timestamps = [comment.get("updated_at") or comment.get("created_at") for comment in comments]
+    newest = max([timestamp for timestamp in timestamps if timestamp] + [state.get("watermark") or ""])
+    if newest:
+        state["watermark"] = newest
+    return state.get("watermark")
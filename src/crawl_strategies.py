@@ -0,0 +1,695 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import logging
+from datetime import datetime, timedelta, timezone
+from adaptive_paging import AdaptivePageSizer, is_oversized_query_error
+from graphql_batching import RATE_LIMIT_SELECTION
+from pr_cache import PullRequestCache
+from crawl_store import advance_watermark
+
+logger = logging.getLogger(__name__)
+
+# Review comment fields read by GitHubCommentCrawler._extract_comments
+REVIEW_COMMENT_FIELDS = """
+                    author {
+                      login
+                    }
+                    body
+                    path
+                    diffHunk
+                    url
+                    createdAt
+                    updatedAt"""
+
+
+class CrawlStrategy:
+    """
+    A GraphQL crawl plan written as a generator of requests.
+
+    requests() yields (query, variables) pairs and receives each successful
+    response back, so GitHubCommentCrawler can drive the same strategy with the
+    blocking or the asyncio client and handle token rotation and fallback in one
+    place. Strategies record progress in the crawl state dict, which the crawler
+    saves after every page.
+
+    An incremental strategy only walks activity newer than the expert's
+    watermark (state["watermark"]). When such a pass completes, it advances the
+    watermark and drops its progress so the next pass starts from the newest
+    activity again; a pass cut short by the limit resumes where it stopped.
+    """
+
+    name = None
+
+    # Whether requests() only plans windows that window_requests() crawls in parallel
+    parallel = False
+
+    def __init__(self, crawler, incremental=False):
+        """
+        Args:
+            crawler (GitHubCommentCrawler): Crawler providing comment extraction
+            incremental (bool): Only crawl activity newer than the watermark
+        """
+        self.crawler = crawler
+        self.incremental = incremental
+        self.page_sizer = AdaptivePageSizer()
+        # Set when GraphQL cannot crawl the user (unknown login, no PRs at all),
+        # so the REST commenter search should take over
+        self.needs_rest = False
+
+    @property
+    def state_key(self):
+        """Key of this strategy's progress in the crawl state."""
+        return f"{self.name}_incremental" if self.incremental else self.name
+
+    def requests(self, username, state, all_comments, limit, get_all_historical):
+        """
+        Yield GraphQL requests until the crawl is complete.
+
+        Args:
+            username (str): GitHub username
+            state (dict): Crawl state, updated in place
+            all_comments (list): Collected comments, extended in place
+            limit (int): Maximum number of comments to collect
+            get_all_historical (bool): Whether to get all historical comments
+        """
+        raise NotImplementedError
+
+    def _complete(self, state, all_comments):
+        """Finish an incremental pass by advancing the watermark."""
+        if self.incremental:
+            advance_watermark(state, all_comments)
+            state.pop(self.state_key, None)
+
+    def _user(self, data, username):
+        """User object of a response, None (with a warning) if the user could not be resolved."""
+        user = data["data"].get("user")
+        if user is None:
+            logger.warning(f"GitHub user {username} could not be resolved")
+            self.needs_rest = True
+        return user
+
+
+class ReviewContributionsStrategy(CrawlStrategy):
+    """
+    Crawl the reviews the expert authored instead of the expert's own PRs.
+
+    Walks user.contributionsCollection.pullRequestReviewContributions one
+    contribution year at a time (the collection spans at most a year). Every
+    comment of a review belongs to its author, so nothing downloaded is thrown
+    away for being written by someone else. Incremental passes walk one-year
+    windows from the watermark to now instead.
+    """
+
+    name = "reviews"
+
+    YEARS_QUERY = """
+    query ($login: String!) {""" + RATE_LIMIT_SELECTION + """
+      user(login: $login) {
+        contributionsCollection {
+          contributionYears
+        }
+      }
+    }
+    """
+
+    REVIEWS_QUERY = """
+    query ($login: String!, $from: DateTime!, $to: DateTime!, $after: String, $first: Int = 50, $commentFirst: Int = 50) {""" + RATE_LIMIT_SELECTION + """
+      user(login: $login) {
+        contributionsCollection(from: $from, to: $to) {
+          pullRequestReviewContributions(first: $first, after: $after) {
+            pageInfo {
+              endCursor
+              hasNextPage
+            }
+            nodes {
+              pullRequest {
+                number
+                title
+                repository {
+                  name
+                  owner {
+                    login
+                  }
+                }
+              }
+              pullRequestReview {
+                comments(first: $commentFirst) {
+                  totalCount
+                  nodes {""" + REVIEW_COMMENT_FIELDS + """
+                  }
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+    """
+
+    def requests(self, username, state, all_comments, limit, get_all_historical):
+        progress = state.setdefault(self.state_key, {"windows": None, "window_index": 0, "after": None})
+        if "years" in progress:
+            # Progress saved before windows replaced contribution years
+            years = progress.pop("years") or []
+            progress["windows"] = [[f"{year}-01-01T00:00:00Z", f"{year}-12-31T23:59:59Z"] for year in years] or None
+            progress["window_index"] = progress.pop("year_index", 0)
+
+        if progress["windows"] is None:
+            if self.incremental and state.get("watermark"):
+                progress["windows"] = self._windows_since(state["watermark"])
+            else:
+                data = yield self.YEARS_QUERY, {"login": username}
+                user = self._user(data, username)
+                if user is None:
+                    return
+                # Newest years first, so a limited crawl gets recent reviews
+                progress["windows"] = [
+                    [f"{year}-01-01T00:00:00Z", f"{year}-12-31T23:59:59Z"]
+                    for year in sorted(user["contributionsCollection"]["contributionYears"], reverse=True)
+                ]
+
+        while progress["window_index"] < len(progress["windows"]) and len(all_comments) < limit:
+            window_from, window_to = progress["windows"][progress["window_index"]]
+            data = yield self.REVIEWS_QUERY, {
+                "login": username,
+                "from": window_from,
+                "to": window_to,
+                "after": progress["after"],
+                "first": self.page_sizer.pr_first,
+                "commentFirst": self.page_sizer.comment_first,
+            }
+
+            if is_oversized_query_error(data):
+                if self.page_sizer.shrink():
+                    continue
+                logger.error(f"Review contributions query for {username} is too large even at minimum page size")
+                return
+
+            user = self._user(data, username)
+            if user is None:
+                return
+
+            contributions = user["contributionsCollection"]["pullRequestReviewContributions"]
+            nodes = [self._as_pr_node(node) for node in contributions.get("nodes", []) if node.get("pullRequest")]
+            self.page_sizer.record_page(nodes, (data["data"].get("rateLimit") or {}).get("cost"))
+            self.crawler._extract_comments(nodes, username, state, all_comments, limit, get_all_historical)
+
+            if contributions["pageInfo"]["hasNextPage"]:
+                progress["after"] = contributions["pageInfo"]["endCursor"]
+            else:
+                progress["window_index"] += 1
+                progress["after"] = None
+
+        if progress["window_index"] >= len(progress["windows"]):
+            self._complete(state, all_comments)
+
+    @staticmethod
+    def _windows_since(since):
+        """Split the time from since to now into windows of at most a year, newest first."""
+        start = datetime.strptime(since, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+        end = datetime.now(timezone.utc)
+        windows = []
+        while end > start:
+            window_start = max(start, end - timedelta(days=365))
+            windows.append([_format_time(window_start), _format_time(end)])
+            end = window_start
+        return windows
+
+    @staticmethod
+    def _as_pr_node(contribution):
+        """Reshape a review contribution into the PR node shape used by _extract_comments."""
+        pr = contribution["pullRequest"]
+        comments = (contribution.get("pullRequestReview") or {}).get("comments") or {"nodes": []}
+        return {
+            "number": pr["number"],
+            "title": pr["title"],
+            "repository": pr["repository"],
+            "reviewThreads": {"totalCount": 1, "nodes": [{"comments": comments}]},
+        }
+
+
+class TwoPhaseStrategy(CrawlStrategy):
+    """
+    List the expert's PRs cheaply, then fetch review threads only where they exist.
+
+    Phase 1 pages through user.pullRequests asking only for node IDs and
+    reviewThreads.totalCount. Phase 2 loads the threads of PRs that have any,
+    in batches through nodes(ids: [...]). Prolific authors have many PRs without
+    review threads, which no longer cost nested thread and comment connections.
+    PRs found unchanged in the shared PR cache are not fetched again.
+    Incremental passes list PRs by most recent update and stop at the watermark.
+    """
+
+    name = "two_phase"
+
+    # Phase 1 pages are cheap, so always ask for the maximum
+    PR_IDS_PAGE_SIZE = 100
+
+    PR_IDS_QUERY = """
+    query ($login: String!, $after: String, $first: Int = 100, $orderBy: IssueOrder = {field: CREATED_AT, direction: ASC}) {""" + RATE_LIMIT_SELECTION + """
+      user(login: $login) {
+        pullRequests(first: $first, after: $after, orderBy: $orderBy) {
+          pageInfo {
+            endCursor
+            hasNextPage
+          }
+          nodes {
+            id
+            number
+            updatedAt
+            repository {
+              nameWithOwner
+            }
+            reviewThreads {
+              totalCount
+            }
+          }
+        }
+      }
+    }
+    """
+
+    THREADS_QUERY = """
+    query ($ids: [ID!]!, $threadFirst: Int = 50, $commentFirst: Int = 50) {""" + RATE_LIMIT_SELECTION + """
+      nodes(ids: $ids) {
+        ... on PullRequest {
+          number
+          title
+          updatedAt
+          repository {
+            name
+            owner {
+              login
+            }
+          }
+          reviewThreads(first: $threadFirst) {
+            totalCount
+            nodes {
+              comments(first: $commentFirst) {
+                totalCount
+                nodes {""" + REVIEW_COMMENT_FIELDS + """
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+    """
+
+    def requests(self, username, state, all_comments, limit, get_all_historical):
+        progress = state.setdefault(self.state_key, {
+            "after": None, "listed_all": False, "pending": [],
+            "since": state.get("watermark") if self.incremental else None,
+        })
+        variables = {"login": username, "first": self.PR_IDS_PAGE_SIZE}
+        if self.incremental:
+            variables["orderBy"] = {"field": "UPDATED_AT", "direction": "DESC"}
+
+        while len(all_comments) < limit:
+            if not progress["pending"]:
+                if progress["listed_all"]:
+                    self._complete(state, all_comments)
+                    return
+
+                # Phase 1: next page of PR IDs, keeping only PRs with review threads
+                data = yield self.PR_IDS_QUERY, {**variables, "after": progress["after"]}
+                user = self._user(data, username)
+                if user is None:
+                    return
+
+                pr_data = user["pullRequests"]
+                nodes = [pr for pr in pr_data.get("nodes", []) if pr]
+                since = progress["since"]
+                progress["pending"] = [
+                    [pr["id"], PullRequestCache.key(pr["repository"]["nameWithOwner"], pr["number"]), pr["updatedAt"]]
+                    for pr in nodes
+                    if pr["reviewThreads"]["totalCount"] > 0 and not (since and pr["updatedAt"] < since)
+                ]
+                progress["after"] = pr_data["pageInfo"]["endCursor"] or progress["after"]
+                # Incremental passes stop listing at PRs last updated before the watermark
+                reached_watermark = bool(since and nodes and nodes[-1]["updatedAt"] < since)
+                progress["listed_all"] = reached_watermark or not pr_data["pageInfo"]["hasNextPage"]
+                continue
+
+            # PRs another expert or an earlier run fetched since their last update come from the cache
+            pr_cache = self.crawler.pr_cache
+            if pr_cache:
+                cached = []
+                while progress["pending"] and len(all_comments) < limit:
+                    _, key, updated_at = progress["pending"][0]
+                    node = pr_cache.get("graphql", key)
+                    if node is None or node.get("updatedAt") != updated_at:
+                        break
+                    cached.append(node)
+                    progress["pending"].pop(0)
+                self.crawler._extract_comments(cached, username, state, all_comments, limit, get_all_historical)
+                if not progress["pending"]:
+                    continue
+
+            # Phase 2: threads of a batch of PRs, batch size adapting to cost like PR pages
+            batch = progress["pending"][:self.page_sizer.pr_first]
+            data = yield self.THREADS_QUERY, {
+                "ids": [node_id for node_id, _, _ in batch],
+                "threadFirst": self.page_sizer.thread_first,
+                "commentFirst": self.page_sizer.comment_first,
+            }
+
+            if is_oversized_query_error(data):
+                if self.page_sizer.shrink():
+                    continue
+                logger.error(f"Review thread query for {username} is too large even at minimum page size")
+                return
+
+            nodes = [node for node in data["data"].get("nodes") or [] if node]
+            self.page_sizer.record_page(nodes, (data["data"].get("rateLimit") or {}).get("cost"))
+            self.crawler._cache_pr_nodes(nodes)
+            self.crawler._extract_comments(nodes, username, state, all_comments, limit, get_all_historical)
+            progress["pending"] = progress["pending"][len(batch):]
+
+
+class PullRequestsStrategy(CrawlStrategy):
+    """
+    Walk the expert's PRs in creation order with the crawler's COMMENTS_QUERY.
+
+    The default crawl. Its cursor is the top-level "after" of the crawl state,
+    which batched first-page prefetches also advance.
+    """
+
+    name = "pull_requests"
+
+    def requests(self, username, state, all_comments, limit, get_all_historical):
+        while len(all_comments) < limit:
+            data = yield self.crawler.COMMENTS_QUERY, {"login": username, "after": state.get("after"), **self.page_sizer.variables()}
+
+            if is_oversized_query_error(data):
+                if self.page_sizer.shrink():
+                    continue
+                logger.error(f"Pull request query for {username} is too large even at minimum page size")
+                return
+
+            user = self._user(data, username)
+            if user is None:
+                return
+
+            pr_data = user["pullRequests"]
+            nodes = pr_data.get("nodes", [])
+            if not nodes:
+                # An empty first page means the expert only reviews others' PRs (or a bad token)
+                self.needs_rest = not state.get("after")
+                return
+            state["after"] = pr_data["pageInfo"]["endCursor"] or state.get("after")
+
+            self.page_sizer.record_page(nodes, (data["data"].get("rateLimit") or {}).get("cost"))
+            self.crawler._extract_comments(nodes, username, state, all_comments, limit, get_all_historical)
+
+            if not pr_data["pageInfo"]["hasNextPage"]:
+                return
+
+
+class RecentPullRequestsStrategy(CrawlStrategy):
+    """
+    Walk the expert's PRs from the most recently updated one down to the watermark.
+
+    Runs the "pull_requests" crawl in incremental mode: PRs are ordered by
+    UPDATED_AT descending, and paging stops at the first page reaching PRs last
+    updated before the watermark, since those hold no newer comments.
+    """
+
+    name = "pull_requests"
+
+    QUERY = """
+    query ($login: String!, $after: String, $prFirst: Int = 50, $threadFirst: Int = 50, $commentFirst: Int = 50) {""" + RATE_LIMIT_SELECTION + """
+      user(login: $login) {
+        pullRequests(first: $prFirst, after: $after, orderBy: {field: UPDATED_AT, direction: DESC}) {
+          pageInfo {
+            endCursor
+            hasNextPage
+          }
+          nodes {
+            number
+            title
+            updatedAt
+            repository {
+              name
+              owner {
+                login
+              }
+            }
+            reviewThreads(first: $threadFirst) {
+              totalCount
+              nodes {
+                comments(first: $commentFirst) {
+                  totalCount
+                  nodes {""" + REVIEW_COMMENT_FIELDS + """
+                  }
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+    """
+
+    def requests(self, username, state, all_comments, limit, get_all_historical):
+        progress = state.setdefault(self.state_key, {"after": None, "since": state.get("watermark")})
+
+        while len(all_comments) < limit:
+            data = yield self.QUERY, {"login": username, "after": progress["after"], **self.page_sizer.variables()}
+
+            if is_oversized_query_error(data):
+                if self.page_sizer.shrink():
+                    continue
+                logger.error(f"Pull request query for {username} is too large even at minimum page size")
+                return
+
+            user = self._user(data, username)
+            if user is None:
+                return
+
+            pr_data = user["pullRequests"]
+            since = progress["since"]
+            nodes = [pr for pr in pr_data.get("nodes", []) if not (since and pr["updatedAt"] < since)]
+            self.page_sizer.record_page(nodes, (data["data"].get("rateLimit") or {}).get("cost"))
+            self.crawler._extract_comments(nodes, username, state, all_comments, limit, get_all_historical)
+
+            progress["after"] = pr_data["pageInfo"]["endCursor"] or progress["after"]
+            if len(nodes) < len(pr_data.get("nodes", [])) or not pr_data["pageInfo"]["hasNextPage"]:
+                self._complete(state, all_comments)
+                return
+
+
+class TimeSlicedStrategy(CrawlStrategy):
+    """
+    Split the expert's history into date windows crawled in parallel.
+
+    PRs the expert commented on are found with GraphQL search restricted to a
+    created: range (updated: when incremental). Windows are halved until each
+    matches at most SEARCH_RESULT_CAP PRs, the most a search returns, then split
+    further until there is one per worker. requests() only plans the windows;
+    the crawler runs window_requests() for each of them on its own token and
+    merges their comments through the shared dedup set.
+    """
+
+    name = "time_sliced"
+    parallel = True
+
+    # GitHub search stops returning results after this many matches
+    SEARCH_RESULT_CAP = 1000
+    # Oldest date worth searching (GitHub's launch)
+    HISTORY_START = "2008-01-01T00:00:00Z"
+
+    COUNT_QUERY = """
+    query ($query: String!) {""" + RATE_LIMIT_SELECTION + """
+      search(query: $query, type: ISSUE, first: 1) {
+        issueCount
+      }
+    }
+    """
+
+    SEARCH_QUERY = """
+    query ($query: String!, $after: String, $prFirst: Int = 50, $threadFirst: Int = 50, $commentFirst: Int = 50) {""" + RATE_LIMIT_SELECTION + """
+      search(query: $query, type: ISSUE, first: $prFirst, after: $after) {
+        pageInfo {
+          endCursor
+          hasNextPage
+        }
+        nodes {
+          ... on PullRequest {
+            number
+            title
+            updatedAt
+            repository {
+              name
+              owner {
+                login
+              }
+            }
+            reviewThreads(first: $threadFirst) {
+              totalCount
+              nodes {
+                comments(first: $commentFirst) {
+                  totalCount
+                  nodes {""" + REVIEW_COMMENT_FIELDS + """
+                  }
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+    """
+
+    def __init__(self, crawler, incremental=False, workers=None):
+        """
+        Args:
+            crawler (GitHubCommentCrawler): Crawler providing comment extraction
+            incremental (bool): Only crawl activity newer than the watermark
+            workers (int, optional): Windows crawled at once, defaults to TIME_SLICES
+                or the number of tokens
+        """
+        super().__init__(crawler, incremental)
+        self.workers = max(1, workers or int(os.getenv("TIME_SLICES", "0")) or len(crawler.github_tokens))
+        self.field = "updated" if incremental else "created"
+        # Each window pages on its own, so each gets its own page sizer
+        self.page_sizers = {}
+
+    def requests(self, username, state, all_comments, limit, get_all_historical):
+        progress = state.setdefault(self.state_key, {"windows": None, "probe": None})
+        if progress["windows"] is not None:
+            return
+
+        if progress["probe"] is None:
+            start = (state.get("watermark") if self.incremental else None) or self.HISTORY_START
+            progress["probe"] = [[start, _format_time(datetime.now(timezone.utc))]]
+            progress["planned"] = []
+
+        # Halve windows until none exceeds the search cap
+        while progress["probe"]:
+            window_from, window_to = progress["probe"][0]
+            data = yield self.COUNT_QUERY, {"query": self._search_query(username, window_from, window_to)}
+            count = data["data"]["search"]["issueCount"]
+            progress["probe"].pop(0)
+
+            halves = _split_window(window_from, window_to)
+            if count > self.SEARCH_RESULT_CAP and halves:
+                progress["probe"][:0] = halves
+            elif count:
+                if count > self.SEARCH_RESULT_CAP:
+                    logger.warning(f"{count} PRs of {username} within one second, only {self.SEARCH_RESULT_CAP} are reachable")
+                progress["planned"].append([window_from, window_to, count])
+
+        # Split the busiest windows until every worker has one
+        planned = progress.pop("planned")
+        while 0 < len(planned) < self.workers:
+            busiest = max(planned, key=lambda window: window[2])
+            halves = _split_window(busiest[0], busiest[1])
+            if busiest[2] < 2 or not halves:
+                break
+            planned.remove(busiest)
+            planned.extend([*half, busiest[2] / 2] for half in halves)
+
+        # Newest windows first, so a limited crawl gets recent comments
+        progress["windows"] = [
+            {"from": window_from, "to": window_to, "after": None, "done": False}
+            for window_from, window_to, _ in sorted(planned, reverse=True)
+        ]
+        progress["probe"] = None
+        logger.info(f"Split the history of {username} into {len(planned)} windows")
+        if not planned:
+            self._complete(state, all_comments)
+
+    def pending_windows(self, state):
+        """Indexes of the planned windows not crawled yet."""
+        windows = state.get(self.state_key, {}).get("windows") or []
+        return [index for index, window in enumerate(windows) if not window["done"]]
+
+    def window_requests(self, username, index, state, all_comments, limit, get_all_historical):
+        """
+        Yield the search pages of one window.
+
+        Args:
+            username (str): GitHub username
+            index (int): Window index from pending_windows()
+            state (dict): Crawl state shared by all windows
+            all_comments (list): Comments shared by all windows, extended in place
+            limit (int): Maximum number of comments to collect
+            get_all_historical (bool): Whether to get all historical comments
+        """
+        windows = state[self.state_key]["windows"]
+        window = windows[index]
+        page_sizer = self.page_sizers.setdefault(index, AdaptivePageSizer())
+        query = self._search_query(username, window["from"], window["to"])
+
+        while not window["done"] and len(all_comments) < limit:
+            data = yield self.SEARCH_QUERY, {"query": query, "after": window["after"], **page_sizer.variables()}
+
+            if is_oversized_query_error(data):
+                if page_sizer.shrink():
+                    continue
+                logger.error(f"Search query for {username} is too large even at minimum page size")
+                return
+
+            search = data["data"]["search"]
+            nodes = [pr for pr in search.get("nodes", []) if pr]
+            page_sizer.record_page(nodes, (data["data"].get("rateLimit") or {}).get("cost"))
+            self.crawler._extract_comments(nodes, username, state, all_comments, limit, get_all_historical)
+
+            window["after"] = search["pageInfo"]["endCursor"] or window["after"]
+            window["done"] = not search["pageInfo"]["hasNextPage"]
+
+        if all(window["done"] for window in windows):
+            self._complete(state, all_comments)
+
+    def _search_query(self, username, window_from, window_to):
+        """Search string for the PRs the expert commented on within a window."""
+        return f"is:pr commenter:{username} {self.field}:{window_from}..{window_to}"
+
+
+def _format_time(value):
+    """Format a datetime as used in GitHub search qualifiers."""
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _split_window(window_from, window_to):
+    """
+    Halve an inclusive time window into two non-overlapping windows.
+
+    Returns:
+        list: Two [from, to] windows, empty if the window spans a single second
+    """
+    start = datetime.strptime(window_from, "%Y-%m-%dT%H:%M:%SZ")
+    end = datetime.strptime(window_to, "%Y-%m-%dT%H:%M:%SZ")
+    if end <= start:
+        return []
+    middle = start + (end - start) / 2
+    middle = middle.replace(microsecond=0)
+    return [[window_from, _format_time(middle)], [_format_time(middle + timedelta(seconds=1)), window_to]]
+
+
+CRAWL_STRATEGIES = {
+    ReviewContributionsStrategy.name: ReviewContributionsStrategy,
+    TwoPhaseStrategy.name: TwoPhaseStrategy,
+    TimeSlicedStrategy.name: TimeSlicedStrategy,
+}
+
+
+def next_request(requests, data):
+    """
+    Send a response to a strategy generator and get its next request.
+
+    Args:
+        requests (generator): Generator returned by CrawlStrategy.requests
+        data (dict): Response to the previous request
+
+    Returns:
+        tuple: Next (query, variables), or None once the crawl is complete
+    """
+    try:
+        return requests.send(data)
+    except StopIteration:
+        return None
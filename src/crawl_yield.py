@@ -0,0 +1,116 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class YieldTracker:
+    """
+    Tracks how many valid comments an expert's crawl yields per API point.
+
+    GraphQL pages are charged their rateLimit cost and REST pages the requests
+    they sent; cached pages are free. Once the recent pages have spent at least
+    min_points and yield fewer than min_yield comments per point, the crawl
+    should stop so the quota goes to experts that actually review. Totals are
+    kept in the crawl state under "yield", so they survive resumed crawls and
+    can be reported per expert.
+    """
+
+    def __init__(self, state, min_yield=None, window=None, min_points=None):
+        """
+        Initialize the tracker.
+
+        Args:
+            state (dict): Crawl state receiving the "yield" summary
+            min_yield (float): Valid comments per point below which the crawl stops, 0 to never stop
+            window (int): Number of recent pages the expected yield is based on
+            min_points (int): Points the recent pages must have spent before the crawl can be stopped
+        """
+        self.state = state
+        self.min_yield = min_yield if min_yield is not None else float(os.getenv("CRAWL_MIN_YIELD", "0.02"))
+        self.window = window or int(os.getenv("CRAWL_YIELD_WINDOW", "10"))
+        self.min_points = min_points if min_points is not None else int(os.getenv("CRAWL_YIELD_MIN_POINTS", "50"))
+        self.stopped = False
+        self._recent = []
+        self._partial = (0, 0)
+
+        totals = state.get("yield") or {}
+        self.pages = totals.get("pages", 0)
+        self.points = totals.get("points", 0)
+        self.comments = totals.get("comments", 0)
+
+    def record_page(self, comments, cost):
+        """
+        Record one fetched page.
+
+        Args:
+            comments (int): Valid comments the page added
+            cost (int): Points the page cost, None or 0 if it was served from a cache
+        """
+        cost = cost or 0
+        self.pages += 1
+        self.points += cost
+        self.comments += comments
+        self._recent = (self._recent + [(comments, cost)])[-self.window:]
+        self.state["yield"] = self.summary()
+
+    def record_step(self, comments, cost, end_of_page):
+        """
+        Record part of a page fetched over several steps, e.g. one REST PR at a time.
+
+        Args:
+            comments (int): Valid comments the step added
+            cost (int): Points the step cost
+            end_of_page (bool): Whether the step completed the page
+        """
+        self._partial = (self._partial[0] + comments, self._partial[1] + (cost or 0))
+        if end_of_page:
+            self.record_page(*self._partial)
+            self._partial = (0, 0)
+
+    def expected_yield(self):
+        """
+        Valid comments per point over the recent pages.
+
+        Returns:
+            float: Expected yield, None while no point was spent
+        """
+        points = sum(cost for _, cost in self._recent)
+        if not points:
+            return None
+        return sum(comments for comments, _ in self._recent) / points
+
+    def should_stop(self):
+        """
+        Check whether the crawl has fallen below the yield threshold.
+
+        Returns:
+            bool: True once the crawl should stop; stays True afterwards
+        """
+        if self.stopped or not self.min_yield:
+            return self.stopped
+
+        expected = self.expected_yield()
+        if sum(cost for _, cost in self._recent) >= self.min_points and expected < self.min_yield:
+            logger.info(f"Stopping crawl: yield {expected:.3f} comments per point is below {self.min_yield}")
+            self.stopped = True
+            self.state["yield"] = self.summary()
+        return self.stopped
+
+    def summary(self):
+        """
+        Totals of the crawl.
+
+        Returns:
+            dict: pages, points, comments, yield (comments per point) and stopped
+        """
+        return {
+            "pages": self.pages,
+            "points": self.points,
+            "comments": self.comments,
+            "yield": round(self.comments / self.points, 4) if self.points else None,
+            "stopped": self.stopped,
+        }
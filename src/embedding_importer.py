@@ -12,12 +12,14 @@ import logging
 import argparse
 from pathlib import Path
 from typing import List, Dict, Any
-import time
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 import uuid
 import hashlib
+from adaptive_concurrency import AdaptiveLimiter
+from retry import RetryPolicy, openai_retry, qdrant_retry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -29,7 +31,7 @@ class CommentEmbedder:
     
     def __init__(self, openai_api_key=None, embedding_model="text-embedding-3-small", 
                  qdrant_url="http://localhost:6333", qdrant_api_key=None, 
-                 batch_size=100, rate_limit_delay=0.1):
+                 batch_size=100, limiter=None, retry=None, qdrant_retry_policy=None):
         """
         Initialize embedder with API keys and connection settings.
         
@@ -39,17 +41,22 @@ class CommentEmbedder:
             qdrant_url (str): URL to Qdrant server
             qdrant_api_key (str): API key for Qdrant authentication
             batch_size (int): Number of vectors to upload in each batch
-            rate_limit_delay (float): Delay between API calls in seconds
+            limiter (AdaptiveLimiter, optional): In-flight OpenAI request limit, defaults to the shared one
+            retry (RetryPolicy, optional): OpenAI retry policy, defaults to the shared one
+            qdrant_retry_policy (RetryPolicy, optional): Qdrant retry policy, defaults to the shared one
         """
         # Initialize OpenAI client
         self.openai_api_key = openai_api_key
         if not self.openai_api_key:
             raise ValueError("OpenAI API key not found. Please provide via parameter or OPENAI_API_KEY environment variable")
         
-        self.openai_client = OpenAI(api_key=self.openai_api_key)
+        # Retries are left to the retry policies
+        self.openai_client = OpenAI(api_key=self.openai_api_key, max_retries=0)
         self.embedding_model = embedding_model
         self.batch_size = batch_size
-        self.rate_limit_delay = rate_limit_delay
+        self.limiter = limiter or AdaptiveLimiter.from_env("openai")
+        self.retry = retry or RetryPolicy.from_env("openai")
+        self.qdrant_retry = qdrant_retry_policy or RetryPolicy.from_env("qdrant")
         
         # Initialize Qdrant client with API key authentication
         if qdrant_api_key:
@@ -90,16 +97,37 @@ class CommentEmbedder:
         Returns:
             list: Embedding vector or None if error occurs
         """
+        def attempt():
+            try:
+                with self.limiter.slot():
+                    response = self.openai_client.embeddings.create(
+                        model=self.embedding_model,
+                        input=text
+                    )
+            except Exception as e:
+                self.limiter.record_openai_error(e)
+                raise
+            self.limiter.record_success()
+            return response
+        
         try:
-            response = self.openai_client.embeddings.create(
-                model=self.embedding_model,
-                input=text
-            )
-            return response.data[0].embedding
+            return self.retry.call(attempt, openai_retry).data[0].embedding
         except Exception as e:
             logger.error(f"Error creating embedding: {e}")
             return None  # Return None instead of raising exception
     
+    def _qdrant_call(self, method, *args, **kwargs):
+        """
+        Call a Qdrant client method, retrying rate limits, server and network errors.
+        
+        Args:
+            method (callable): Bound QdrantClient method
+            
+        Returns:
+            Result of the method
+        """
+        return self.qdrant_retry.call(lambda: method(*args, **kwargs), qdrant_retry)
+    
     def create_collection(self, collection_name: str, vector_size: int = 1536):
         """
         Create a Qdrant collection for storing embeddings.
@@ -110,7 +138,7 @@ class CommentEmbedder:
         """
         try:
             # Check if collection already exists
-            collections = self.qdrant_client.get_collections().collections
+            collections = self._qdrant_call(self.qdrant_client.get_collections).collections
             collection_names = [collection.name for collection in collections]
             
             if collection_name in collection_names:
@@ -118,7 +146,8 @@ class CommentEmbedder:
                 return
             
             # Create the collection
-            self.qdrant_client.create_collection(
+            self._qdrant_call(
+                self.qdrant_client.create_collection,
                 collection_name=collection_name,
                 vectors_config=models.VectorParams(
                     size=vector_size,
@@ -172,6 +201,19 @@ class CommentEmbedder:
             logger.error(f"Error loading comments: {e}")
             return
         
+        self.upload_comments(comments, collection_name, expert_name)
+    
+    def upload_comments(self, comments: List[Dict[str, Any]], collection_name: str, expert_name: str = None):
+        """
+        Create embeddings for comments and upload them to Qdrant.
+        
+        Points are keyed by comment URL, so uploading a comment again updates it.
+        
+        Args:
+            comments (list): Comments to embed
+            collection_name (str): Name of the Qdrant collection
+            expert_name (str, optional): Name of the expert who wrote the comments
+        """
         # Add expert_name to each comment if not already present
         for comment in comments:
             if expert_name and 'expert_name' not in comment:
@@ -190,56 +232,53 @@ class CommentEmbedder:
         batch_points = []
         skipped_comments = 0
         
-        for i, comment in enumerate(comments):
-            # Generate a deterministic UUID based on comment content
-            # This ensures the same comment always gets the same ID
-            
-            # Create a unique string based on available fields
-            unique_string = ""
-            if 'comment_url' in comment and comment['comment_url']:
-                unique_string = comment['comment_url']
-            else:
-                # Create a unique string from multiple fields if URL isn't available
-                unique_string = f"{comment.get('repo', '')}-{comment.get('pr_number', '')}-{comment.get('created_at', '')}-{i}"
-            
-            # Create a deterministic UUID from the unique string
-            hash_bytes = hashlib.md5(unique_string.encode('utf-8')).digest()
-            comment_id = str(uuid.UUID(bytes=hash_bytes[:16]))
-            
-            logger.debug(f"Generated UUID for comment {i}: {comment_id} from {unique_string}")
-            
-            # Prepare text and create embedding
-            text = self.prepare_text_for_embedding(comment, expert_name)
-            
-            embedding = self.create_embedding(text)
-            
-            # Skip this comment if embedding failed (too long, etc.)
-            if embedding is None:
-                skipped_comments += 1
-                logger.warning(f"Skipping comment {i+1}/{total_comments} (too long or error occurred)")
-                continue
-            
-            # Prepare point for Qdrant
-            point = models.PointStruct(
-                id=comment_id,  # UUID-based ID
-                vector=embedding,
-                payload=comment
-            )
-            
-            batch_points.append(point)
-            
-            # Upload batch if it reaches batch size or is the last item
-            if len(batch_points) >= self.batch_size or i == total_comments - 1:
-                if batch_points:  # Only upload if we have points
-                    self.qdrant_client.upsert(
-                        collection_name=collection_name,
-                        points=batch_points
-                    )
-                    logger.info(f"Uploaded batch of {len(batch_points)} vectors to Qdrant ({i+1}/{total_comments})")
-                batch_points = []
-            
-            # Add delay to avoid rate limiting
-            time.sleep(self.rate_limit_delay)
+        # Embed comments concurrently, as many at a time as the limiter allows; results come back in order
+        texts = [self.prepare_text_for_embedding(comment, expert_name) for comment in comments]
+        with ThreadPoolExecutor(max_workers=self.limiter.maximum) as executor:
+            embeddings = executor.map(self.create_embedding, texts)
+            for i, (comment, embedding) in enumerate(zip(comments, embeddings)):
+                # Generate a deterministic UUID based on comment content
+                # This ensures the same comment always gets the same ID
+                
+                # Create a unique string based on available fields
+                unique_string = ""
+                if 'comment_url' in comment and comment['comment_url']:
+                    unique_string = comment['comment_url']
+                else:
+                    # Create a unique string from multiple fields if URL isn't available
+                    unique_string = f"{comment.get('repo', '')}-{comment.get('pr_number', '')}-{comment.get('created_at', '')}-{i}"
+                
+                # Create a deterministic UUID from the unique string
+                hash_bytes = hashlib.md5(unique_string.encode('utf-8')).digest()
+                comment_id = str(uuid.UUID(bytes=hash_bytes[:16]))
+                
+                logger.debug(f"Generated UUID for comment {i}: {comment_id} from {unique_string}")
+                
+                # Skip this comment if embedding failed (too long, etc.)
+                if embedding is None:
+                    skipped_comments += 1
+                    logger.warning(f"Skipping comment {i+1}/{total_comments} (too long or error occurred)")
+                    continue
+                
+                # Prepare point for Qdrant
+                point = models.PointStruct(
+                    id=comment_id,  # UUID-based ID
+                    vector=embedding,
+                    payload=comment
+                )
+                
+                batch_points.append(point)
+                
+                # Upload batch if it reaches batch size or is the last item
+                if len(batch_points) >= self.batch_size or i == total_comments - 1:
+                    if batch_points:  # Only upload if we have points
+                        self._qdrant_call(
+                            self.qdrant_client.upsert,
+                            collection_name=collection_name,
+                            points=batch_points
+                        )
+                        logger.info(f"Uploaded batch of {len(batch_points)} vectors to Qdrant ({i+1}/{total_comments})")
+                    batch_points = []
         
         if skipped_comments > 0:
             logger.warning(f"Skipped {skipped_comments} comments due to length or errors")
@@ -265,8 +304,6 @@ def main():
                         help="Qdrant API key for authentication")
     parser.add_argument("--batch-size", type=int, default=100,
                         help="Batch size for Qdrant uploads")
-    parser.add_argument("--delay", type=float, default=0.1,
-                        help="Delay between API calls in seconds")
     
     args = parser.parse_args()
     
@@ -277,8 +314,7 @@ def main():
             embedding_model=args.model,
             qdrant_url=args.qdrant_url,
             qdrant_api_key=args.qdrant_key,
-            batch_size=args.batch_size,
-            rate_limit_delay=args.delay
+            batch_size=args.batch_size
         )
         
         embedder.process_and_upload(
@@ -2,59 +2,122 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import asyncio
 import logging
 from github_api import GitHubAPI
 import argparse
 import json
 import os
 from restapi_expert_finder import RestAPIExpertFinder
+from async_github_api import AsyncGitHubAPI
+from token_pool import TokenPool, leases_token
+from graphql_cache import GraphQLResponseCache
 
 logger = logging.getLogger(__name__)
 
 class GitHubExpertFinder:
     """Class for finding and ranking GitHub experts by language."""
     
-    def __init__(self, github_tokens):
+    def __init__(self, github_tokens, token_pool=None, graphql_cache=None):
         """
-        Initialize with GitHub token(s).
+        Initialize the expert finder with one or multiple GitHub tokens.
         
         Args:
             github_tokens (str or list): A single GitHub token or a list of tokens
+            token_pool (TokenPool, optional): Shared pool leasing tokens to concurrent workers
+            graphql_cache (GraphQLResponseCache, optional): Response cache for GraphQL pages,
+                defaults to GRAPHQL_CACHE settings
         """
         # Handle both single token and list of tokens
         if isinstance(github_tokens, str):
             self.github_tokens = [github_tokens]
         else:
             self.github_tokens = github_tokens
-            
-        self.current_token_index = 0
-        self.api = GitHubAPI(self.github_tokens[0])
         
-        # Initialize REST finder with first token
-        self.rest_finder = RestAPIExpertFinder(self.github_tokens[0])
+        # Every thread or asyncio task leases its own token from the pool
+        self.token_pool = token_pool or TokenPool(self.github_tokens)
+        self.graphql_cache = graphql_cache or GraphQLResponseCache.from_env()
+    
+    @property
+    def api(self):
+        """GraphQL client bound to the current worker's token."""
+        return self.token_pool.client(GitHubAPI, cache=self.graphql_cache)
+    
+    @property
+    def async_api(self):
+        """Asyncio client bound to the current worker's token."""
+        return self.token_pool.client(AsyncGitHubAPI, cache=self.graphql_cache)
+    
+    @property
+    def rest_finder(self):
+        """REST API fallback bound to the current worker's token."""
+        return self.token_pool.client(RestAPIExpertFinder)
+    
+    @property
+    def current_token_index(self):
+        """Index of the current worker's token."""
+        return self.token_pool.current_index()
     
     def rotate_token(self):
         """
-        Rotate to the next available GitHub token.
+        Rotate the current worker to the token with the most remaining budget.
+        
+        Other workers keep their tokens, so concurrent rotations don't race.
         
         Returns:
             bool: True if successfully rotated to a new token, False if all tokens are exhausted
         """
-        if len(self.github_tokens) <= 1:
+        if not self.token_pool.rotate():
             # Only one token available, can't rotate
             return False
-            
-        # Move to next token
-        self.current_token_index = (self.current_token_index + 1) % len(self.github_tokens)
-        new_token = self.github_tokens[self.current_token_index]
-        
-        # Update API instances with new token
-        self.api = GitHubAPI(new_token)
-        self.rest_finder = RestAPIExpertFinder(new_token)
         
         logger.info(f"Rotated to GitHub token {self.current_token_index + 1}/{len(self.github_tokens)}")
         return True
         
+    # GraphQL query to find users - using contributionsCollection for PR reviews
+    EXPERTS_QUERY = """
+    query($queryString: String!, $after: String) {
+      rateLimit {
+        cost
+        remaining
+        resetAt
+      }
+      search(query: $queryString, type: USER, first: 10, after: $after) {
+        pageInfo {
+          endCursor
+          hasNextPage
+        }
+        edges {
+          node {
+            ... on User {
+              login
+              followers {
+                totalCount
+              }
+              repositories(first: 50, isFork: false, ownerAffiliations: OWNER) {
+                nodes {
+                  stargazerCount
+                  primaryLanguage {
+                    name
+                  }
+                }
+              }
+              pullRequests(first: 50) {
+                totalCount
+              }
+              contributionsCollection {
+                pullRequestReviewContributions {
+                  totalCount
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+    """
+
+    @leases_token
     def find_experts(self, language, max_users=30, use_rest_api=False):
         """
         Find and rank experts by programming language.
@@ -83,43 +146,6 @@ class GitHubExpertFinder:
                 after_cursor = None
                 fetched = 0
                 
-                # GraphQL query to find users - using contributionsCollection for PR reviews
-                query = """
-                query($queryString: String!, $after: String) {
-                  search(query: $queryString, type: USER, first: 10, after: $after) {
-                    pageInfo {
-                      endCursor
-                      hasNextPage
-                    }
-                    edges {
-                      node {
-                        ... on User {
-                          login
-                          followers {
-                            totalCount
-                          }
-                          repositories(first: 50, isFork: false, ownerAffiliations: OWNER) {
-                            nodes {
-                              stargazerCount
-                              primaryLanguage {
-                                name
-                              }
-                            }
-                          }
-                          pullRequests(first: 50) {
-                            totalCount
-                          }
-                          contributionsCollection {
-                            pullRequestReviewContributions {
-                              totalCount
-                            }
-                          }
-                        }
-                      }
-                    }
-                  }
-                }
-                """
                 round = 0
                 while fetched < max_users:
                     print(f"Round {round}")
@@ -128,7 +154,7 @@ class GitHubExpertFinder:
                     query_string = f"{language}"
                     variables = {"queryString": query_string, "after": after_cursor}
                     
-                    data = self.api.graphql_query(query, variables)
+                    data = self.api.graphql_query(self.EXPERTS_QUERY, variables)
                     
                     # Check for network errors and rotate token if needed
                     if isinstance(data, dict) and "error" in data:
@@ -138,9 +164,6 @@ class GitHubExpertFinder:
                             if self.rotate_token():
                                 logger.info(f"Rotated to token {self.current_token_index + 1}/{len(self.github_tokens)}")
                                 token_rotation_attempts += 1
-                                # Short wait before retrying
-                                import time
-                                time.sleep(2)
                                 continue
                             else:
                                 logger.error("No more tokens available to rotate to")
@@ -154,28 +177,13 @@ class GitHubExpertFinder:
                         if self.rotate_token():
                             logger.info(f"Rotated to token {self.current_token_index + 1}/{len(self.github_tokens)}")
                             token_rotation_attempts += 1
-                            import time
-                            time.sleep(2)
                             continue
                         else:
                             # Fall back to REST API if rotation fails
                             logger.warning("Token rotation failed, falling back to REST API")
                             return self.rest_finder.find_experts(language, max_users)
                         
-                    users = data['data']['search']['edges']
-                    for user in users:
-                        if user['node'] == {}:
-                            continue
-                            
-                        user_info = self._extract_user_data(user['node'], language)
-                        if user_info['score'] == 0:
-                            continue
-                        results.append(user_info)
-
-                        fetched += 1
-                        
-                        if fetched >= max_users:
-                            break
+                    fetched += self._collect_search_page(data, language, results, max_users - fetched)
                             
                     # Check for next page
                     if not data['data']['search']['pageInfo']['hasNextPage']:
@@ -225,6 +233,91 @@ class GitHubExpertFinder:
         logger.warning("All token rotation attempts exhausted, falling back to REST API")
         return self.rest_finder.find_experts(language, max_users)
     
+    @leases_token
+    async def find_experts_async(self, language, max_users=30, use_rest_api=False):
+        """
+        Find and rank experts by programming language without blocking the event loop.
+        
+        Same behaviour as find_experts, but GraphQL pages are fetched with the asyncio
+        client. The REST fallback still runs in a worker thread.
+        
+        Args:
+            language (str): Programming language (Python, JavaScript,...)
+            max_users (int): Maximum number of users to find
+            use_rest_api (bool): Force using REST API instead of GraphQL
+            
+        Returns:
+            list: List of ranked users
+        """
+        if use_rest_api:
+            logger.info(f"Using REST API for finding {language} experts as requested")
+            return await asyncio.to_thread(self.rest_finder.find_experts, language, max_users)
+        
+        token_rotation_attempts = 0
+        max_token_rotations = len(self.github_tokens)
+        max_rounds = int(os.getenv("MAX_ROUND", "10"))
+        
+        logger.info(f"Finding {language} experts using GraphQL...")
+        results = []
+        after_cursor = None
+        fetched = 0
+        round = 0
+        
+        while fetched < max_users:
+            variables = {"queryString": f"{language}", "after": after_cursor}
+            data = await self.async_api.graphql_query(self.EXPERTS_QUERY, variables)
+            
+            if not data or "error" in data or 'data' not in data or not data['data'].get('search'):
+                logger.warning(f"No valid data received from API: {data.get('error') if data else 'empty response'}")
+                if token_rotation_attempts < max_token_rotations and self.rotate_token():
+                    token_rotation_attempts += 1
+                    continue
+                logger.warning("Token rotation failed, falling back to REST API")
+                return await asyncio.to_thread(self.rest_finder.find_experts, language, max_users)
+            
+            fetched += self._collect_search_page(data, language, results, max_users - fetched)
+            
+            # Check for next page
+            if not data['data']['search']['pageInfo']['hasNextPage']:
+                break
+            
+            after_cursor = data['data']['search']['pageInfo']['endCursor']
+            round += 1
+            
+            if round >= max_rounds:
+                break
+        
+        return sorted(results, key=lambda x: x['score'], reverse=True)
+    
+    def _collect_search_page(self, data, language, results, remaining):
+        """
+        Score the users of one search page and append those with a non-zero score.
+        
+        Args:
+            data (dict): GraphQL search response
+            language (str): Target language
+            results (list): Collected users, extended in place
+            remaining (int): Maximum number of users to add
+            
+        Returns:
+            int: Number of users added
+        """
+        added = 0
+        for user in data['data']['search']['edges']:
+            if added >= remaining:
+                break
+            
+            if user['node'] == {}:
+                continue
+                
+            user_info = self._extract_user_data(user['node'], language)
+            if user_info['score'] == 0:
+                continue
+            results.append(user_info)
+            added += 1
+        
+        return added
+    
     def _extract_user_data(self, node, target_language):
         """
         Extract and calculate score for a user.
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Read review comments of tracked experts from local GH Archive files instead of the API.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import glob
+import gzip
+import json
+import logging
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+logger = logging.getLogger(__name__)
+
+# Only lines containing this are JSON-decoded; GH Archive lines are compact JSON
+EVENT_MARKER = b'"PullRequestReviewCommentEvent"'
+
+# GH Archive hour files are named YYYY-MM-DD-H.json.gz, without zero-padded hours
+ARCHIVE_NAME = re.compile(r"(\d{4})-(\d{2})-(\d{2})-(\d{1,2})\.json\.gz$")
+
+
+def archive_sort_key(path):
+    """Sort key putting GH Archive hour files in chronological order."""
+    match = ARCHIVE_NAME.search(os.path.basename(path))
+    if not match:
+        return (os.path.basename(path),)
+    year, month, day, hour = match.groups()
+    return (f"{year}-{month}-{day}", int(hour))
+
+
+def find_archives(pattern):
+    """
+    List GH Archive files in chronological order.
+
+    Args:
+        pattern (str): Directory holding .json.gz files, or a glob pattern
+
+    Returns:
+        list: Paths of the archive files
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.json.gz")
+    return sorted(glob.glob(pattern), key=archive_sort_key)
+
+
+def review_comment_record(payload, repo):
+    """
+    Convert a pull_request_review_comment payload into the comment record the crawlers produce.
+
+    GH Archive events and webhook deliveries carry the same payload.
+
+    Args:
+        payload (dict): Event payload with comment and pull_request
+        repo (str): Repository as owner/name
+
+    Returns:
+        dict: Comment record, None if the payload lacks the comment or PR
+    """
+    comment = payload.get("comment") or {}
+    pull_request = payload.get("pull_request") or {}
+    if not comment or not pull_request.get("number"):
+        return None
+
+    return {
+        "repo": repo,
+        "pr_number": pull_request["number"],
+        "pr_title": pull_request.get("title"),
+        "file_path": comment.get("path"),
+        "comment": comment.get("body", ""),
+        "diff_context": comment.get("diff_hunk"),
+        "created_at": comment.get("created_at"),
+        "updated_at": comment.get("updated_at"),
+        "comment_url": comment.get("html_url"),
+    }
+
+
+def parse_archive(path, usernames):
+    """
+    Collect the review comments of tracked users from one archive file.
+
+    Runs in a worker process, so it only takes and returns plain data.
+
+    Args:
+        path (str): GH Archive .json.gz file
+        usernames (frozenset): Lowercase usernames to keep comments of
+
+    Returns:
+        tuple: (path, dict lowercase username -> comment records, error message or None)
+    """
+    results = {}
+    try:
+        with gzip.open(path, "rb") as f:
+            for line in f:
+                if EVENT_MARKER not in line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if event.get("type") != "PullRequestReviewCommentEvent":
+                    continue
+
+                comment = (event.get("payload") or {}).get("comment") or {}
+                login = ((comment.get("user") or event.get("actor") or {}).get("login") or "").lower()
+                if login not in usernames:
+                    continue
+
+                record = review_comment_record(event.get("payload") or {}, (event.get("repo") or {}).get("name"))
+                if record and record["comment_url"]:
+                    results.setdefault(login, []).append(record)
+    except (OSError, EOFError) as e:
+        # Truncated downloads end in EOFError; what was read so far is still usable
+        return path, results, str(e)
+    return path, results, None
+
+
+def read_archives(paths, usernames, workers=None):
+    """
+    Decompress and filter archive files across a process pool.
+
+    Args:
+        paths (list): Archive files
+        usernames (iterable): GitHub usernames to keep comments of
+        workers (int): Worker processes, defaults to GHARCHIVE_WORKERS or the CPU count
+
+    Yields:
+        tuple: (path, dict username -> comment records, error message or None), in the order of paths
+    """
+    tracked = {username.lower(): username for username in usernames}
+    workers = workers or int(os.getenv("GHARCHIVE_WORKERS", "0")) or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=min(workers, max(1, len(paths)))) as executor:
+        for path, results, error in executor.map(parse_archive, paths, repeat(frozenset(tracked))):
+            yield path, {tracked[login]: records for login, records in results.items()}, error
+
+
+def main():
+    """Ingest GH Archive files into the comments of a language's experts."""
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Ingest review comments from local GH Archive files")
+    parser.add_argument("--archives", type=str, required=True,
+                        help="Directory of GH Archive .json.gz files or a glob pattern")
+    parser.add_argument("--language", type=str, required=True,
+                        help="Language whose experts.json lists the experts to ingest comments for")
+    parser.add_argument("--output-dir", type=str, default=os.getenv("OUTPUT_DIR", "data"),
+                        help="Pipeline data directory")
+    parser.add_argument("--comment-limit", type=int, default=int(os.getenv("COMMENT_LIMIT", "200")),
+                        help="Maximum comments per expert")
+    parser.add_argument("--workers", type=int,
+                        help="Worker processes (default: GHARCHIVE_WORKERS or the CPU count)")
+    args = parser.parse_args()
+
+    # Imported here, comment_crawler imports this module
+    from comment_crawler import GitHubCommentCrawler
+
+    language_dir = os.path.join(args.output_dir, args.language.lower())
+    with open(os.path.join(language_dir, "experts.json"), "r", encoding="utf-8") as f:
+        usernames = [expert["login"] for expert in json.load(f)]
+
+    # No API calls are made, so no token is needed
+    crawler = GitHubCommentCrawler([])
+    added = crawler.ingest_archives(
+        find_archives(args.archives),
+        output_files={
+            username: os.path.join(language_dir, "experts", username, "comments.json")
+            for username in usernames
+        },
+        limit=args.comment_limit,
+        state_file=os.path.join(language_dir, "gharchive_state.json"),
+        workers=args.workers
+    )
+    print(f"Added {added} comments for {len(usernames)} {args.language} experts")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
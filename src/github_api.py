@@ -4,6 +4,9 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import requests
 import logging
+from http_transport import get_transport
+from graphql_cache import GraphQLResponseCache
+from retry import RetryPolicy, github_retry
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, 
@@ -15,14 +18,22 @@ class GitHubAPI:
     
     GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
     
-    def __init__(self, token=None):
+    def __init__(self, token=None, transport=None, token_pool=None, cache=None, retry=None):
         """
         Initialize with GitHub token.
         
         Args:
             token (str): GitHub authentication token
+            transport (GitHubTransport, optional): HTTP transport, defaults to the shared pool
+            token_pool (TokenPool, optional): Pool to report the token's remaining budget to
+            cache (GraphQLResponseCache, optional): Response cache, defaults to GRAPHQL_CACHE settings
+            retry (RetryPolicy, optional): Retry policy, defaults to the shared GitHub one
         """
         self.token = token
+        self.transport = transport or get_transport()
+        self.token_pool = token_pool
+        self.cache = cache or GraphQLResponseCache.from_env()
+        self.retry = retry or RetryPolicy.from_env("github")
         self.headers = {
             "Authorization": f"Bearer {token}",
             "Accept": "application/vnd.github.v3+json",
@@ -52,19 +63,44 @@ class GitHubAPI:
         if not self.token:
             logger.error("No GitHub token provided")
             return {}
+        
+        if self.cache:
+            cached = self.cache.get(query, variables)
+            if cached is not None:
+                return cached
             
         try:
-            response = requests.post(
-                self.GITHUB_GRAPHQL_URL,
-                json={"query": query, "variables": variables},
-                headers=self.headers
-            )
+            def attempt():
+                if self.token_pool:
+                    self.token_pool.schedule(self.token, "graphql")
+                response = self.transport.post(
+                    self.GITHUB_GRAPHQL_URL,
+                    json={"query": query, "variables": variables},
+                    headers=self.headers
+                )
+                if self.token_pool:
+                    self.token_pool.record_headers(self.token, response.headers)
+                return response
+            
+            # Network errors, 500/503 and secondary rate limits are retried; a query that timed
+            # out on the server would only time out again, and exhausted tokens are rotated by callers
+            response = self.retry.call(attempt, github_retry(retry_statuses=(500, 503), wait_for_reset=False))
+            
+            # GitHub answers queries that run out of time with 502/504
+            if response.status_code in (502, 504):
+                logger.warning(f"GraphQL query timed out on the server: {response.status_code}")
+                return {"error": "server_timeout"}
             
             if response.status_code != 200:
                 logger.error(f"API Error: {response.status_code}, {response.text}")
                 return {}
                 
-            return response.json()
+            result = response.json()
+            if self.token_pool and isinstance(result.get("data"), dict):
+                self.token_pool.record_graphql_rate_limit(self.token, result["data"].get("rateLimit"))
+            if self.cache:
+                self.cache.set(query, variables, result)
+            return result
         except requests.exceptions.ConnectionError as e:
             logger.error(f"Network connection error: {e}")
             return {"error": "connection_error"}
@@ -0,0 +1,79 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# GitHub rejects queries that could return more nodes than this
+MAX_NODES_PER_QUERY = 500000
+
+RATE_LIMIT_SELECTION = """
+  rateLimit {
+    cost
+    remaining
+    resetAt
+  }"""
+
+
+def build_aliased_user_query(logins, selection, variable_definitions="", fragments=""):
+    """
+    Build one GraphQL document that runs the same selection for several users.
+
+    Each user is queried under its own alias (u0, u1, ...) with its login passed
+    as a variable, so logins never need escaping.
+
+    Args:
+        logins (list): GitHub usernames
+        selection (str): Selection set applied to each user, e.g. "{ ...PullRequestPage }"
+        variable_definitions (str): Extra shared variable definitions, e.g. "$after: String"
+        fragments (str): Fragment definitions used by the selection
+
+    Returns:
+        tuple: (query string, variables dict, dict of alias -> login)
+    """
+    aliases = {f"u{index}": login for index, login in enumerate(logins)}
+    definitions = [f"$login{index}: String!" for index in range(len(logins))]
+    if variable_definitions:
+        definitions.append(variable_definitions)
+
+    fields = "\n".join(
+        f"  {alias}: user(login: $login{index}) {selection}"
+        for index, alias in enumerate(aliases)
+    )
+    query = f"query ({', '.join(definitions)}) {{{RATE_LIMIT_SELECTION}\n{fields}\n}}\n{fragments}"
+    variables = {f"login{index}": login for index, login in enumerate(logins)}
+    return query, variables, aliases
+
+
+def split_aliased_response(data, aliases):
+    """
+    Map an aliased response back to usernames.
+
+    Users that could not be resolved (renamed, deleted) come back as None and are
+    left out, while the other aliases of a partially failed response are kept.
+
+    Args:
+        data (dict): Response returned by graphql_query
+        aliases (dict): alias -> login mapping from build_aliased_user_query
+
+    Returns:
+        dict: login -> user data
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("data"), dict):
+        return {}
+
+    if "errors" in data:
+        logger.warning(f"Batched GraphQL query returned partial errors: {data['errors']}")
+
+    return {
+        login: data["data"][alias]
+        for alias, login in aliases.items()
+        if data["data"].get(alias)
+    }
+
+
+def chunked(items, size):
+    """Split a list into consecutive chunks of at most size items."""
+    return [items[start:start + size] for start in range(0, len(items), size)]
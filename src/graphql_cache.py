@@ -0,0 +1,182 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import hashlib
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class GraphQLResponseCache:
+    """On-disk GraphQL response cache keyed by query text and variables, with TTL and size-bounded eviction."""
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, cache_dir, ttl=86400, max_bytes=500 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): Directory holding cached responses
+            ttl (int): Seconds a response stays valid
+            max_bytes (int): Total cache size above which the least recently used entries are evicted
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(entry[1] for entry in self._entries())
+
+    @classmethod
+    def from_env(cls):
+        """
+        Get the shared cache configured by GRAPHQL_CACHE / GRAPHQL_CACHE_DIR.
+
+        Returns:
+            GraphQLResponseCache: Shared cache, or None if caching is disabled
+        """
+        if os.getenv("GRAPHQL_CACHE", "false").lower() != "true":
+            return None
+
+        cache_dir = os.getenv("GRAPHQL_CACHE_DIR") or os.path.join(os.getenv("OUTPUT_DIR", "data"), ".graphql_cache")
+        with cls._instances_lock:
+            if cache_dir not in cls._instances:
+                cls._instances[cache_dir] = cls(
+                    cache_dir,
+                    ttl=int(os.getenv("GRAPHQL_CACHE_TTL", "86400")),
+                    max_bytes=int(float(os.getenv("GRAPHQL_CACHE_MAX_MB", "500")) * 1024 * 1024)
+                )
+            return cls._instances[cache_dir]
+
+    def _path(self, query, variables):
+        """Cache file for a query and its variables."""
+        normalized_query = " ".join(query.split())
+        key_source = json.dumps({"query": normalized_query, "variables": variables}, sort_keys=True)
+        key = hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _entries(self):
+        """Yield (path, size, last access time, write time) for every cache file."""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, max(stat.st_atime, stat.st_mtime), stat.st_mtime
+
+    def get(self, query, variables):
+        """
+        Get a cached response.
+
+        Args:
+            query (str): GraphQL query
+            variables (dict): Query variables
+
+        Returns:
+            dict: Cached response, or None if missing or expired
+        """
+        path = self._path(query, variables)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.misses += 1
+            return None
+
+        if time.time() - stat.st_mtime > self.ttl:
+            self._remove(path, stat.st_size)
+            self.misses += 1
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                response = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # Track recency for eviction without touching the TTL timestamp
+        try:
+            os.utime(path, (time.time(), stat.st_mtime))
+        except OSError:
+            pass
+
+        self.hits += 1
+        return response
+
+    def set(self, query, variables, response):
+        """
+        Store a successful response and evict old entries when over the size limit.
+
+        Responses with errors are not cached. The rateLimit block is dropped since
+        it is stale by the time the entry is read.
+
+        Args:
+            query (str): GraphQL query
+            variables (dict): Query variables
+            response (dict): GraphQL response
+        """
+        if not isinstance(response, dict) or "errors" in response or "error" in response or not response.get("data"):
+            return
+
+        data = {key: value for key, value in response["data"].items() if key != "rateLimit"}
+        path = self._path(query, variables)
+        content = json.dumps({"data": data}, ensure_ascii=False)
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write GraphQL cache entry: {e}")
+            return
+
+        with self._lock:
+            self._size += len(content.encode("utf-8")) - old_size
+            over_limit = self._size > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def evict(self):
+        """Remove expired entries, then least recently used ones until under 90% of the size limit."""
+        now = time.time()
+        live_entries = []
+        for path, size, last_access, written in self._entries():
+            if now - written > self.ttl:
+                self._remove(path, size)
+            else:
+                live_entries.append((last_access, path, size))
+
+        with self._lock:
+            self._size = sum(size for _, _, size in live_entries)
+
+        target = self.max_bytes * 0.9
+        for _, path, size in sorted(live_entries):
+            if self._size <= target:
+                break
+            self._remove(path, size)
+
+        logger.info(f"Evicted GraphQL cache entries, {self._size / (1024 * 1024):.1f} MB left")
+
+    def _remove(self, path, size):
+        """Delete one entry and update the tracked size."""
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._size -= size
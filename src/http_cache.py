@@ -0,0 +1,233 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from requests.structures import CaseInsensitiveDict
+from requests.utils import parse_header_links
+
+logger = logging.getLogger(__name__)
+
+# Response headers kept with a cached body
+CACHED_HEADERS = ("ETag", "Last-Modified", "Link", "Content-Type")
+
+
+class CachedResponse:
+    """Response served from the conditional request cache after a 304."""
+
+    def __init__(self, url, status_code, headers, text):
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.text = text
+        self.from_cache = True
+
+    def json(self):
+        """Parse the cached body as JSON."""
+        return json.loads(self.text)
+
+    @property
+    def links(self):
+        """Parsed Link header, keyed by rel like requests.Response.links."""
+        links = {}
+        for link in parse_header_links(self.headers.get("Link", "")):
+            links[link.get("rel") or link.get("url")] = link
+        return links
+
+
+class ConditionalRequestCache:
+    """
+    On-disk ETag / Last-Modified cache for GitHub REST GET requests.
+
+    Entries are keyed by token, Accept header and URL, since GitHub answers
+    differently depending on what a token can see. They expire after a TTL,
+    and the oldest entries are evicted whenever the cache outgrows its size bound.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, cache_dir, ttl=86400, max_bytes=512 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): Directory holding cached responses
+            ttl (int): Seconds a cached response stays valid
+            max_bytes (int): Size the cache is trimmed back to, oldest entries first
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = 0
+
+    @classmethod
+    def from_env(cls):
+        """
+        Get the shared cache configured by HTTP_CACHE / HTTP_CACHE_DIR /
+        HTTP_CACHE_TTL / HTTP_CACHE_MAX_MB.
+
+        Expired entries are evicted when the cache is first opened.
+
+        Returns:
+            ConditionalRequestCache: Shared cache, or None if caching is disabled
+        """
+        if os.getenv("HTTP_CACHE", "true").lower() != "true":
+            return None
+
+        cache_dir = os.getenv("HTTP_CACHE_DIR") or os.path.join(os.getenv("OUTPUT_DIR", "data"), ".http_cache")
+        with cls._instances_lock:
+            if cache_dir not in cls._instances:
+                cache = cls(
+                    cache_dir,
+                    ttl=int(os.getenv("HTTP_CACHE_TTL", "86400")),
+                    max_bytes=int(os.getenv("HTTP_CACHE_MAX_MB", "512")) * 1024 * 1024,
+                )
+                cache.evict()
+                cls._instances[cache_dir] = cache
+            return cls._instances[cache_dir]
+
+    def _path(self, url, headers):
+        """Cache file for a URL, Accept header and token."""
+        token = hashlib.sha256(headers.get("Authorization", "").encode("utf-8")).hexdigest()
+        key = hashlib.sha256(f"{token} {headers.get('Accept', '')} {url}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load(self, path, fresh=False):
+        """Read a cache entry, or None if missing, unreadable or (if fresh) expired."""
+        try:
+            if fresh and time.time() - os.path.getmtime(path) > self.ttl:
+                self._remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, url, headers):
+        """
+        Add If-None-Match / If-Modified-Since for a previously cached URL.
+
+        Args:
+            url (str): Request URL
+            headers (dict): Request headers
+
+        Returns:
+            dict: Request headers including validators
+        """
+        entry = self._load(self._path(url, headers), fresh=True)
+        if not entry:
+            return headers
+
+        headers = dict(headers)
+        if entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    def resolve(self, url, headers, response):
+        """
+        Serve a 304 from disk and store cacheable 200 responses.
+
+        Args:
+            url (str): Request URL
+            headers (dict): Request headers
+            response: Response from the transport
+
+        Returns:
+            Response or CachedResponse: Response to hand to the caller
+        """
+        path = self._path(url, headers)
+
+        if response.status_code == 304:
+            entry = self._load(path)
+            if entry:
+                self.hits += 1
+                # A revalidated entry is fresh again
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                logger.debug(f"Serving {url} from HTTP cache")
+                return CachedResponse(url, entry["status_code"], entry["headers"], entry["body"])
+            logger.warning(f"Got 304 for {url} but no cache entry exists")
+            return response
+
+        if response.status_code == 200 and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+            self.misses += 1
+            entry = {
+                "url": url,
+                "status_code": response.status_code,
+                "headers": {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+                "body": response.text,
+            }
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+                self._grow(os.path.getsize(path))
+            except OSError as e:
+                logger.warning(f"Could not write HTTP cache entry for {url}: {e}")
+
+        return response
+
+    def _grow(self, size):
+        """Account for a written entry, evicting once the cache outgrows max_bytes."""
+        with self._lock:
+            self._size += size
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self):
+        """Remove expired entries, then the oldest ones until the cache is back under 90% of max_bytes."""
+        now = time.time()
+        entries = []
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.ttl:
+                    self._remove(path)
+                    removed += 1
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        # Trim below the bound, so the next few writes don't walk the cache again
+        size = sum(entry_size for _, entry_size, _ in entries)
+        entries.sort()
+        for _, entry_size, path in entries:
+            if size <= self.max_bytes * 0.9:
+                break
+            self._remove(path)
+            size -= entry_size
+            removed += 1
+
+        with self._lock:
+            self._size = size
+        if removed:
+            logger.info(f"Evicted {removed} HTTP cache entries")
+
+    def _remove(self, path):
+        """Delete one entry."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
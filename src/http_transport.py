@@ -0,0 +1,164 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import logging
+import threading
+import weakref
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from adaptive_concurrency import AdaptiveLimiter
+
+logger = logging.getLogger(__name__)
+
+# httpx logs every request at INFO level
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# HTTP/2 is only used when httpx's h2 extra is installed
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class GitHubTransport:
+    """Shared HTTP transport with pooled keep-alive connections for GitHub API calls."""
+
+    def __init__(self, pool_size=None, use_http2=None, timeout=None, limiter=None):
+        """
+        Initialize the connection pool.
+
+        Args:
+            pool_size (int): Maximum number of pooled connections per host
+            use_http2 (bool): Use HTTP/2 when httpx's h2 extra is installed
+            timeout (float): Request timeout in seconds
+            limiter (AdaptiveLimiter, optional): In-flight request limit, defaults to the shared GitHub one
+        """
+        if pool_size is None:
+            pool_size = int(os.getenv("GITHUB_HTTP_POOL_SIZE", "20"))
+        if use_http2 is None:
+            use_http2 = os.getenv("GITHUB_HTTP2", "true").lower() == "true"
+        if timeout is None:
+            timeout = float(os.getenv("GITHUB_HTTP_TIMEOUT", "30"))
+
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.limiter = limiter or AdaptiveLimiter.from_env("github")
+        self.use_http2 = use_http2 and HTTP2_AVAILABLE
+
+        if self.use_http2:
+            self.client = httpx.Client(
+                http2=True,
+                follow_redirects=True,
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            )
+            logger.info(f"Using HTTP/2 transport with {pool_size} pooled connections")
+        else:
+            self.client = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            self.client.mount("https://", adapter)
+            self.client.mount("http://", adapter)
+            logger.info(f"Using HTTP/1.1 keep-alive transport with {pool_size} pooled connections")
+
+    def request(self, method, url, headers=None, **kwargs):
+        """
+        Send a request over the pooled connections.
+
+        httpx errors are re-raised as the matching requests exceptions so callers
+        only need to handle one family of exceptions. Requests wait for a slot of
+        the adaptive limiter, and every response or network error adjusts it.
+
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            headers (dict): Request headers
+
+        Returns:
+            Response object exposing status_code, headers, text and json()
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        with self.limiter.slot():
+            try:
+                response = self._send(method, url, headers, **kwargs)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                self.limiter.record_throttle()
+                raise
+        self.limiter.record_github_response(response.status_code, response.headers, lambda: response.text)
+        return response
+
+    def _send(self, method, url, headers, **kwargs):
+        """Send a request with the configured client."""
+        if not self.use_http2:
+            return self.client.request(method, url, headers=headers, **kwargs)
+
+        try:
+            return self.client.request(method, url, headers=headers, **kwargs)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(str(e)) from e
+
+    def get(self, url, headers=None, **kwargs):
+        """Send a GET request."""
+        return self.request("GET", url, headers=headers, **kwargs)
+
+    def post(self, url, headers=None, **kwargs):
+        """Send a POST request."""
+        return self.request("POST", url, headers=headers, **kwargs)
+
+    def close(self):
+        """Close all pooled connections."""
+        self.client.close()
+
+
+_shared_transport = None
+_shared_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """
+    Get the process-wide transport shared by all GitHub callers.
+
+    Returns:
+        GitHubTransport: Shared transport instance
+    """
+    global _shared_transport
+    if _shared_transport is None:
+        with _shared_transport_lock:
+            if _shared_transport is None:
+                _shared_transport = GitHubTransport()
+    return _shared_transport
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """
+    Get the pooled asyncio HTTP client for the running event loop.
+
+    httpx async clients are bound to the loop that created them, so one client
+    is kept per loop and shared by every AsyncGitHubAPI running on it.
+
+    Returns:
+        httpx.AsyncClient: Shared async client
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        pool_size = int(os.getenv("GITHUB_ASYNC_POOL_SIZE", "100"))
+        client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE and os.getenv("GITHUB_HTTP2", "true").lower() == "true",
+            follow_redirects=True,
+            timeout=float(os.getenv("GITHUB_HTTP_TIMEOUT", "30")),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+        _async_clients[loop] = client
+    return client
@@ -0,0 +1,300 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import logging
+import time
+from adaptive_paging import is_oversized_query_error
+from crawl_store import advance_watermark
+from crawl_strategies import next_request
+from rest_client import RateLimitExhausted
+from restapi_crawler import RestAPICommentCrawler
+
+logger = logging.getLogger(__name__)
+
+
+class HybridCrawl:
+    """
+    One expert's crawl over GraphQL and the REST API, choosing the API per request.
+
+    GraphQL (the crawl strategy) is used while some token has GraphQL points
+    left, REST (one PR of the commenter search per step) while some token has
+    core requests left, so neither budget sits idle while the other one is
+    exhausted. Both keep their cursors in the crawl state ("rest" for the REST
+    search) and add to the same comment list and processed URL set, so
+    switching loses no progress and never collects a comment twice. The crawl
+    is complete once either side has walked everything.
+    """
+
+    # Consecutive failed requests after which an API is given up for this crawl
+    MAX_FAILURES = 5
+    # Seconds an API is avoided after a failure that is not a known rate limit
+    FAILURE_COOLDOWN = 60
+
+    def __init__(self, crawler, strategy, username, state, all_comments, limit, get_all_historical,
+                 output_file, yield_tracker, pbar):
+        """
+        Args:
+            crawler (GitHubCommentCrawler): Crawler providing clients, token pool and state saving
+            strategy (CrawlStrategy): GraphQL crawl strategy
+            username (str): GitHub username
+            state (dict): Crawl state
+            all_comments (list): Collected comments, extended in place
+            limit (int): Maximum number of comments to collect
+            get_all_historical (bool): Whether to get all historical comments
+            output_file (str): Path of the comments JSON
+            yield_tracker (YieldTracker): Tracker every page is recorded in
+            pbar (tqdm): Progress bar
+        """
+        self.crawler = crawler
+        self.strategy = strategy
+        self.username = username
+        self.state = state
+        self.all_comments = all_comments
+        self.limit = limit
+        self.get_all_historical = get_all_historical
+        self.output_file = output_file
+        self.yield_tracker = yield_tracker
+        self.pbar = pbar
+
+        self.graphql_reserve = int(os.getenv("HYBRID_GRAPHQL_RESERVE", "50"))
+        self.core_reserve = int(os.getenv("HYBRID_CORE_RESERVE", "50"))
+        self.blocked_until = {"graphql": 0, "rest": 0}
+        self.failures = {"graphql": 0, "rest": 0}
+        self.completed = False
+
+        self._graphql_requests = strategy.requests(username, state, all_comments, limit, get_all_historical)
+        self._graphql_request = None
+        self._graphql_started = False
+        self._rotations = 0
+        self._windows_pending = False
+        self._rest_client = None
+        self._rest_pages = None
+
+    def finished(self):
+        """Check whether the crawl is complete, full, stopped for low yield or out of APIs."""
+        if self.completed or self.yield_tracker.stopped:
+            return True
+        if len(self.all_comments) >= self.limit:
+            return True
+        return all(until == float("inf") for until in self.blocked_until.values())
+
+    def choose(self):
+        """
+        Pick the API for the next request.
+
+        Returns:
+            str or float: "graphql" or "rest", or seconds to wait until one has budget again
+        """
+        now = time.time()
+        if now >= self.blocked_until["graphql"] and self._has_budget("graphql", self.graphql_reserve):
+            return "graphql"
+        if now >= self.blocked_until["rest"] and self._has_budget("core", self.core_reserve):
+            return "rest"
+
+        wake = min(self._available_at("graphql", "graphql"), self._available_at("rest", "core"))
+        return max(1.0, wake - now)
+
+    def _has_budget(self, resource, reserve):
+        """Check whether the current token, or one the worker can rotate to, has budget left."""
+        pool = self.crawler.token_pool
+        if pool.remaining(pool.current_lease().token, resource) > reserve:
+            return True
+        if max(pool.remaining(token, resource) for token in pool.tokens) <= reserve:
+            return False
+        pool.rotate(resource)
+        return pool.remaining(pool.current_lease().token, resource) > reserve
+
+    def _available_at(self, api, resource):
+        """Epoch time at which an API can be used again."""
+        pool = self.crawler.token_pool
+        reset = min(pool.reset_time(token, resource) or time.time() for token in pool.tokens)
+        return max(self.blocked_until[api], reset)
+
+    def _block(self, api, failure=None):
+        """Avoid an API until its budget resets, or for good after repeated failures."""
+        self.failures[api] += 1
+        if self.failures[api] >= self.MAX_FAILURES:
+            logger.warning(f"Giving up on {api} for {self.username} after {self.failures[api]} failures")
+            self.blocked_until[api] = float("inf")
+            return
+
+        resource = "graphql" if api == "graphql" else "core"
+        pool = self.crawler.token_pool
+        reset = pool.reset_time(pool.current_lease().token, resource)
+        if failure == "rate limit" and reset > time.time():
+            self.blocked_until[api] = reset
+        else:
+            self.blocked_until[api] = time.time() + self.FAILURE_COOLDOWN
+        logger.info(f"Switching {self.username} away from {api} until {time.ctime(self.blocked_until[api])}")
+
+    def run(self):
+        """Crawl with the blocking clients until finished."""
+        while not self.finished():
+            api = self.choose()
+            if api == "graphql":
+                if self._windows_pending:
+                    self._run_windows(self.crawler._run_windows(self.strategy, self.username, self.state, self.all_comments,
+                                                                self.limit, self.get_all_historical, self.output_file,
+                                                                self.pbar, self.yield_tracker))
+                    continue
+                if not self._graphql_started:
+                    self._graphql_started = True
+                    self._apply_graphql(None)
+                    continue
+                self._apply_graphql(self.crawler.api.graphql_query(*self._graphql_request))
+            elif api == "rest":
+                self._rest_step()
+            else:
+                logger.info(f"GraphQL and REST budgets exhausted, waiting {api:.0f}s")
+                time.sleep(api)
+
+    async def run_async(self):
+        """Crawl with the asyncio GraphQL client until finished; REST steps run in a worker thread."""
+        while not self.finished():
+            api = self.choose()
+            if api == "graphql":
+                if self._windows_pending:
+                    self._run_windows(await self.crawler._run_windows_async(
+                        self.strategy, self.username, self.state, self.all_comments, self.limit,
+                        self.get_all_historical, self.output_file, self.pbar, self.yield_tracker
+                    ))
+                    continue
+                if not self._graphql_started:
+                    self._graphql_started = True
+                    self._apply_graphql(None)
+                    continue
+                self._apply_graphql(await self.crawler.async_api.graphql_query(*self._graphql_request))
+            elif api == "rest":
+                await asyncio.to_thread(self._rest_step)
+            else:
+                logger.info(f"GraphQL and REST budgets exhausted, waiting {api:.0f}s")
+                await asyncio.sleep(api)
+
+    def _apply_graphql(self, data):
+        """
+        Hand a GraphQL response to the strategy, or retry it elsewhere on failure.
+
+        Args:
+            data (dict): Response to the current request, None to start the strategy
+        """
+        if data is not None:
+            # Oversized pages go back to the strategy, which shrinks its page sizes
+            failure = None if is_oversized_query_error(data) else self.crawler._get_graphql_failure(data)
+            if failure:
+                logger.warning(f"GraphQL request failed for {self.username}: {failure}")
+                # Retry on the other tokens first, then switch to REST until GraphQL recovers
+                if self._rotations < len(self.crawler.github_tokens) and self.crawler.rotate_token():
+                    self._rotations += 1
+                    return
+                self._rotations = 0
+                self._block("graphql", failure)
+                return
+            self.failures["graphql"] = 0
+            self._rotations = 0
+
+        collected = len(self.all_comments)
+        if data is None:
+            self._graphql_request = next(self._graphql_requests, None)
+        else:
+            self._graphql_request = next_request(self._graphql_requests, data)
+        # Window planning yields no comments, so only the windows count towards the yield
+        self._record(0 if self.strategy.parallel else len(self.all_comments) - collected,
+                     None if self.strategy.parallel else self.crawler._page_cost(data or {}))
+
+        if self._graphql_request is None:
+            self._graphql_finished()
+
+    def _graphql_finished(self):
+        """Handle the end of the strategy's requests."""
+        if self.strategy.needs_rest:
+            # The REST commenter search may still find comments GraphQL cannot reach
+            self.blocked_until["graphql"] = float("inf")
+        elif self.strategy.parallel and self.strategy.pending_windows(self.state):
+            self._windows_pending = True
+        else:
+            self.completed = len(self.all_comments) < self.limit
+
+    def _run_windows(self, failure):
+        """Handle the outcome of crawling a parallel strategy's windows."""
+        if failure:
+            self._block("graphql", failure)
+            return
+        self.failures["graphql"] = 0
+        self._windows_pending = False
+        self.completed = not self.strategy.pending_windows(self.state) and len(self.all_comments) < self.limit
+
+    def _rest_step(self):
+        """Fetch the comments of the next PR of the REST commenter search."""
+        client = self.crawler.hybrid_rest_crawler
+        if self._rest_pages is None or client is not self._rest_client:
+            # (Re)start the walk on the current token's client from the saved position
+            since = self.state.get("watermark") if self.strategy.incremental else None
+            progress = self.state.get("rest")
+            if not progress or progress["done"] or progress.get("since") != since:
+                progress = self.state["rest"] = RestAPICommentCrawler.new_search_progress(since)
+            self._rest_client = client
+            self._rest_pages = client.iter_pr_comments(self.username, progress, self._skip_pr)
+
+        progress = self.state["rest"]
+        requests_before = client.requests_sent
+        try:
+            step = next(self._rest_pages, None)
+        except RateLimitExhausted:
+            # The walk restarts from the saved position, on another token if one has core budget left
+            self._rest_pages = None
+            if not self._has_budget("core", self.core_reserve):
+                self._block("rest", "rate limit")
+            return
+        if step is None:
+            self._rest_pages = None
+            if progress["done"]:
+                self._rest_finished()
+            else:
+                self._block("rest")
+            return
+
+        self.failures["rest"] = 0
+        comments, end_of_page = step
+        added = self._add_comments(comments)
+        self.yield_tracker.record_step(added, client.requests_sent - requests_before, end_of_page)
+        self.yield_tracker.should_stop()
+        self.pbar.update(added)
+        self.crawler._save_crawl_state(self.output_file, self.state, self.all_comments)
+
+    def _rest_finished(self):
+        """Handle the end of the REST search."""
+        self.completed = len(self.all_comments) < self.limit
+        if self.completed and self.strategy.incremental:
+            advance_watermark(self.state, self.all_comments)
+            self.state.pop("rest", None)
+
+    def _skip_pr(self, pr_url):
+        """Skip PRs comments were already collected from, unless they may hold newer ones."""
+        if self.strategy.incremental or self.get_all_historical:
+            return False
+        key = RestAPICommentCrawler.pr_key(pr_url)
+        return any((comment.get("repo"), str(comment.get("pr_number"))) == key for comment in self.all_comments)
+
+    def _add_comments(self, comments):
+        """Append REST comments not collected yet, up to the limit."""
+        added = 0
+        processed = self.state["processed_comments"]
+        for comment in comments:
+            if len(self.all_comments) >= self.limit:
+                break
+            if comment.get("comment_url") in processed and not self.get_all_historical:
+                continue
+            self.all_comments.append(comment)
+            processed.add(comment.get("comment_url"))
+            added += 1
+        return added
+
+    def _record(self, added, cost):
+        """Record a GraphQL page and save progress."""
+        self.pbar.update(added)
+        if cost is not None or added:
+            self.yield_tracker.record_page(added, cost)
+        self.yield_tracker.should_stop()
+        self.crawler._save_crawl_state(self.output_file, self.state, self.all_comments)
@@ -0,0 +1,198 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import hashlib
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PullRequestCache:
+    """
+    On-disk cache of PR metadata and review threads keyed by owner/repo#number.
+
+    Shared by every expert, crawler and language in a run (and across runs until
+    the TTL expires), so a PR several experts commented on is fetched once.
+    Entries are namespaced by source ("rest" or "graphql") because the two APIs
+    return different shapes. Concurrent lookups of the same PR wait for the
+    first one instead of fetching it again.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, cache_dir, ttl=86400):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): Directory holding cached PRs
+            ttl (int): Seconds a cached PR stays valid
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Get the shared cache configured by PR_CACHE / PR_CACHE_DIR / PR_CACHE_TTL.
+
+        Expired entries are evicted when the cache is first opened.
+
+        Returns:
+            PullRequestCache: Shared cache, or None if caching is disabled
+        """
+        if os.getenv("PR_CACHE", "true").lower() != "true":
+            return None
+
+        cache_dir = os.getenv("PR_CACHE_DIR") or os.path.join(os.getenv("OUTPUT_DIR", "data"), ".pr_cache")
+        with cls._instances_lock:
+            if cache_dir not in cls._instances:
+                cache = cls(cache_dir, ttl=int(os.getenv("PR_CACHE_TTL", "86400")))
+                cache.evict()
+                cls._instances[cache_dir] = cache
+            return cls._instances[cache_dir]
+
+    @staticmethod
+    def key(repo, number):
+        """
+        Build the cache key of a PR.
+
+        Args:
+            repo (str): Repository as owner/name
+            number (int): PR number
+
+        Returns:
+            str: Key like owner/repo#number
+        """
+        return f"{repo.lower()}#{number}"
+
+    @classmethod
+    def key_from_url(cls, pr_url):
+        """Build the cache key of a PR from its REST API URL."""
+        repo = pr_url.split("/repos/")[1].split("/pulls/")[0]
+        return cls.key(repo, int(pr_url.rstrip("/").split("/")[-1]))
+
+    def _path(self, source, key):
+        """Cache file for a PR key within a source namespace."""
+        digest = hashlib.sha256(f"{source}:{key}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+
+    def get(self, source, key):
+        """
+        Get a cached PR.
+
+        Args:
+            source (str): "rest" or "graphql"
+            key (str): PR key from key()
+
+        Returns:
+            dict: Cached PR, or None if missing or expired
+        """
+        path = self._path(source, key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                self._remove(path)
+                self.misses += 1
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def set(self, source, key, value):
+        """
+        Store a PR.
+
+        Args:
+            source (str): "rest" or "graphql"
+            key (str): PR key from key()
+            value (dict): PR data
+        """
+        path = self._path(source, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write PR cache entry for {key}: {e}")
+
+    def get_or_fetch(self, source, key, fetch):
+        """
+        Get a cached PR, fetching and storing it on a miss.
+
+        Only one thread fetches a given PR at a time; the others wait for its
+        result. A failed fetch (None) is not cached, so the next caller retries.
+
+        Args:
+            source (str): "rest" or "graphql"
+            key (str): PR key from key()
+            fetch (callable): Returns the PR data, or None on failure
+
+        Returns:
+            dict: PR data, or None if fetching failed
+        """
+        value = self.get(source, key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            event = self._inflight.get((source, key))
+            leader = event is None
+            if leader:
+                event = self._inflight[(source, key)] = threading.Event()
+
+        if not leader:
+            event.wait()
+            value = self.get(source, key)
+            return value if value is not None else fetch()
+
+        try:
+            value = fetch()
+            if value is not None:
+                self.set(source, key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop((source, key), None)
+            event.set()
+
+    def evict(self):
+        """Remove expired entries."""
+        now = time.time()
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    expired = now - os.path.getmtime(path) > self.ttl
+                except OSError:
+                    continue
+                if expired:
+                    self._remove(path)
+                    removed += 1
+
+        if removed:
+            logger.info(f"Evicted {removed} expired PR cache entries")
+
+    def _remove(self, path):
+        """Delete one entry."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,88 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import logging
+from http_transport import get_transport
+from http_cache import ConditionalRequestCache
+from retry import RetryPolicy, github_retry
+from token_pool import rate_limit_bucket
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExhausted(Exception):
+    """Raised by clients that don't wait for reset when their token's budget is exhausted."""
+
+    def __init__(self, url, reset):
+        """
+        Args:
+            url (str): Request URL that was rate limited
+            reset (int): Epoch time at which the budget resets
+        """
+        super().__init__(f"Rate limit exhausted for {url} until {reset}")
+        self.url = url
+        self.reset = reset
+
+
+class GitHubRestClient:
+    """Base of the REST API clients: GET requests of one token, scheduled, retried and cached."""
+
+    def __init__(self, github_token, transport=None, token_pool=None, http_cache=None, retry=None, wait_for_reset=True):
+        """
+        Initialize the client.
+
+        Args:
+            github_token (str): GitHub API token
+            transport (GitHubTransport, optional): HTTP transport, defaults to the shared pool
+            token_pool (TokenPool, optional): Pool to report the token's remaining budget to
+            http_cache (ConditionalRequestCache, optional): ETag cache, defaults to HTTP_CACHE_DIR
+            retry (RetryPolicy, optional): Retry policy, defaults to the shared GitHub one
+            wait_for_reset (bool): Wait for an exhausted rate limit to reset, or raise RateLimitExhausted
+        """
+        self.github_token = github_token
+        self.wait_for_reset = wait_for_reset
+        self.transport = transport or get_transport()
+        self.token_pool = token_pool
+        self.retry = retry or RetryPolicy.from_env("github")
+        self.http_cache = http_cache or ConditionalRequestCache.from_env()
+        # Requests sent, so callers can charge a page what it cost
+        self.requests_sent = 0
+        self.headers = {
+            "Authorization": f"token {github_token}",
+            "Accept": "application/vnd.github.v3+json",
+        }
+
+    def _get(self, url, headers=None):
+        """
+        Send a conditional GET request and report the token's remaining budget.
+
+        Cached ETag / Last-Modified validators are sent along, and a 304 answer
+        (which GitHub does not count against the rate limit) is served from disk.
+        Rate limits, network and server errors are retried by the retry policy,
+        waiting for the rate limit reset when the token is exhausted, unless
+        wait_for_reset is off.
+
+        Raises:
+            RateLimitExhausted: If the token is exhausted and wait_for_reset is off
+        """
+        headers = headers or self.headers
+        request_headers = self.http_cache.conditional_headers(url, headers) if self.http_cache else headers
+
+        def attempt():
+            if self.token_pool:
+                self.token_pool.schedule(self.github_token, rate_limit_bucket(url))
+            response = self.transport.get(url, headers=request_headers)
+            if response.status_code != 304:
+                self.requests_sent += 1
+            if self.token_pool:
+                self.token_pool.record_headers(self.github_token, response.headers)
+            return response
+
+        response = self.retry.call(attempt, github_retry(wait_for_reset=self.wait_for_reset))
+        if not self.wait_for_reset and response.status_code in (403, 429) \
+                and response.headers.get("X-RateLimit-Remaining") == "0":
+            raise RateLimitExhausted(url, int(response.headers.get("X-RateLimit-Reset", 0)))
+        if self.http_cache:
+            response = self.http_cache.resolve(url, headers, response)
+        return response
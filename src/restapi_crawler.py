@@ -4,11 +4,14 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import requests
 import json
-import time
 import logging
 import os
 from pathlib import Path
 from tqdm import tqdm
+from pr_cache import PullRequestCache
+from crawl_store import CrawlStore, advance_watermark, read_json_crawl
+from crawl_yield import YieldTracker
+from rest_client import GitHubRestClient, RateLimitExhausted
 from datetime import datetime
 
 # Set up logging
@@ -18,33 +21,44 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()],
 )
 
-class RestAPICommentCrawler:
+class RestAPICommentCrawler(GitHubRestClient):
     """GitHub comment crawler using REST API as fallback when GraphQL is rate limited."""
     
-    def __init__(self, github_token):
+    def __init__(self, github_token, transport=None, token_pool=None, http_cache=None, lean=None, fetch_diff=None, pr_cache=None,
+                 crawl_store=None, incremental=None, retry=None, wait_for_reset=True):
         """Initialize the REST API crawler.
         
         Args:
             github_token (str): GitHub API token
+            transport (GitHubTransport, optional): HTTP transport, defaults to the shared pool
+            token_pool (TokenPool, optional): Pool to report the token's remaining budget to
+            http_cache (ConditionalRequestCache, optional): ETag cache, defaults to HTTP_CACHE_DIR
+            lean (bool, optional): Fetch only paginated review comments per PR, defaults to REST_LEAN_FETCH
+            fetch_diff (bool, optional): Also download the full PR diff in lean mode, defaults to REST_FETCH_DIFF
+            pr_cache (PullRequestCache, optional): PR cache shared across experts, defaults to PR_CACHE settings
+            crawl_store (CrawlStore, optional): Transactional crawl state, defaults to CRAWL_STORE settings
+            incremental (bool, optional): Only collect comments newer than the expert's watermark,
+                defaults to INCREMENTAL_CRAWL
+            retry (RetryPolicy, optional): Retry policy, defaults to the shared GitHub one
+            wait_for_reset (bool): Wait for an exhausted core budget to reset, or raise RateLimitExhausted
         """
-        self.github_token = github_token
-        self.headers = {
-            "Authorization": f"token {github_token}",
-            "Accept": "application/vnd.github.v3+json",
-        }
-        
-    def search_pull_requests(self, username, page=1, per_page=100):
-        """Search for PRs where the user has commented."""
+        super().__init__(github_token, transport, token_pool, http_cache, retry, wait_for_reset)
+        self.lean = lean if lean is not None else os.getenv("REST_LEAN_FETCH", "true").lower() == "true"
+        self.fetch_diff = fetch_diff if fetch_diff is not None else os.getenv("REST_FETCH_DIFF", "false").lower() == "true"
+        self.pr_cache = pr_cache or PullRequestCache.from_env()
+        self.crawl_store = crawl_store or CrawlStore.from_env()
+        if incremental is None:
+            incremental = os.getenv("INCREMENTAL_CRAWL", "false").lower() == "true"
+        self.incremental = incremental
+
+    def search_pull_requests(self, username, page=1, per_page=100, since=None):
+        """Search for PRs where the user has commented, most recently updated first when since is given."""
         url = f"https://api.github.com/search/issues?q=commenter:{username}+type:pr&page={page}&per_page={per_page}"
+        if since:
+            url = (f"https://api.github.com/search/issues?q=commenter:{username}+type:pr+updated:>={since[:10]}"
+                   f"&sort=updated&order=desc&page={page}&per_page={per_page}")
         try:
-            response = requests.get(url, headers=self.headers)
-
-            if response.status_code == 403:
-                reset_time = int(response.headers.get("X-RateLimit-Reset", 0))
-                wait_time = max(0, reset_time - int(time.time()))
-                logging.warning(f"Rate limit exceeded. Waiting for {wait_time} seconds.")
-                time.sleep(wait_time + 1)
-                return self.search_pull_requests(username, page, per_page)
+            response = self._get(url, headers=self.headers)
 
             if response.status_code != 200:
                 logging.error(f"Failed to search PRs: {response.status_code} - {response.text}")
@@ -52,31 +66,42 @@ class RestAPICommentCrawler:
 
             return response.json()
         except requests.exceptions.ConnectionError as e:
+            # The transport's limiter backs off before the next request
             logging.error(f"Network connection error in search_pull_requests: {e}")
-            # Sleep briefly before returning to allow for retry
-            time.sleep(5)
             return {"error": "connection_error", "items": []}
         except requests.exceptions.Timeout as e:
             logging.error(f"Request timeout error in search_pull_requests: {e}")
-            time.sleep(5)
             return {"error": "timeout_error", "items": []}
         except requests.exceptions.RequestException as e:
             logging.error(f"Request error in search_pull_requests: {e}")
-            time.sleep(2)
             return {"error": "request_error", "items": []}
 
-    def get_pr_comments(self, pr_url):
-        """Get comments for a specific PR."""
+    def get_pr_comments(self, pr_url, pr_title=None, since=None):
+        """Get comments for a specific PR, from the shared PR cache when another expert already fetched it.
+        
+        Args:
+            pr_url (str): API URL of the PR
+            pr_title (str, optional): PR title from the search result, used in lean mode
+            since (str, optional): Only fetch comments updated at or after this ISO 8601 time,
+                bypassing the PR cache
+        """
+        if since:
+            return self.get_pr_comments_lean(pr_url, pr_title, since)
+        
+        if self.lean:
+            fetch = lambda: self.get_pr_comments_lean(pr_url, pr_title)
+        else:
+            fetch = lambda: self._fetch_pr_comments(pr_url)
+        
+        if not self.pr_cache:
+            return fetch()
+        return self.pr_cache.get_or_fetch("rest", PullRequestCache.key_from_url(pr_url), fetch)
+
+    def _fetch_pr_comments(self, pr_url):
+        """Get PR details, review comments and diff for a specific PR."""
         try:
             # Get PR details
-            response = requests.get(pr_url, headers=self.headers)
-
-            if response.status_code == 403:
-                reset_time = int(response.headers.get("X-RateLimit-Reset", 0))
-                wait_time = max(0, reset_time - int(time.time()))
-                logging.warning(f"Rate limit exceeded. Waiting for {wait_time} seconds.")
-                time.sleep(wait_time + 1)
-                return self.get_pr_comments(pr_url)
+            response = self._get(pr_url, headers=self.headers)
 
             if response.status_code != 200:
                 logging.error(
@@ -95,14 +120,7 @@ class RestAPICommentCrawler:
                     return None
 
             try:
-                comments_response = requests.get(comments_url, headers=self.headers)
-
-                if comments_response.status_code == 403:
-                    reset_time = int(comments_response.headers.get("X-RateLimit-Reset", 0))
-                    wait_time = max(0, reset_time - int(time.time()))
-                    logging.warning(f"Rate limit exceeded. Waiting for {wait_time} seconds.")
-                    time.sleep(wait_time + 1)
-                    return self.get_pr_comments(pr_url)
+                comments_response = self._get(comments_url, headers=self.headers)
 
                 if comments_response.status_code != 200:
                     logging.error(
@@ -122,17 +140,10 @@ class RestAPICommentCrawler:
             # Get diff
             diff_url = pr_data.get("diff_url")
             try:
-                diff_response = requests.get(
+                diff_response = self._get(
                     diff_url, headers={**self.headers, "Accept": "application/vnd.github.v3.diff"}
                 )
 
-                if diff_response.status_code == 403:
-                    reset_time = int(diff_response.headers.get("X-RateLimit-Reset", 0))
-                    wait_time = max(0, reset_time - int(time.time()))
-                    logging.warning(f"Rate limit exceeded. Waiting for {wait_time} seconds.")
-                    time.sleep(wait_time + 1)
-                    return self.get_pr_comments(pr_url)
-
                 if diff_response.status_code != 200:
                     logging.error(
                         f"Failed to get PR diff: {diff_response.status_code} - {diff_response.text}"
@@ -166,10 +177,149 @@ class RestAPICommentCrawler:
         except requests.exceptions.RequestException as e:
             logging.error(f"Request error in get_pr_comments (main): {e}")
             return None
+        except RateLimitExhausted:
+            raise
         except Exception as e:
             logging.error(f"Error in get_pr_comments: {e}")
             return None
 
+    def get_pr_comments_lean(self, pr_url, pr_title=None, since=None):
+        """
+        Get comments for a specific PR with one paginated review comments request.
+        
+        The review comments URL is derived from the PR URL, so the PR details call
+        is skipped, and diff_hunk already gives each comment its context, so the
+        full diff is only downloaded when fetch_diff is set.
+        
+        Args:
+            pr_url (str): API URL of the PR
+            pr_title (str, optional): PR title from the search result
+            since (str, optional): Only comments updated at or after this ISO 8601 time
+            
+        Returns:
+            dict: PR number, title, repo, comments and diff, or None on failure
+        """
+        comments = []
+        url = f"{pr_url}/comments?per_page=100"
+        if since:
+            url += f"&since={since}"
+        
+        try:
+            while url:
+                response = self._get(url, headers=self.headers)
+                
+                if response.status_code != 200:
+                    logging.error(f"Failed to get PR comments: {response.status_code} - {response.text}")
+                    return None
+                
+                comments.extend(response.json())
+                url = response.links.get("next", {}).get("url")
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Request error in get_pr_comments_lean: {e}")
+            return None
+        
+        return {
+            "pr_number": int(pr_url.rstrip("/").split("/")[-1]),
+            "pr_title": pr_title,
+            "repo": pr_url.split("/repos/")[1].split("/pulls/")[0],
+            "comments": comments,
+            "diff": self.get_pr_diff(pr_url) if self.fetch_diff else None,
+        }
+
+    def get_pr_diff(self, pr_url):
+        """Download the full diff of a PR, or a placeholder message on failure."""
+        try:
+            response = self._get(pr_url, headers={**self.headers, "Accept": "application/vnd.github.v3.diff"})
+            if response.status_code != 200:
+                logging.error(f"Failed to get PR diff: {response.status_code} - {response.text}")
+                return "Could not retrieve diff"
+            return response.text
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Request error in get_pr_diff: {e}")
+            return "Could not retrieve diff due to request error"
+
+    def stream_repo_comments(self, repo, usernames, since=None, max_pages=None):
+        """
+        Stream a repository's review comments once and route them to tracked users.
+
+        Pages through /repos/{owner}/{repo}/pulls/comments ordered by update time,
+        so the cost of each page is shared by every tracked user instead of
+        visiting each PR once per user. PR titles are looked up once per PR, and
+        only for PRs holding a valid comment by a tracked user.
+
+        Args:
+            repo (str): Repository as owner/name
+            usernames (list): GitHub usernames to collect comments for
+            since (str, optional): Only comments updated at or after this ISO 8601 time
+            max_pages (int, optional): Maximum number of pages to read
+
+        Returns:
+            tuple: (dict username -> list of comments, newest updated_at seen or since)
+        """
+        tracked = {username.lower(): username for username in usernames}
+        comments_by_pr = {}  # pull_request_url -> username -> raw comments
+        newest = since
+        pages = 0
+
+        url = f"https://api.github.com/repos/{repo}/pulls/comments?sort=updated&direction=asc&per_page=100"
+        if since:
+            url += f"&since={since}"
+
+        try:
+            while url and (max_pages is None or pages < max_pages):
+                response = self._get(url, headers=self.headers)
+
+                if response.status_code != 200:
+                    logging.error(f"Failed to stream comments of {repo}: {response.status_code} - {response.text}")
+                    break
+
+                for comment in response.json():
+                    newest = max(newest or "", comment.get("updated_at") or "") or None
+                    login = (comment.get("user") or {}).get("login", "").lower()
+                    if login in tracked and comment.get("pull_request_url"):
+                        comments_by_pr.setdefault(comment["pull_request_url"], {}).setdefault(tracked[login], []).append(comment)
+
+                url = response.links.get("next", {}).get("url")
+                pages += 1
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Request error in stream_repo_comments: {e}")
+
+        results = {username: [] for username in usernames}
+        for pr_url, user_comments in comments_by_pr.items():
+            pr_title = None
+            for username, comments in user_comments.items():
+                pr_data = {
+                    "repo": repo,
+                    "pr_number": int(pr_url.rstrip("/").split("/")[-1]),
+                    "pr_title": pr_title,
+                    "comments": comments,
+                }
+                extracted = self.get_comment_with_context(pr_data, username)
+                if extracted and pr_title is None:
+                    pr_title = self.get_pr_title(pr_url)
+                for comment in extracted:
+                    comment["pr_title"] = pr_title
+                results[username].extend(extracted)
+
+        logging.info(f"Streamed {pages} pages of review comments from {repo}")
+        return results, newest
+
+    def get_pr_title(self, pr_url):
+        """Look up the title of a PR, or None on failure."""
+        if self.pr_cache:
+            cached = self.pr_cache.get("rest", PullRequestCache.key_from_url(pr_url))
+            if cached and cached.get("pr_title"):
+                return cached["pr_title"]
+        
+        try:
+            response = self._get(pr_url, headers=self.headers)
+            if response.status_code == 200:
+                return response.json().get("title")
+            logging.error(f"Failed to get PR details: {response.status_code} - {response.text}")
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Request error in get_pr_title: {e}")
+        return None
+
     def get_comment_with_context(self, pr_data, username):
         """Extract comments with their context from PR data."""
         result = []
@@ -216,8 +366,8 @@ class RestAPICommentCrawler:
                     # "position": position,
                     "comment": comment_text,
                     "diff_context": context,
-                    # "created_at": comment.get("created_at"),
-                    # "updated_at": comment.get("updated_at"),
+                    "created_at": comment.get("created_at"),
+                    "updated_at": comment.get("updated_at"),
                     "comment_url": comment.get("html_url"),
                 }
             )
@@ -228,6 +378,10 @@ class RestAPICommentCrawler:
         """
         Collect comments for a GitHub user using REST API.
         
+        In incremental mode only PRs updated since the expert's watermark are
+        searched, newest first, and only their comments updated since then are
+        fetched; the limit counts new comments on top of the existing ones.
+        
         Args:
             username (str): GitHub username
             limit (int): Maximum number of comments to collect
@@ -243,111 +397,76 @@ class RestAPICommentCrawler:
         
         # Handle existing comments if continue_crawl is True
         existing_comments = []
-        if continue_crawl and output_file and os.path.exists(output_file):
+        crawl_state = {}
+        if self.crawl_store and output_file and not continue_crawl:
+            self.crawl_store.reset(output_file)
+        
+        if continue_crawl and output_file and (os.path.exists(output_file) or (self.crawl_store and self.crawl_store.has(output_file))):
             try:
-                with open(output_file, 'r', encoding='utf-8') as f:
-                    existing_comments = json.load(f)
-                    logging.info(f"Loaded {len(existing_comments)} existing comments from {output_file}")
-                    
-                    # If we already have enough comments and we're not getting all historical,
-                    # just return the existing comments
-                    if len(existing_comments) >= limit and not get_all_historical:
-                        logging.info(f"Already have {len(existing_comments)} comments, which meets the limit of {limit}")
-                        return existing_comments
+                if self.crawl_store:
+                    existing_comments, crawl_state = self.crawl_store.load(output_file) or self.crawl_store.migrate(output_file)
+                else:
+                    existing_comments, crawl_state = read_json_crawl(output_file)
+                logging.info(f"Loaded {len(existing_comments)} existing comments from {output_file}")
+                
+                # If we already have enough comments and we're not getting all historical,
+                # just return the existing comments
+                if len(existing_comments) >= limit and not get_all_historical and not self.incremental:
+                    logging.info(f"Already have {len(existing_comments)} comments, which meets the limit of {limit}")
+                    return existing_comments
             except Exception as e:
                 logging.error(f"Error loading existing comments: {e}")
                 existing_comments = []
 
+        since = crawl_state.get("watermark") if self.incremental else None
+        if since:
+            logging.info(f"Incremental crawl of comments updated since {since}")
+        
+        # An unfinished search resumes where it stopped; a finished one starts over for new PRs
+        progress = crawl_state.get("rest")
+        if not progress or progress["done"] or progress.get("since") != since:
+            progress = self.new_search_progress(since)
+        crawl_state["rest"] = progress
+        
+        # Check if we already have comments from a PR (for continue_crawl);
+        # incremental crawls revisit updated PRs for their new comments
+        skip_pr = None
+        if continue_crawl and existing_comments and not since:
+            existing_prs = {(c.get('repo'), str(c.get('pr_number'))) for c in existing_comments}
+            skip_pr = lambda pr_url: self.pr_key(pr_url) in existing_prs
+
         all_comments = []
-        page = 1
-        per_page = 100
-        consecutive_errors = 0
-        max_consecutive_errors = 3  # Max number of consecutive errors before giving up
+        yield_tracker = YieldTracker(crawl_state)
+        # Most comments the crawl may keep, applied to every save so the store never holds more than comments.json
+        keep = None
+        if not get_all_historical:
+            keep = limit + len(existing_comments) if self.incremental else limit
 
         try:
             with tqdm(total=limit, desc=f"REST API: Collecting PR comments for {username}") as pbar:
+                pages = self.iter_pr_comments(username, progress, skip_pr)
                 while len(all_comments) < limit or get_all_historical:
-                    # Search for PRs where the user has commented
-                    search_results = self.search_pull_requests(username, page, per_page)
-                    
-                    # Check for network errors
-                    if "error" in search_results:
-                        consecutive_errors += 1
-                        if consecutive_errors >= max_consecutive_errors:
-                            logging.error(f"Too many consecutive errors ({consecutive_errors}). Aborting.")
-                            break
-                        logging.warning(f"Network error: {search_results['error']}. Retrying in 10 seconds... (Attempt {consecutive_errors}/{max_consecutive_errors})")
-                        time.sleep(10)  # Wait longer before retry
-                        continue
+                    requests_before = self.requests_sent
+                    step = next(pages, None)
+                    if step is None:
+                        break
                     
-                    # Reset error counter if successful
-                    consecutive_errors = 0
+                    comments, end_of_page = step
+                    if comments:
+                        all_comments.extend(comments)
+                        pbar.update(len(comments))
+                        logging.info(f"Found {len(comments)} comments in PR {comments[0]['repo']}#{comments[0]['pr_number']}")
                     
-                    items = search_results.get("items", [])
-
-                    if not items:
-                        logging.info("No more PRs found for this user")
-                        break
-
-                    logging.info(f"Found {len(items)} PRs on page {page}")
-
-                    for item in items:
-                        if len(all_comments) >= limit and not get_all_historical:
+                    # Each request is one point of the core budget; 304s and cached PRs are free
+                    yield_tracker.record_step(len(comments), self.requests_sent - requests_before, end_of_page)
+                    if end_of_page:
+                        # Save progress after each page
+                        if output_file and all_comments:
+                            self._save_progress(output_file, crawl_state, existing_comments, all_comments, keep)
+                            logging.info(f"Saved {len(all_comments)} comments to {output_file} (progress)")
+                        if yield_tracker.should_stop():
                             break
 
-                        pr_url = item.get("pull_request", {}).get("url")
-                        if not pr_url:
-                            logging.error(f"No PR URL found for item: {item}")
-                            continue
-
-                        # Check if we already have comments from this PR (for continue_crawl)
-                        if continue_crawl and existing_comments:
-                            pr_number = pr_url.split('/')[-1]
-                            repo = pr_url.split("/repos/")[1].split("/pulls/")[0]
-                            if any(c.get('repo') == repo and str(c.get('pr_number')) == pr_number for c in existing_comments):
-                                logging.info(f"Skipping PR {pr_url} as we already have comments from it")
-                                continue
-
-                        logging.info(f"Processing PR: {pr_url}")
-
-                        # Try to get PR comments with retry for network errors
-                        retry_count = 0
-                        max_retries = 3
-                        pr_data = None
-                        
-                        while retry_count < max_retries:
-                            pr_data = self.get_pr_comments(pr_url)
-                            if pr_data:  # If we got data, break the retry loop
-                                break
-                            
-                            retry_count += 1
-                            if retry_count < max_retries:
-                                logging.warning(f"Failed to get PR data, retrying in {retry_count * 5} seconds... ({retry_count}/{max_retries})")
-                                time.sleep(retry_count * 5)  # Exponential backoff
-                        
-                        if not pr_data:
-                            logging.error(f"Failed to get data for PR {pr_url} after {max_retries} retries, skipping")
-                            continue
-
-                        # Extract comments for this user
-                        comments = self.get_comment_with_context(pr_data, username)
-                        if comments:
-                            all_comments.extend(comments)
-                            pbar.update(len(comments))
-                            logging.info(f"Found {len(comments)} comments in PR {pr_url}")
-
-                    # Move to next page if we haven't collected enough comments yet
-                    if (len(all_comments) < limit or get_all_historical) and len(items) == per_page:
-                        page += 1
-                    else:
-                        break
-
-                    # Save progress after each page
-                    if output_file and all_comments:
-                        with open(output_file, 'w', encoding='utf-8') as f:
-                            json.dump(all_comments, f, ensure_ascii=False, indent=2)
-                        logging.info(f"Saved {len(all_comments)} comments to {output_file} (progress)")
-
             logging.info(f"Finished collecting comments. Total: {len(all_comments)}")
 
         except Exception as e:
@@ -356,10 +475,11 @@ class RestAPICommentCrawler:
             traceback.print_exc()
             # Save what we have so far
             if output_file and all_comments:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(all_comments, f, ensure_ascii=False, indent=2)
+                self._save_progress(output_file, crawl_state, existing_comments, all_comments, keep)
                 logging.info(f"Saved {len(all_comments)} comments to {output_file} (after error)")
 
+        completed = progress["done"] and (len(all_comments) < limit or get_all_historical)
+
         # Merge with existing comments if continue_crawl is True
         if continue_crawl and existing_comments:
             # Use comment URLs for deduplication
@@ -369,18 +489,133 @@ class RestAPICommentCrawler:
             logging.info(f"Added {len(new_comments)} new comments to {len(existing_comments)} existing ones")
 
         # Truncate to limit unless we want all historical comments
-        if not get_all_historical and len(all_comments) > limit:
-            all_comments = all_comments[:limit]
-            logging.info(f"Truncated to {limit} comments")
+        if keep is not None and len(all_comments) > keep:
+            all_comments = all_comments[:keep]
+            logging.info(f"Truncated to {keep} comments")
+        
+        # A pass that reached the last PR has seen every comment up to the newest one
+        if completed:
+            advance_watermark(crawl_state, all_comments)
 
         # Save final results
         if output_file:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(all_comments, f, ensure_ascii=False, indent=2)
+            if self.crawl_store:
+                self.crawl_store.save_page(output_file, crawl_state, all_comments)
+            elif crawl_state:
+                with open(f"{output_file}.state", "w") as f:
+                    json.dump(crawl_state, f)
+            if self.crawl_store:
+                # Exported from the store, which also holds comments other writers added meanwhile
+                self.crawl_store.export(output_file)
+            else:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(all_comments, f, ensure_ascii=False, indent=2)
             print(f"Comments saved to {output_file}")
 
         return all_comments
 
+    @staticmethod
+    def new_search_progress(since=None):
+        """
+        Start position of a search walked by iter_pr_comments.
+
+        Args:
+            since (str, optional): Only PRs and comments updated at or after this ISO 8601 time
+
+        Returns:
+            dict: JSON-serializable progress with page, index, done and since
+        """
+        return {"page": 1, "index": 0, "done": False, "since": since}
+
+    @staticmethod
+    def pr_key(pr_url):
+        """(repo, PR number) of a PR API URL, as stored in collected comments."""
+        return pr_url.split("/repos/")[1].split("/pulls/")[0], pr_url.rstrip("/").split("/")[-1]
+
+    def iter_pr_comments(self, username, progress, skip_pr=None):
+        """
+        Walk the PRs the user commented on, one PR per step.
+        
+        The search position is kept in progress, which is updated before each
+        step is yielded, so saving it together with the yielded comments makes
+        the walk resumable. progress["done"] is set once the last page was
+        walked; the generator also ends without it when a search request still
+        fails after the retry policy's retries, and raises RateLimitExhausted
+        from clients that don't wait for reset.
+        
+        Args:
+            username (str): GitHub username
+            progress (dict): Position from new_search_progress(), updated in place
+            skip_pr (callable, optional): Returns True for PR API URLs not worth fetching
+            
+        Yields:
+            tuple: (list of the user's valid comments in the PR, True if it was the last PR of a search page)
+        """
+        per_page = 100
+        
+        while not progress["done"]:
+            # Search for PRs where the user has commented
+            search_results = self.search_pull_requests(username, progress["page"], per_page, progress.get("since"))
+            
+            # Network errors were already retried by _get
+            if "error" in search_results:
+                logging.error(f"Network error: {search_results['error']}. Aborting.")
+                return
+            
+            items = search_results.get("items", [])
+            if not items:
+                logging.info("No more PRs found for this user")
+                progress["done"] = True
+                return
+            
+            logging.info(f"Found {len(items)} PRs on page {progress['page']}")
+            
+            while progress["index"] < len(items):
+                item = items[progress["index"]]
+                end_of_page = progress["index"] + 1 == len(items)
+                
+                comments = []
+                pr_url = item.get("pull_request", {}).get("url")
+                if not pr_url:
+                    logging.error(f"No PR URL found for item: {item}")
+                elif skip_pr and skip_pr(pr_url):
+                    logging.info(f"Skipping PR {pr_url} as we already have comments from it")
+                else:
+                    logging.info(f"Processing PR: {pr_url}")
+                    pr_data = self.get_pr_comments(pr_url, pr_title=item.get("title"), since=progress.get("since"))
+                    if pr_data:
+                        # Extract comments for this user
+                        comments = self.get_comment_with_context(pr_data, username)
+                # Moved on only now, so a PR interrupted by RateLimitExhausted is fetched again
+                progress["index"] += 1
+                
+                # Skipped PRs still report the end of their page
+                if comments or end_of_page:
+                    yield comments, end_of_page
+            
+            # Move to the next page
+            progress["done"] = len(items) < per_page
+            progress["page"] += 1
+            progress["index"] = 0
+
+    def _save_progress(self, output_file, crawl_state, existing_comments, new_comments, keep=None):
+        """
+        Record collected comments in the crawl store, or rewrite the JSON file without one.
+        
+        Args:
+            keep (int, optional): Most comments to save, None for all; the last PR's comments
+                can overshoot the limit, and the store can't drop rows again
+        """
+        if not self.crawl_store:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(new_comments[:keep], f, ensure_ascii=False, indent=2)
+            return
+        
+        # Only the comments added since the last page are inserted
+        existing_urls = {c.get('comment_url') for c in existing_comments}
+        comments = existing_comments + [c for c in new_comments if c.get('comment_url') not in existing_urls]
+        self.crawl_store.save_page(output_file, crawl_state, comments[:keep])
+
     def is_valid_comment(self, comment_text):
         """
         Check if a comment is valid for collection.
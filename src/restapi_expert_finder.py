@@ -2,65 +2,46 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-import requests
 import logging
-import time
 import json
 from pathlib import Path
 from tqdm import tqdm
+from rest_client import GitHubRestClient
 
 logger = logging.getLogger(__name__)
 
-class RestAPIExpertFinder:
+class RestAPIExpertFinder(GitHubRestClient):
     """GitHub expert finder using REST API as fallback when GraphQL is rate limited."""
     
-    def __init__(self, github_token):
+    def __init__(self, github_token, transport=None, token_pool=None, http_cache=None, retry=None):
         """Initialize the REST API expert finder.
         
         Args:
             github_token (str): GitHub API token
+            transport (GitHubTransport, optional): HTTP transport, defaults to the shared pool
+            token_pool (TokenPool, optional): Pool to report the token's remaining budget to
+            http_cache (ConditionalRequestCache, optional): ETag cache, defaults to HTTP_CACHE_DIR
+            retry (RetryPolicy, optional): Retry policy, defaults to the shared GitHub one
         """
-        self.github_token = github_token
-        self.headers = {
-            "Authorization": f"token {github_token}",
-            "Accept": "application/vnd.github.v3+json",
-        }
-        
-    def _handle_rate_limit(self, response):
-        """Handle rate limiting by waiting until reset time."""
-        if response.status_code == 403 and 'rate limit exceeded' in response.text.lower():
-            reset_time = int(response.headers.get("X-RateLimit-Reset", 0))
-            wait_time = max(0, reset_time - int(time.time()))
-            logger.warning(f"Rate limit exceeded. Waiting for {wait_time} seconds.")
-            time.sleep(wait_time + 1)
-            return True
-        return False
-    
+        super().__init__(github_token, transport, token_pool, http_cache, retry)
+
     def search_users(self, language, page=1, per_page=30):
         """Search for GitHub users experienced in a language."""
         url = f"https://api.github.com/search/users?q=language:{language}+followers:>1000+repos:>50&page={page}&per_page={per_page}&sort=followers&order=desc"
         
-        while True:
-            response = requests.get(url, headers=self.headers)
+        response = self._get(url, headers=self.headers)
+        if response.status_code != 200:
+            logger.error(f"Failed to search users: {response.status_code} - {response.text}")
+            return []
             
-            if self._handle_rate_limit(response):
-                continue
-                
-            if response.status_code != 200:
-                logger.error(f"Failed to search users: {response.status_code} - {response.text}")
-                return []
-                
-            return response.json().get("items", [])
+        return response.json().get("items", [])
     
     def get_user_details(self, username):
         """Get detailed information about a user."""
         # Get basic user info
         user_url = f"https://api.github.com/users/{username}"
-        user_response = requests.get(user_url, headers=self.headers)
+        user_response = self._get(user_url, headers=self.headers)
         
-        if self._handle_rate_limit(user_response):
-            return self.get_user_details(username)
-            
         if user_response.status_code != 200:
             logger.error(f"Failed to get user details: {user_response.status_code} - {user_response.text}")
             return None
@@ -70,11 +51,8 @@ class RestAPIExpertFinder:
         
         # Get repositories
         repos_url = f"https://api.github.com/users/{username}/repos?per_page=100&type=owner&sort=updated"
-        repos_response = requests.get(repos_url, headers=self.headers)
+        repos_response = self._get(repos_url, headers=self.headers)
         
-        if self._handle_rate_limit(repos_response):
-            return self.get_user_details(username)
-            
         if repos_response.status_code != 200:
             logger.error(f"Failed to get repositories: {repos_response.status_code} - {repos_response.text}")
             return None
@@ -85,11 +63,8 @@ class RestAPIExpertFinder:
         # Get PRs created by user 
         # We use search API to get an approximate count
         prs_url = f"https://api.github.com/search/issues?q=author:{username}+is:pr+is:public&per_page=1"
-        prs_response = requests.get(prs_url, headers=self.headers)
+        prs_response = self._get(prs_url, headers=self.headers)
         
-        if self._handle_rate_limit(prs_response):
-            return self.get_user_details(username)
-            
         prs_count = 0
         if prs_response.status_code == 200:
             prs_count = prs_response.json().get("total_count", 0)
@@ -97,11 +72,8 @@ class RestAPIExpertFinder:
         # Get PR reviews - this is more complex with REST API
         # We use search API with 'commenter' to estimate review activity
         reviews_url = f"https://api.github.com/search/issues?q=commenter:{username}+is:pr+is:public&per_page=1"
-        reviews_response = requests.get(reviews_url, headers=self.headers)
+        reviews_response = self._get(reviews_url, headers=self.headers)
         
-        if self._handle_rate_limit(reviews_response):
-            return self.get_user_details(username)
-            
         pr_reviews = 0
         if reviews_response.status_code == 200:
             pr_reviews = reviews_response.json().get("total_count", 0)
@@ -188,9 +160,6 @@ class RestAPIExpertFinder:
                 
                 # Move to next page
                 page += 1
-                
-                # Avoid hitting rate limits
-                time.sleep(1)
         
         # Sort results by score
         return sorted(results, key=lambda x: x.get("score", 0), reverse=True) 
\ No newline at end of file
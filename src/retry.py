@@ -0,0 +1,285 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import logging
+import random
+import threading
+import time
+import requests
+
+logger = logging.getLogger(__name__)
+
+# GitHub asks clients to wait at least a minute after a secondary rate limit without Retry-After
+SECONDARY_RATE_LIMIT_PAUSE = 60
+
+
+class RetryPolicy:
+    """
+    Retry loop shared by every call to one service.
+
+    Retries wait a random time between 0 and base_delay * 2^attempt (capped at
+    max_delay, "full jitter"), so clients failing together don't retry
+    together, or the time the service asked for via Retry-After / a rate limit
+    reset plus a little jitter. A retry budget shared by all callers of the
+    service bounds the extra load during outages: every call adds budget_ratio
+    of a retry to it, every retry spends a whole one, so retries stay at
+    about budget_ratio of the traffic once the initial reserve is used up.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, name, max_attempts=5, base_delay=1.0, max_delay=60.0, budget_ratio=0.2,
+                 budget_reserve=10, max_wait=3700):
+        """
+        Initialize the policy.
+
+        Args:
+            name (str): Service name used in log messages
+            max_attempts (int): Attempts per call, including the first one
+            base_delay (float): Backoff ceiling of the first retry in seconds
+            max_delay (float): Highest backoff ceiling in seconds
+            budget_ratio (float): Retries earned per call
+            budget_reserve (int): Retries available up front, and the most the budget holds
+            max_wait (float): Longest server-requested wait worth retrying after
+        """
+        self.name = name
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_reserve = budget_reserve
+        self.max_wait = max_wait
+        self._budget = float(budget_reserve)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name):
+        """
+        Get the process-wide policy of a service, configured by the RETRY_* variables.
+
+        Args:
+            name (str): Service name, e.g. "github", "openai" or "qdrant"
+
+        Returns:
+            RetryPolicy: Shared policy with its own retry budget
+        """
+        with cls._instances_lock:
+            if name not in cls._instances:
+                cls._instances[name] = cls(
+                    name,
+                    max_attempts=int(os.getenv("RETRY_MAX_ATTEMPTS", "5")),
+                    base_delay=float(os.getenv("RETRY_BASE_DELAY", "1")),
+                    max_delay=float(os.getenv("RETRY_MAX_DELAY", "60")),
+                    budget_ratio=float(os.getenv("RETRY_BUDGET_RATIO", "0.2")),
+                    budget_reserve=int(os.getenv("RETRY_BUDGET_RESERVE", "10"))
+                )
+            return cls._instances[name]
+
+    def backoff(self, retry, retry_after=None):
+        """
+        Seconds to wait before a retry.
+
+        Args:
+            retry (int): Number of the retry, starting at 1
+            retry_after (float): Wait requested by the service, None to back off exponentially
+
+        Returns:
+            float: Delay in seconds
+        """
+        if retry_after:
+            # Spread the callers released by the same reset
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+    def _start_call(self):
+        """Earn retry budget for a new call."""
+        with self._lock:
+            self._budget = min(self.budget_reserve, self._budget + self.budget_ratio)
+
+    def _take_retry(self, attempt, retry_after):
+        """Check whether another attempt is allowed, spending budget on it."""
+        if attempt >= self.max_attempts or (retry_after or 0) > self.max_wait:
+            return False
+        with self._lock:
+            if self._budget < 1:
+                logger.warning(f"{self.name} retry budget exhausted, not retrying")
+                return False
+            self._budget -= 1
+            return True
+
+    def call(self, fn, should_retry):
+        """
+        Call fn until it succeeds, retries are used up or the failure isn't retryable.
+
+        Args:
+            fn (callable): Function making one attempt
+            should_retry (callable): Gets (result, exception) of an attempt and returns
+                None if it is final, otherwise seconds the service asked to wait (0 to back off)
+
+        Returns:
+            object: Result of the last attempt; its exception is raised instead if it had one
+        """
+        self._start_call()
+        attempt = 0
+        while True:
+            attempt += 1
+            result, error = None, None
+            try:
+                result = fn()
+            except Exception as e:
+                error = e
+
+            retry_after = should_retry(result, error)
+            if retry_after is None or not self._take_retry(attempt, retry_after):
+                if error is not None:
+                    raise error
+                return result
+
+            delay = self.backoff(attempt, retry_after)
+            logger.warning(f"{self.name} request failed ({_describe(result, error)}), retry {attempt} in {delay:.1f}s")
+            time.sleep(delay)
+
+    async def call_async(self, fn, should_retry):
+        """
+        Await fn until it succeeds, retries are used up or the failure isn't retryable.
+
+        Args:
+            fn (callable): Coroutine function making one attempt
+            should_retry (callable): As for call()
+
+        Returns:
+            object: Result of the last attempt; its exception is raised instead if it had one
+        """
+        self._start_call()
+        attempt = 0
+        while True:
+            attempt += 1
+            result, error = None, None
+            try:
+                result = await fn()
+            except Exception as e:
+                error = e
+
+            retry_after = should_retry(result, error)
+            if retry_after is None or not self._take_retry(attempt, retry_after):
+                if error is not None:
+                    raise error
+                return result
+
+            delay = self.backoff(attempt, retry_after)
+            logger.warning(f"{self.name} request failed ({_describe(result, error)}), retry {attempt} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+def github_retry(retry_statuses=(500, 502, 503, 504), wait_for_reset=True):
+    """
+    Build a should_retry function for GitHub responses (requests or httpx).
+
+    Args:
+        retry_statuses (tuple): Server error statuses worth retrying
+        wait_for_reset (bool): Wait for an exhausted primary rate limit to reset
+
+    Returns:
+        callable: should_retry function for RetryPolicy.call
+    """
+    def should_retry(response, error):
+        if error is not None:
+            return 0 if is_transient_error(error) else None
+
+        retry_after = github_retry_after(response.status_code, response.headers, lambda: response.text)
+        if retry_after is not None:
+            return retry_after
+        if response.status_code in (403, 429) and response.headers.get("X-RateLimit-Remaining") == "0":
+            if not wait_for_reset:
+                return None
+            reset_time = int(response.headers.get("X-RateLimit-Reset", 0))
+            return max(1, reset_time - int(time.time()) + 1)
+        if response.status_code in retry_statuses:
+            return 0
+        return None
+
+    return should_retry
+
+
+def openai_retry(result, error):
+    """should_retry function for OpenAI client calls."""
+    if error is None:
+        return None
+    status_code = getattr(error, "status_code", None)
+    if status_code == 429:
+        # An exhausted quota doesn't come back by waiting
+        if getattr(error, "code", None) == "insufficient_quota":
+            return None
+        return parse_retry_after(getattr(getattr(error, "response", None), "headers", None) or {}) or 0
+    if status_code in (408, 409) or (status_code or 0) >= 500:
+        return 0
+    return 0 if status_code is None and is_transient_error(error) else None
+
+
+def qdrant_retry(result, error):
+    """should_retry function for Qdrant client calls."""
+    if error is None:
+        return None
+    status_code = getattr(error, "status_code", None)
+    if status_code == 429 or (status_code or 0) >= 500:
+        return parse_retry_after(getattr(error, "headers", None) or {}) or 0
+    return 0 if status_code is None and is_transient_error(error) else None
+
+
+def github_retry_after(status_code, headers, body=None):
+    """
+    Check whether a GitHub response asks the client to slow down.
+
+    An exhausted primary rate limit doesn't count: it is a matter of the token,
+    not of how fast requests are sent.
+
+    Args:
+        status_code (int): HTTP status
+        headers (Mapping): Response headers
+        body (str or callable): Response text, or a function returning it
+
+    Returns:
+        float: Seconds to wait, 0 to back off without a given time, None if not throttled
+    """
+    if status_code not in (403, 429):
+        return None
+
+    retry_after = parse_retry_after(headers)
+    if retry_after is not None:
+        return retry_after
+    if status_code == 429:
+        return 0
+    if headers.get("X-RateLimit-Remaining") == "0":
+        return None
+
+    text = ((body() if callable(body) else body) or "").lower()
+    if "secondary rate limit" in text or "abuse" in text:
+        return SECONDARY_RATE_LIMIT_PAUSE
+    return None
+
+
+def parse_retry_after(headers):
+    """Seconds from a Retry-After header, None if absent or not a number."""
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_transient_error(error):
+    """Check whether an exception is a connection problem or timeout worth retrying."""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    name = type(error).__name__
+    return any(part in name for part in ("Timeout", "Connect", "RemoteProtocol", "ResponseHandling"))
+
+
+def _describe(result, error):
+    """Short description of a failed attempt for logging."""
+    if error is not None:
+        return f"{type(error).__name__}: {error}"
+    return f"HTTP {getattr(result, 'status_code', '?')}"
@@ -0,0 +1,426 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Budgets GitHub grants a token per window before any response tells us otherwise
+DEFAULT_LIMITS = {"core": 5000, "graphql": 5000, "search": 30}
+# Seconds until a fresh budget resets; search budgets are per minute, the others per hour
+RESET_WINDOWS = {"search": 60}
+DEFAULT_RESET_WINDOW = 3600
+
+
+def rate_limit_bucket(url):
+    """
+    Get the rate limit resource a GitHub API request is counted against.
+
+    Args:
+        url (str): Request URL
+
+    Returns:
+        str: "graphql", "search" or "core"
+    """
+    path = urlparse(url).path
+    if path.rstrip("/").endswith("/graphql"):
+        return "graphql"
+    if path.startswith("/search/"):
+        return "search"
+    return "core"
+
+
+class TokenLease:
+    """A token held by one worker, with the API clients bound to it."""
+
+    def __init__(self, token):
+        """
+        Args:
+            token (str): Leased GitHub token
+        """
+        self.token = token
+        self.clients = {}
+
+    def client(self, factory, token_pool, **kwargs):
+        """
+        Get the client built by factory for this lease's token.
+
+        Args:
+            factory (callable): Client class taking (token, token_pool=..., **kwargs)
+            token_pool (TokenPool): Pool passed on so the client reports budgets
+            **kwargs: Extra constructor arguments, part of the cache key by identity
+
+        Returns:
+            object: Cached client instance
+        """
+        key = (factory, tuple((name, id(value)) for name, value in sorted(kwargs.items())))
+        if key not in self.clients:
+            self.clients[key] = factory(self.token, token_pool=token_pool, **kwargs)
+        return self.clients[key]
+
+
+class TokenPool:
+    """Thread-safe pool leasing GitHub tokens to concurrent workers by remaining budget."""
+
+    def __init__(self, tokens, resource="graphql", max_wait=None):
+        """
+        Initialize the pool.
+
+        Args:
+            tokens (list): GitHub tokens
+            resource (str): Rate limit resource used to rank tokens by default
+            max_wait (float): Longest wait for a bucket reset in schedule(), defaults to RATE_LIMIT_MAX_WAIT
+        """
+        if isinstance(tokens, str):
+            tokens = [tokens]
+        self.tokens = list(tokens)
+        self.resource = resource
+        if max_wait is None:
+            max_wait = float(os.getenv("RATE_LIMIT_MAX_WAIT", "120"))
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._budget_changed = threading.Condition(self._lock)
+        self._budgets = {token: {} for token in self.tokens}
+        self._leases = {token: 0 for token in self.tokens}
+        self._current = contextvars.ContextVar(f"token_lease_{id(self)}", default=None)
+
+    def record_headers(self, token, headers):
+        """
+        Update a token's budget from X-RateLimit-* response headers.
+
+        Args:
+            token (str): Token that made the request
+            headers (Mapping): Response headers
+        """
+        remaining = headers.get("X-RateLimit-Remaining")
+        if token not in self._budgets or remaining is None:
+            return
+
+        resource = headers.get("X-RateLimit-Resource", "core")
+        reset = int(headers.get("X-RateLimit-Reset", 0))
+        with self._lock:
+            self._budgets[token][resource] = {
+                "remaining": self._counted_down(token, resource, reset, int(remaining)),
+                "limit": int(headers.get("X-RateLimit-Limit", DEFAULT_LIMITS.get(resource, 5000))),
+                "reset": reset,
+            }
+            self._budget_changed.notify_all()
+
+    def record_graphql_rate_limit(self, token, rate_limit):
+        """
+        Update a token's GraphQL budget from a rateLimit { cost remaining resetAt } block.
+
+        Args:
+            token (str): Token that made the request
+            rate_limit (dict): rateLimit object from the GraphQL response
+        """
+        if token not in self._budgets or not rate_limit or rate_limit.get("remaining") is None:
+            return
+
+        reset = 0
+        if rate_limit.get("resetAt"):
+            reset = int(datetime.fromisoformat(rate_limit["resetAt"].replace("Z", "+00:00")).timestamp())
+
+        with self._lock:
+            budget = self._budgets[token].get("graphql", {})
+            self._budgets[token]["graphql"] = {
+                "remaining": self._counted_down(token, "graphql", reset, int(rate_limit["remaining"])),
+                "limit": int(rate_limit.get("limit") or budget.get("limit", DEFAULT_LIMITS["graphql"])),
+                "reset": reset,
+                "cost": rate_limit.get("cost"),
+            }
+            self._budget_changed.notify_all()
+
+    def record_rate_limits(self, token, resources):
+        """
+        Update a token's budgets from the "resources" of a GET /rate_limit response.
+
+        Args:
+            token (str): Token that made the request
+            resources (dict): Resource name -> {limit, remaining, reset}
+        """
+        if token not in self._budgets:
+            return
+        with self._lock:
+            for resource, budget in (resources or {}).items():
+                if resource not in DEFAULT_LIMITS or budget.get("remaining") is None:
+                    continue
+                reset = int(budget.get("reset", 0))
+                self._budgets[token][resource] = {
+                    "remaining": self._counted_down(token, resource, reset, int(budget["remaining"])),
+                    "limit": int(budget.get("limit", DEFAULT_LIMITS[resource])),
+                    "reset": reset,
+                }
+            self._budget_changed.notify_all()
+
+    def _counted_down(self, token, resource, reset, remaining):
+        """
+        Merge a reported remaining budget with the local count; caller holds the lock.
+
+        Within one window the budget only shrinks, so a response to a request sent
+        before others that are still in flight can't raise the count again.
+        """
+        budget = self._budgets[token].get(resource)
+        if budget and budget["reset"] == reset:
+            return min(remaining, budget["remaining"])
+        return remaining
+
+    def remaining(self, token, resource=None):
+        """
+        Get the known remaining budget of a token.
+
+        Budgets whose reset time has passed count as full again.
+
+        Args:
+            token (str): GitHub token
+            resource (str): Rate limit resource (core, search, graphql)
+
+        Returns:
+            int: Remaining requests or points
+        """
+        resource = resource or self.resource
+        with self._lock:
+            return self._remaining(token, resource)
+
+    def _remaining(self, token, resource):
+        """Remaining budget of a token; caller holds the lock."""
+        budget = self._budgets[token].get(resource)
+        if not budget or budget["reset"] <= time.time():
+            return DEFAULT_LIMITS.get(resource, 5000) if not budget else budget["limit"]
+        return budget["remaining"]
+
+    def limit(self, token, resource=None):
+        """Get the size of a token's budget per window."""
+        resource = resource or self.resource
+        with self._lock:
+            return self._budgets[token].get(resource, {}).get("limit", DEFAULT_LIMITS.get(resource, 5000))
+
+    def reset_time(self, token, resource=None):
+        """Get the epoch time at which a token's budget resets, 0 if unknown."""
+        resource = resource or self.resource
+        with self._lock:
+            return self._budgets[token].get(resource, {}).get("reset", 0)
+
+    def _take(self, token, resource):
+        """
+        Count a request against a token's bucket; caller holds the lock.
+
+        Budgets are counted down locally between responses, so concurrent
+        requests don't all see the same remaining budget and overrun it; the
+        next response's headers correct the count.
+
+        Returns:
+            float: 0 if the request may be sent, otherwise seconds until the bucket resets
+        """
+        now = time.time()
+        budget = self._budgets[token].get(resource)
+        if not budget or budget["reset"] <= now:
+            limit = budget["limit"] if budget else DEFAULT_LIMITS.get(resource, 5000)
+            budget = {
+                "remaining": limit,
+                "limit": limit,
+                "reset": int(now + RESET_WINDOWS.get(resource, DEFAULT_RESET_WINDOW)),
+            }
+            self._budgets[token][resource] = budget
+
+        if budget["remaining"] > 0:
+            budget["remaining"] -= 1
+            return 0
+        # Reset times have one-second resolution
+        return budget["reset"] - now + 1
+
+    def schedule(self, token, resource):
+        """
+        Wait until a token's bucket has budget for one more request and count it.
+
+        Only callers of the exhausted bucket wait, requests to the token's other
+        buckets keep flowing. A bucket that resets later than max_wait isn't waited
+        for: the request goes out and its rate limit response lets the caller
+        rotate tokens or wait as it would otherwise.
+
+        Args:
+            token (str): Token about to send the request
+            resource (str): Rate limit resource, see rate_limit_bucket()
+        """
+        if token not in self._budgets:
+            return
+        waiting = False
+        with self._budget_changed:
+            while True:
+                wait = self._take(token, resource)
+                if wait == 0 or wait > self.max_wait:
+                    return
+                if not waiting:
+                    waiting = True
+                    self._log_wait(token, resource, wait)
+                self._budget_changed.wait(wait)
+
+    async def schedule_async(self, token, resource):
+        """
+        Wait without blocking the event loop until a token's bucket has budget, see schedule().
+
+        Args:
+            token (str): Token about to send the request
+            resource (str): Rate limit resource, see rate_limit_bucket()
+        """
+        if token not in self._budgets:
+            return
+        waiting = False
+        while True:
+            with self._lock:
+                wait = self._take(token, resource)
+            if wait == 0 or wait > self.max_wait:
+                return
+            if not waiting:
+                waiting = True
+                self._log_wait(token, resource, wait)
+            # Re-check every second in case a response corrects the budget
+            await asyncio.sleep(min(wait, 1.0))
+
+    def _log_wait(self, token, resource, wait):
+        """Log that a request waits for its bucket to reset."""
+        logger.info(f"{resource} budget of token {self.tokens.index(token) + 1} exhausted, waiting {wait:.0f}s for reset")
+
+    def acquire(self, resource=None, exclude=()):
+        """
+        Lease the token with the most budget per active lease.
+
+        Args:
+            resource (str): Rate limit resource to rank by
+            exclude (iterable): Tokens to skip
+
+        Returns:
+            str: Leased token, or None if every token is excluded
+        """
+        resource = resource or self.resource
+        with self._lock:
+            candidates = [token for token in self.tokens if token not in exclude]
+            if not candidates:
+                return None
+            token = max(
+                candidates,
+                key=lambda t: (self._remaining(t, resource) / (self._leases[t] + 1), -self._leases[t])
+            )
+            self._leases[token] += 1
+            return token
+
+    def release(self, token):
+        """Return a leased token to the pool."""
+        with self._lock:
+            if self._leases.get(token, 0) > 0:
+                self._leases[token] -= 1
+
+    @contextmanager
+    def lease(self, resource=None, separate=False):
+        """
+        Hold one token for the current thread or asyncio task.
+
+        Re-entrant: nested leases in the same worker reuse the outer token, unless
+        separate is set for a sub-worker that needs a token of its own.
+
+        Args:
+            resource (str): Rate limit resource to rank by
+            separate (bool): Lease a new token even inside another lease
+        """
+        if self._current.get() is not None and not separate:
+            yield self._current.get()
+            return
+
+        current = TokenLease(self.acquire(resource))
+        context_token = self._current.set(current)
+        try:
+            yield current
+        finally:
+            self._current.reset(context_token)
+            self.release(current.token)
+
+    def current_lease(self):
+        """
+        Get the current worker's lease.
+
+        Leases are only taken by lease() (or @leases_token), which releases them;
+        a lease taken implicitly here would stay pinned to the caller's context and
+        be inherited by every task it starts.
+
+        Returns:
+            TokenLease: Current lease
+
+        Raises:
+            RuntimeError: If the current thread or asyncio task holds no lease
+        """
+        current = self._current.get()
+        if current is None:
+            raise RuntimeError("No GitHub token leased; wrap the call in token_pool.lease() or @leases_token")
+        return current
+
+    def client(self, factory, **kwargs):
+        """
+        Get a client bound to the current worker's token.
+
+        Args:
+            factory (callable): Client class taking (token, token_pool=..., **kwargs)
+            **kwargs: Extra constructor arguments
+
+        Returns:
+            object: Client instance
+        """
+        return self.current_lease().client(factory, self, **kwargs)
+
+    def rotate(self, resource=None):
+        """
+        Swap the current worker's token for the best other token.
+
+        Other workers keep their tokens.
+
+        Args:
+            resource (str): Rate limit resource to rank by
+
+        Returns:
+            bool: True if the worker now holds a different token
+        """
+        if len(self.tokens) <= 1:
+            return False
+
+        current = self.current_lease()
+        new_token = self.acquire(resource, exclude=(current.token,))
+        if new_token is None:
+            return False
+
+        self.release(current.token)
+        current.token = new_token
+        current.clients = {}
+        return True
+
+    def current_index(self):
+        """Index of the current worker's token in the token list."""
+        return self.tokens.index(self.current_lease().token)
+
+
+def leases_token(method):
+    """
+    Hold a lease from self.token_pool for the duration of a method call.
+
+    Works for plain and async methods, so each thread or asyncio task running the
+    method gets its own token.
+    """
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            with self.token_pool.lease():
+                return await method(self, *args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.token_pool.lease():
+            return method(self, *args, **kwargs)
+    return wrapper
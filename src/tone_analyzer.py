@@ -4,10 +4,12 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import os
 import json
-import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from openai import OpenAI
+from adaptive_concurrency import AdaptiveLimiter
+from retry import RetryPolicy, openai_retry
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, 
@@ -20,23 +22,26 @@ class MapReduceToneAnalyzer:
     Processes large comment datasets by breaking them into manageable chunks.
     """
     
-    def __init__(self, api_key=None, model="gpt-4o-mini", rate_limit_delay=0.5):
+    def __init__(self, api_key=None, model="gpt-4o-mini", limiter=None, retry=None):
         """
         Initialize with OpenAI API key.
         
         Args:
             api_key (str): OpenAI API key
             model (str): OpenAI model to use
-            rate_limit_delay (float): Delay between API calls (seconds)
+            limiter (AdaptiveLimiter, optional): In-flight request limit, defaults to the shared OpenAI one
+            retry (RetryPolicy, optional): Retry policy, defaults to the shared OpenAI one
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             logger.error("OpenAI API key not found. Please provide via parameter or OPENAI_API_KEY environment variable")
             raise ValueError("Missing OpenAI API key")
             
-        self.client = OpenAI(api_key=self.api_key)
+        # Retries are left to the retry policy
+        self.client = OpenAI(api_key=self.api_key, max_retries=0)
         self.model = model
-        self.rate_limit_delay = rate_limit_delay
+        self.limiter = limiter or AdaptiveLimiter.from_env("openai")
+        self.retry = retry or RetryPolicy.from_env("openai")
         
         # Constants for token management
         self.COMPLETION_TOKEN_BUFFER_RATIO = 0.2  # 20% of context window for completion buffer
@@ -103,13 +108,9 @@ class MapReduceToneAnalyzer:
         chunks = self._chunk_comments(comments, max_context_size)
         logger.info(f"Split {len(comments)} comments into {len(chunks)} chunks")
         
-        # Map phase: analyze each chunk
-        chunk_analyses = []
-        for i, chunk in enumerate(chunks):
-            logger.info(f"Analyzing chunk {i+1}/{len(chunks)} with {len(chunk)} comments")
-            chunk_analysis = self._analyze_comments(chunk)
-            chunk_analyses.append(chunk_analysis)
-            time.sleep(self.rate_limit_delay)
+        # Map phase: analyze the chunks concurrently, as many at a time as the limiter allows
+        with ThreadPoolExecutor(max_workers=self.limiter.maximum) as executor:
+            chunk_analyses = list(executor.map(self._analyze_comments, chunks))
             
         # Reduce phase: combine analyses
         combined_analysis = self._reduce_analyses(chunk_analyses)
@@ -153,17 +154,10 @@ Here is the list of comments:
 {}
 """.format("\n\n".join([f"Comment: {text}" for text in comment_texts]))
 
+        logger.info(f"Analyzing chunk with {len(comment_texts)} comments")
         try:
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0
-            )
-            content = response.choices[0].message.content.strip()
+            content = self._complete(system_prompt, user_prompt)
             
             # Create output with raw text only
             analysis = {
@@ -177,6 +171,37 @@ Here is the list of comments:
             logger.error(f"Error calling OpenAI API: {e}")
             return {"error": str(e)}
             
+    def _complete(self, system_prompt, user_prompt):
+        """
+        Run one chat completion within the limiter, retried by the retry policy.
+        
+        Args:
+            system_prompt (str): System message
+            user_prompt (str): User message
+            
+        Returns:
+            str: Response text
+        """
+        def attempt():
+            try:
+                with self.limiter.slot():
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_prompt}
+                        ],
+                        temperature=0
+                    )
+            except Exception as e:
+                self.limiter.record_openai_error(e)
+                raise
+            self.limiter.record_success()
+            return response
+        
+        response = self.retry.call(attempt, openai_retry)
+        return response.choices[0].message.content.strip()
+            
     def _reduce_analyses(self, analyses):
         """
         Combine multiple analyses into one.
@@ -225,15 +250,7 @@ Here are the analyses to combine:
 
         try:
             # Call OpenAI API for meta-analysis
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0
-            )
-            content = response.choices[0].message.content.strip()
+            content = self._complete(system_prompt, user_prompt)
             
             # Create output with raw text only
             combined_analysis = {
@@ -349,16 +366,13 @@ def main():
                       help="OpenAI API key (or use OPENAI_API_KEY env variable)")
     parser.add_argument("--model", type=str, default="gpt-4o-mini",
                       help="OpenAI model to use (default: gpt-4o-mini)")
-    parser.add_argument("--delay", type=float, default=0.5,
-                      help="Delay between API calls in seconds (default: 0.5)")
     
     args = parser.parse_args()
     
     try:
         analyzer = MapReduceToneAnalyzer(
             api_key=args.api_key,
-            model=args.model,
-            rate_limit_delay=args.delay
+            model=args.model
         )
         
         analyzer.analyze_tone(
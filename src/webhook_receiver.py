@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Receive GitHub pull_request_review_comment webhooks and store the comments of tracked experts.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import glob
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from comment_crawler import GitHubCommentCrawler
+from gharchive import review_comment_record
+
+logger = logging.getLogger(__name__)
+
+# GitHub caps webhook payloads at 25 MB
+MAX_PAYLOAD_SIZE = 25 * 1024 * 1024
+
+
+class WebhookReceiver:
+    """
+    Appends review comments pushed by GitHub webhooks to the tracked experts' crawls.
+
+    Tracked experts are those listed in the experts.json of every language under
+    output_dir, re-read whenever one of the files changes. A comment is stored
+    when its delivery is signed with the shared secret, it was just created, its
+    author is tracked and it passes is_valid_comment; stored comments are then
+    handed to the downstream queue for enrichment and embedding.
+    """
+
+    def __init__(self, crawler, output_dir=None, secret=None, queue=None):
+        """
+        Initialize the receiver.
+
+        Args:
+            crawler (GitHubCommentCrawler): Crawler whose store the comments are merged into
+            output_dir (str): Pipeline data directory, defaults to OUTPUT_DIR
+            secret (str): Webhook secret, defaults to WEBHOOK_SECRET; unsigned deliveries are accepted without one
+            queue (DownstreamQueue, optional): Queue enriching and embedding stored comments
+        """
+        self.crawler = crawler
+        self.output_dir = output_dir or os.getenv("OUTPUT_DIR", "data")
+        self.secret = secret if secret is not None else os.getenv("WEBHOOK_SECRET")
+        self.queue = queue
+        self._lock = threading.Lock()
+        self._experts = {}
+        self._experts_mtimes = None
+
+    def tracked_experts(self):
+        """
+        Get the tracked experts, reloading them when an experts.json changed.
+
+        Returns:
+            dict: Lowercase login -> (language, login)
+        """
+        paths = glob.glob(os.path.join(self.output_dir, "*", "experts.json"))
+        mtimes = {path: os.path.getmtime(path) for path in paths}
+        with self._lock:
+            if mtimes != self._experts_mtimes:
+                experts = {}
+                for path in paths:
+                    language = os.path.basename(os.path.dirname(path))
+                    try:
+                        with open(path, "r", encoding="utf-8") as f:
+                            for expert in json.load(f):
+                                experts[expert["login"].lower()] = (language, expert["login"])
+                    except Exception as e:
+                        logger.error(f"Error reading {path}: {e}")
+                self._experts = experts
+                self._experts_mtimes = mtimes
+            return self._experts
+
+    def verify_signature(self, body, signature):
+        """
+        Check the X-Hub-Signature-256 header of a delivery.
+
+        Args:
+            body (bytes): Raw request body
+            signature (str): Header value, "sha256=<hex digest>"
+
+        Returns:
+            bool: True if no secret is configured or the signature matches
+        """
+        if not self.secret:
+            return True
+        expected = "sha256=" + hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature or "")
+
+    def handle(self, event, body, signature):
+        """
+        Process one webhook delivery.
+
+        Args:
+            event (str): X-GitHub-Event header
+            body (bytes): Raw request body
+            signature (str): X-Hub-Signature-256 header
+
+        Returns:
+            tuple: (HTTP status, response dict with status and reason)
+        """
+        if not self.verify_signature(body, signature):
+            return 401, {"status": "rejected", "reason": "invalid signature"}
+        if event == "ping":
+            return 200, {"status": "pong"}
+        if event != "pull_request_review_comment":
+            return 202, {"status": "ignored", "reason": f"event {event}"}
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {"status": "rejected", "reason": "invalid JSON"}
+        if payload.get("action") != "created":
+            return 202, {"status": "ignored", "reason": f"action {payload.get('action')}"}
+
+        login = ((payload.get("comment") or {}).get("user") or {}).get("login") or ""
+        expert = self.tracked_experts().get(login.lower())
+        if not expert:
+            return 202, {"status": "ignored", "reason": f"{login or 'unknown author'} is not tracked"}
+
+        record = review_comment_record(payload, (payload.get("repository") or {}).get("full_name"))
+        if not record or not record["comment_url"] or not record["file_path"] or not record["repo"]:
+            return 400, {"status": "rejected", "reason": "incomplete review comment"}
+        if not self.crawler.is_valid_comment(record["comment"]):
+            return 202, {"status": "ignored", "reason": "comment failed validation"}
+
+        language, username = expert
+        output_file = os.path.join(self.output_dir, language, "experts", username, "comments.json")
+        # Only the comment is inserted, a crawl of the expert running in the pipeline keeps its cursors;
+        # the lock keeps parallel deliveries from interleaving JSON exports
+        with self._lock:
+            added = self.crawler.merge_comments(output_file, [record], None)
+        if not added:
+            return 200, {"status": "duplicate"}
+
+        logger.info(f"Stored review comment of {username} on {record['repo']}#{record['pr_number']}")
+        if self.queue:
+            self.queue.put(language, username, [record["comment_url"]])
+        return 200, {"status": "stored"}
+
+    def serve(self, host="127.0.0.1", port=8787):
+        """
+        Serve webhook deliveries until interrupted.
+
+        Args:
+            host (str): Interface to listen on
+            port (int): Port to listen on
+        """
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > MAX_PAYLOAD_SIZE:
+                    status, response = 413, {"status": "rejected", "reason": "payload too large"}
+                else:
+                    body = self.rfile.read(length)
+                    try:
+                        status, response = receiver.handle(
+                            self.headers.get("X-GitHub-Event"), body, self.headers.get("X-Hub-Signature-256")
+                        )
+                    except Exception as e:
+                        logger.error(f"Error handling delivery {self.headers.get('X-GitHub-Delivery')}: {e}")
+                        status, response = 500, {"status": "error"}
+
+                data = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        if not self.secret:
+            logger.warning("WEBHOOK_SECRET is not set, accepting unsigned deliveries")
+        logger.info(f"Listening for webhooks on http://{host}:{server.server_port}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+
+
+class DownstreamQueue:
+    """
+    Enriches and embeds pushed comments in the background.
+
+    Comments of one expert are batched for `delay` seconds after the first of
+    them arrives, so a burst of review comments costs one enrichment pass and
+    one upload. Only the batch's comments are embedded, not the whole file.
+    """
+
+    def __init__(self, enricher, embedder, output_dir=None, delay=None):
+        """
+        Initialize the queue and start its worker thread.
+
+        Args:
+            enricher (CommentEnricher): Enricher classifying new comments
+            embedder (CommentEmbedder, optional): Embedder uploading them to Qdrant, None to only enrich
+            output_dir (str): Pipeline data directory, defaults to OUTPUT_DIR
+            delay (float): Seconds comments of one expert are batched, defaults to WEBHOOK_BATCH_DELAY
+        """
+        self.enricher = enricher
+        self.embedder = embedder
+        self.output_dir = output_dir or os.getenv("OUTPUT_DIR", "data")
+        self.delay = delay if delay is not None else float(os.getenv("WEBHOOK_BATCH_DELAY", "30"))
+        self._pending = {}  # (language, username) -> (time first queued, comment URLs)
+        self._changed = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="webhook-downstream", daemon=True)
+        self._thread.start()
+
+    def put(self, language, username, comment_urls):
+        """
+        Queue stored comments of an expert.
+
+        Args:
+            language (str): Language directory of the expert
+            username (str): GitHub username
+            comment_urls (list): URLs of the stored comments
+        """
+        with self._changed:
+            _, urls = self._pending.setdefault((language, username), (time.time(), set()))
+            urls.update(comment_urls)
+            self._changed.notify()
+
+    def close(self):
+        """Process everything still queued, then stop the worker."""
+        with self._changed:
+            self._closed = True
+            self._changed.notify()
+        self._thread.join()
+
+    def _next_batch(self):
+        """
+        Wait for the oldest expert batch to become due.
+
+        Returns:
+            tuple: ((language, username), comment URLs), None once closed and drained
+        """
+        with self._changed:
+            while True:
+                if self._pending:
+                    key, (queued, urls) = min(self._pending.items(), key=lambda item: item[1][0])
+                    wait = 0 if self._closed else queued + self.delay - time.time()
+                    if wait <= 0:
+                        del self._pending[key]
+                        return key, urls
+                    self._changed.wait(wait)
+                elif self._closed:
+                    return None
+                else:
+                    self._changed.wait()
+
+    def _run(self):
+        """Worker loop processing due batches."""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            (language, username), urls = batch
+            try:
+                self._process(language, username, urls)
+            except Exception as e:
+                logger.error(f"Error enriching pushed comments of {username}: {e}")
+
+    def _process(self, language, username, urls):
+        """Enrich an expert's new comments and embed the batch."""
+        expert_dir = os.path.join(self.output_dir, language, "experts", username)
+        enriched = self.enricher.enrich_comments(
+            input_file=os.path.join(expert_dir, "comments.json"),
+            output_file=os.path.join(expert_dir, "comments.enriched.json"),
+            continue_enrichment=True
+        )
+        new_comments = [comment for comment in enriched if comment.get("comment_url") in urls]
+        if self.embedder and new_comments:
+            collection_name = os.getenv("COLLECTION_NAME", f"github_{language}_experts")
+            self.embedder.upload_comments(new_comments, collection_name, username)
+        logger.info(f"Enriched and embedded {len(new_comments)} pushed comments of {username}")
+
+
+def replay(target, paths, event="pull_request_review_comment", secret=None):
+    """
+    Send saved webhook payloads to a receiver, signed like GitHub signs them.
+
+    Payloads are posted to a running receiver, or handed straight to a
+    WebhookReceiver in this process, so tests need no server or socket.
+
+    Args:
+        target (str or WebhookReceiver): Receiver URL, or receiver to call handle() on
+        paths (list): JSON payload files, or directories of them
+        event (str): X-GitHub-Event header to send
+        secret (str): Webhook secret to sign with, None to send unsigned
+
+    Returns:
+        list: (path, HTTP status, response dict) per payload
+    """
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.json"))) if os.path.isdir(path) else [path])
+
+    results = []
+    for path in files:
+        with open(path, "rb") as f:
+            body = f.read()
+        signature = None
+        if secret:
+            signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+        if isinstance(target, WebhookReceiver):
+            status, result = target.handle(event, body, signature)
+            results.append((path, status, result))
+            continue
+
+        headers = {
+            "Content-Type": "application/json",
+            "X-GitHub-Event": event,
+            "X-GitHub-Delivery": str(uuid.uuid4()),
+        }
+        if signature:
+            headers["X-Hub-Signature-256"] = signature
+        response = requests.post(target, data=body, headers=headers, timeout=30)
+        try:
+            result = response.json()
+        except ValueError:
+            result = {"status": response.text}
+        results.append((path, response.status_code, result))
+    return results
+
+
+def main():
+    """Run the webhook receiver or replay saved payloads against it."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Receive pull_request_review_comment webhooks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Listen for webhook deliveries")
+    serve_parser.add_argument("--host", type=str, default=os.getenv("WEBHOOK_HOST", "127.0.0.1"),
+                              help="Interface to listen on")
+    serve_parser.add_argument("--port", type=int, default=int(os.getenv("WEBHOOK_PORT", "8787")),
+                              help="Port to listen on")
+    serve_parser.add_argument("--no-enrich", action="store_true",
+                              help="Only store comments, leave enrichment and embedding to the pipeline")
+
+    replay_parser = commands.add_parser("replay", help="Send saved payloads to a receiver")
+    replay_parser.add_argument("payloads", nargs="+",
+                               help="JSON payload files or directories of them")
+    replay_parser.add_argument("--url", type=str,
+                               default=f"http://127.0.0.1:{os.getenv('WEBHOOK_PORT', '8787')}/",
+                               help="Receiver URL")
+    replay_parser.add_argument("--event", type=str, default="pull_request_review_comment",
+                               help="X-GitHub-Event header to send")
+    replay_parser.add_argument("--output-dir", type=str,
+                               help="Store into this data directory in-process instead of posting to --url")
+
+    args = parser.parse_args()
+    secret = os.getenv("WEBHOOK_SECRET")
+
+    if args.command == "replay":
+        # In-process replays only store comments, like serve --no-enrich
+        target = WebhookReceiver(GitHubCommentCrawler([]), args.output_dir, secret) if args.output_dir else args.url
+        for path, status, result in replay(target, args.payloads, args.event, secret):
+            print(f"{path}: {status} {result.get('status')} {result.get('reason', '')}".rstrip())
+        return 0
+
+    queue = None
+    if not args.no_enrich:
+        # OpenAI and Qdrant clients are only needed when the receiver enriches itself
+        from comment_enricher import CommentEnricher
+        from embedding_importer import CommentEmbedder
+        openai_key = os.getenv("OPENAI_API_KEY")
+        queue = DownstreamQueue(
+            CommentEnricher(api_key=openai_key, model=os.getenv("OPENAI_MODEL", "gpt-4o-mini")),
+            CommentEmbedder(
+                openai_api_key=openai_key,
+                embedding_model=os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"),
+                qdrant_url=os.getenv("QDRANT_URL", "http://localhost:6333"),
+                qdrant_api_key=os.getenv("QDRANT_API_KEY")
+            )
+        )
+
+    # Comments arrive with the delivery, so the crawler needs no token
+    receiver = WebhookReceiver(GitHubCommentCrawler([]), queue=queue)
+    try:
+        receiver.serve(args.host, args.port)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if queue:
+            queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())